@@ -0,0 +1,217 @@
+"""
+ANÁLISE DE PREÇOS - Estatísticas do histórico do KaBuM! com NumPy
+O histórico de todo o catálogo vira arrays (produto, preço em centavos, início
+e fim da vigência em segundos desde a época e peso), ordenados por produto.
+Cada métrica é uma redução por segmento (np.minimum.reduceat, np.add.reduceat...),
+calculada para todos os produtos de uma vez, sem laço em Python por produto.
+
+Cada linha do histórico vale até a próxima linha do mesmo produto (qualquer
+status), então o peso de um preço é o tempo em que ele esteve em vigor dentro
+da janela, não a quantidade de linhas: com o histórico só de mudanças
+(HISTORICO_DELTA) um preço parado há semanas pesa semanas, não uma linha.
+
+Métricas por produto:
+    - menor/maior preço histórico e menor preço nas janelas de JANELAS_MINIMO_DIAS
+    - percentis ponderados pelo tempo (PERCENTIS) e a fração do tempo em que o
+      preço esteve até o preço atual
+    - drawdown: quanto o preço atual está acima do menor histórico (fração)
+    - média e desvio ponderados pelo tempo, z-score do preço atual e anomalia
+      quando |z| >= LIMITE_ZSCORE
+    - dias: tempo coberto pelo histórico na janela (soma das vigências)
+
+Uso (a partir do Kabum_API):
+    arrays = carregar_arrays(linhas_historico, chaves, precos_atuais, agora_epoca, inicio_epoca)
+    resultado = analisar_precos(arrays, len(chaves), agora_epoca)
+    metricas = para_dicionarios(chaves, resultado)
+"""
+
+import numpy as np
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+# Janelas (dias) do menor preço recente
+JANELAS_MINIMO_DIAS = (7, 30)
+
+# Percentis do histórico de cada produto
+PERCENTIS = (10, 50, 90)
+
+# Preço atual é anômalo quando |z-score| passa deste limite...
+LIMITE_ZSCORE = 2.5
+
+# ...e o histórico do produto cobre pelo menos estes dias (soma das vigências)
+DIAS_MINIMOS_ZSCORE = 3
+
+# Status do histórico que têm preço
+STATUS_COM_PRECO = 'disponivel'
+
+# Desloca o índice do produto acima de qualquer preço em centavos (chave única produto+preço)
+_DESLOCAMENTO_PRODUTO = 1 << 40
+
+# ========================================
+# CARGA
+# ========================================
+
+def carregar_arrays(linhas, chaves, precos_atuais=None, agora_epoca=None, inicio_epoca=None):
+    """
+    Converte linhas do histórico em arrays NumPy, ordenados por (produto, data).
+
+    linhas traz todos os status (uma linha esgotada encerra a vigência do preço
+    anterior) e pode incluir a linha em vigor no início da janela, anterior a
+    inicio_epoca: a vigência dela é cortada no início da janela. Cada linha vale
+    até a próxima do mesmo produto; a última, até agora_epoca.
+    precos_atuais (alinhado com chaves, None/0 para quem não tem preço agora)
+    entra como a amostra mais recente de cada produto, em agora_epoca, com peso
+    mínimo (conta para o preço atual, não para a distribuição).
+    Só ficam as linhas disponíveis com preço de produtos presentes em chaves.
+    Retorna: dict com 'produto' (índice em chaves), 'centavos', 'epoca', 'fim' e
+    'peso' (segundos de vigência dentro da janela, no mínimo 1)
+    """
+    indices = {chave: i for i, chave in enumerate(chaves)}
+    produtos, precos, datas = [], [], []
+    for linha in linhas:
+        indice = indices.get(linha.get('product_key'))
+        if indice is None:
+            continue
+        preco = linha.get('preco_atual')
+        produtos.append(indice)
+        precos.append(preco if preco and linha.get('status') == STATUS_COM_PRECO else 0)
+        datas.append(str(linha['data_coleta'])[:19].replace(' ', 'T'))
+
+    produto = np.array(produtos, dtype=np.int64)
+    centavos = np.rint(np.array(precos, dtype=np.float64) * 100).astype(np.int64)
+    epoca = np.array(datas, dtype='datetime64[s]').astype(np.int64)
+
+    if precos_atuais is not None:
+        atuais = np.array([p or 0 for p in precos_atuais], dtype=np.float64)
+        com_preco = np.flatnonzero(atuais > 0)
+        produto = np.concatenate([produto, com_preco])
+        centavos = np.concatenate([centavos, np.rint(atuais[com_preco] * 100).astype(np.int64)])
+        epoca = np.concatenate([epoca, np.full(len(com_preco), agora_epoca, dtype=np.int64)])
+
+    ordem = np.lexsort((epoca, produto))
+    produto, centavos, epoca = produto[ordem], centavos[ordem], epoca[ordem]
+
+    # Vigência: até a próxima linha do mesmo produto ou, na última, até agora
+    mesmo_produto = np.r_[produto[1:] == produto[:-1], False]
+    fim_produto = epoca if agora_epoca is None else np.full(len(epoca), agora_epoca, dtype=np.int64)
+    fim = np.where(mesmo_produto, np.r_[epoca[1:], 0], np.maximum(fim_produto, epoca))
+    inicio = epoca if inicio_epoca is None else np.maximum(epoca, inicio_epoca)
+    peso = np.maximum(fim - inicio, 1)
+
+    manter = centavos > 0
+    if inicio_epoca is not None:
+        manter &= fim > inicio_epoca
+    return {'produto': produto[manter], 'centavos': centavos[manter], 'epoca': epoca[manter],
+            'fim': fim[manter], 'peso': peso[manter]}
+
+# ========================================
+# MÉTRICAS
+# ========================================
+
+def _por_produto(total_produtos, presentes, valores, vazio=np.nan):
+    """Espalha valores dos segmentos presentes em um array de todos os produtos"""
+    resultado = np.full(total_produtos, vazio, dtype=np.float64)
+    resultado[presentes] = valores
+    return resultado
+
+def analisar_precos(arrays, total_produtos, agora_epoca):
+    """
+    Calcula as métricas de todos os produtos em uma passada vetorizada.
+
+    arrays vem de carregar_arrays (ordenado por produto e data). Percentis, média
+    e desvio são ponderados pela vigência de cada preço; o menor preço de uma
+    janela considera os preços em vigor em algum momento dela. Produtos sem
+    amostras ficam com NaN (e 0 amostras).
+    Retorna: dict {métrica: array de tamanho total_produtos}, preços em reais
+    """
+    produto, centavos, fim, peso = arrays['produto'], arrays['centavos'], arrays['fim'], arrays['peso']
+    if len(produto) == 0:
+        vazio = np.full(total_produtos, np.nan)
+        resultado = {nome: vazio.copy() for nome in (
+            'atual', 'minimo_historico', 'maximo_historico', 'drawdown', 'media', 'desvio', 'dias',
+            'zscore', 'percentil_atual', *(f"minimo_{dias}d" for dias in JANELAS_MINIMO_DIAS),
+            *(f"p{percentil}" for percentil in PERCENTIS))}
+        resultado['amostras'] = np.zeros(total_produtos, dtype=np.int64)
+        resultado['anomalia'] = np.zeros(total_produtos, dtype=bool)
+        return resultado
+
+    # Segmentos: um trecho contínuo por produto
+    inicios = np.flatnonzero(np.r_[True, produto[1:] != produto[:-1]])
+    fins = np.r_[inicios[1:], len(produto)]
+    contagens = fins - inicios
+    presentes = produto[inicios]
+
+    atual = centavos[fins - 1]
+    minimo = np.minimum.reduceat(centavos, inicios)
+    maximo = np.maximum.reduceat(centavos, inicios)
+
+    resultado = {
+        'amostras': np.zeros(total_produtos, dtype=np.int64),
+        'atual': _por_produto(total_produtos, presentes, atual / 100),
+        'minimo_historico': _por_produto(total_produtos, presentes, minimo / 100),
+        'maximo_historico': _por_produto(total_produtos, presentes, maximo / 100),
+        'drawdown': _por_produto(total_produtos, presentes, (atual - minimo) / minimo),
+    }
+    resultado['amostras'][presentes] = contagens
+
+    # Menor preço nas janelas recentes (preços que saíram de vigor antes da janela viram sentinela)
+    sentinela = np.iinfo(np.int64).max
+    for dias in JANELAS_MINIMO_DIAS:
+        na_janela = np.where(fim > agora_epoca - dias * 86400, centavos, sentinela)
+        minimo_janela = np.minimum.reduceat(na_janela, inicios).astype(np.float64)
+        minimo_janela[minimo_janela == sentinela] = np.nan
+        resultado[f"minimo_{dias}d"] = _por_produto(total_produtos, presentes, minimo_janela / 100)
+
+    # Percentis ponderados: menor preço em que o tempo acumulado (preços ordenados
+    # dentro de cada segmento) alcança o percentil do tempo total do produto
+    ordem = np.lexsort((centavos, produto))
+    chave_ordenada = (produto * _DESLOCAMENTO_PRODUTO + centavos)[ordem]
+    ordenados = centavos[ordem]
+    acumulado = np.cumsum(peso[ordem])
+    antes = acumulado[inicios] - peso[ordem][inicios]       # tempo acumulado antes do segmento
+    total = np.add.reduceat(peso, inicios)
+    for percentil in PERCENTIS:
+        posicao = np.searchsorted(acumulado * 100, antes * 100 + percentil * total, side='left')
+        posicao = np.clip(posicao, inicios, fins - 1)
+        resultado[f"p{percentil}"] = _por_produto(total_produtos, presentes, ordenados[posicao] / 100)
+
+    # Percentil do preço atual: fração do tempo com preço <= preço atual
+    ate_atual = np.searchsorted(chave_ordenada, presentes * _DESLOCAMENTO_PRODUTO + atual, side='right') - 1
+    resultado['percentil_atual'] = _por_produto(total_produtos, presentes, (acumulado[ate_atual] - antes) / total * 100)
+
+    # Z-score do preço atual contra o histórico do produto (média e desvio ponderados pelo tempo)
+    valores = centavos.astype(np.float64)
+    media = np.add.reduceat(valores * peso, inicios) / total
+    variancia = np.maximum(np.add.reduceat(valores * valores * peso, inicios) / total - media * media, 0)
+    desvio = np.sqrt(variancia)
+    zscore = np.divide(atual - media, desvio, out=np.zeros_like(media), where=desvio > 0)
+
+    resultado['media'] = _por_produto(total_produtos, presentes, media / 100)
+    resultado['desvio'] = _por_produto(total_produtos, presentes, desvio / 100)
+    resultado['zscore'] = _por_produto(total_produtos, presentes, zscore)
+    resultado['anomalia'] = np.zeros(total_produtos, dtype=bool)
+    resultado['dias'] = _por_produto(total_produtos, presentes, total / 86400)
+    resultado['anomalia'][presentes] = (np.abs(zscore) >= LIMITE_ZSCORE) & (total >= DIAS_MINIMOS_ZSCORE * 86400)
+
+    return resultado
+
+def para_dicionarios(chaves, resultado):
+    """
+    Converte o resultado de analisar_precos em {product_key: {métrica: valor}}.
+
+    NaN vira None; só entram produtos com amostras.
+    """
+    nomes = list(resultado)
+    posicao_amostras = nomes.index('amostras')
+    colunas = [
+        [None if valor != valor else valor for valor in resultado[nome].tolist()]
+        if resultado[nome].dtype.kind == 'f' else resultado[nome].tolist()
+        for nome in nomes
+    ]
+    return {
+        chave: dict(zip(nomes, valores))
+        for chave, valores in zip(chaves, zip(*colunas))
+        if valores[posicao_amostras]
+    }
@@ -3,10 +3,7 @@ MONITOR FORTNITE - VERSÃO ULTRA MELHORADA
 Estratégia: Lista todos os itens primeiro, depois faz matching inteligente
 """
 
-import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 import time
 import re
@@ -16,9 +13,18 @@ import random
 import smtplib
 from email.message import EmailMessage
 import os
+import argparse
 import unicodedata
+from urllib.parse import urlsplit
+from collections import Counter, defaultdict
 from difflib import SequenceMatcher
-import requests
+from functools import lru_cache
+from itertools import chain
+from Navegador import (aplicar_opcoes_bloqueio, configurar_bloqueio, aplicar_carregamento_eager,
+                       aguardar_condicao, aguardar_seletor, aguardar_dom_estavel, imprimir_tempos_espera,
+                       aplicar_perfil, iniciar_driver_perfil, registrar_tempo_perfil, finalizar_perfil,
+                       imprimir_relatorio_perfis)
+from Metricas import etapa, cronometrar, imprimir_etapas, gravar_metricas
 
 # ========================================
 # CONFIGURAÇÕES
@@ -55,10 +61,151 @@ TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 FORTNITE_SHOP_URL = "https://www.fortnite.com/item-shop?lang=pt-BR"
+CAMINHO_LOJA = urlsplit(FORTNITE_SHOP_URL).path.rstrip('/')  # "/item-shop" (rotas de item ficam abaixo dele)
 
 # NOVO: Dicionário global para armazenar XPaths dos cards
 CACHE_XPATHS = {}
 
+# Categorias de recursos que o Chrome carrega: as imagens definem a altura dos
+# cards, e sem elas o scroll não dispara o carregamento do restante da grade
+BLOQUEIO_PERMITIR = ('imagem',)
+
+# Perfil persistente do Chrome (Navegador.PERFIL_PERSISTENTE)
+PERFIL_CHROME = 'fortnite'
+
+# Seletor que indica que a grade da loja renderizou
+SELETOR_TITULO_ITEM = '[data-testid="item-title"]'
+
+# Listagem da loja em uma única chamada ao navegador (0 = caminho elemento a elemento)
+LISTAGEM_VIA_SCRIPT = os.environ.get('FORTNITE_LISTAGEM_SCRIPT', '1') != '0'
+
+# Mesma lógica de encontrar_card_correto, extrair_preco_do_card e gerar_xpath_elemento,
+# executada no navegador para todos os títulos de uma vez (arguments[0] = seletor do título)
+SCRIPT_LISTAR_ITENS = """
+    const normalizar = (texto) => (texto || '').toLowerCase().trim().normalize('NFD')
+        .replace(/[\\u0300-\\u036f]/g, '').split(/\\s+/).filter(Boolean).join(' ');
+    const contar = (texto, trecho) => trecho ? texto.split(trecho).length - 1 : 0;
+    const digitos = (texto) => (texto || '').replace(/[^\\d]/g, '');
+
+    const caminhoXpath = (el) => {
+        if (el.id !== '') return '//*[@id="' + el.id + '"]';
+        if (el === document.body) return '/html/body';
+        let ix = 0;
+        const irmaos = el.parentNode.childNodes;
+        for (let i = 0; i < irmaos.length; i++) {
+            const irmao = irmaos[i];
+            if (irmao === el) return caminhoXpath(el.parentNode) + '/' + el.tagName.toLowerCase() + '[' + (ix + 1) + ']';
+            if (irmao.nodeType === 1 && irmao.tagName === el.tagName) ix++;
+        }
+        return null;
+    };
+
+    const encontrarCard = (titulo, nome) => {
+        const nomeNorm = normalizar(nome);
+        let atual = titulo;
+        for (let nivel = 0; nivel < 10; nivel++) {
+            const pai = atual.parentElement;
+            if (!pai) break;
+            const texto = normalizar(pai.textContent);
+            if (contar(texto, nomeNorm) === 1 && (texto.includes('v-bucks') || texto.includes('vbucks'))) return pai;
+            atual = pai;
+        }
+        return atual;
+    };
+
+    const extrairPreco = (card) => {
+        const precoEl = card.querySelector("[data-testid='current-vbuck-price']");
+        if (precoEl) {
+            let numero = digitos(precoEl.textContent);
+            if (numero) return parseInt(numero, 10);
+            numero = digitos(precoEl.innerHTML.replace(/<[^>]+>/g, ''));
+            if (numero) return parseInt(numero, 10);
+        }
+        const porClasse = card.querySelector('[class*="price"], [class*="vbuck"], [class*="cost"]');
+        if (porClasse) {
+            const numero = parseInt(digitos(porClasse.innerText), 10);
+            if (numero >= 100 && numero <= 10000) return numero;
+        }
+        const regex = /(\\d{1,2}\\.\\d{3}|\\d{3,5})\\s*(?:V-?Bucks?)?/gi;
+        let match;
+        while ((match = regex.exec(card.textContent || '')) !== null) {
+            const numero = parseInt(match[1].replace('.', ''), 10);
+            if (numero >= 100 && numero <= 10000) return numero;
+        }
+        return null;
+    };
+
+    const itens = [];
+    const vistos = new Set();
+    for (const titulo of document.querySelectorAll(arguments[0])) {
+        const nome = (titulo.innerText || titulo.textContent || '').trim();
+        if (nome.length < 2 || vistos.has(normalizar(nome))) continue;
+        vistos.add(normalizar(nome));
+
+        const card = encontrarCard(titulo, nome);
+        const link = card.closest('a[href]') || card.querySelector('a[href]');
+        itens.push({
+            nome: nome,
+            preco: extrairPreco(card),
+            xpath: caminhoXpath(card),
+            link: link ? link.href : null,
+            elemento: titulo,
+            card: card,
+        });
+    }
+    return itens;
+"""
+
+# Palavras ignoradas na comparação por palavras (muito comuns/genéricas)
+PALAVRAS_GENERICAS = {'pacote', 'pacotao', 'pack', 'bundle', 'set', 'edition', 'skin', 'outfit'}
+
+# Similaridade mínima do critério 4 do match e dos "itens similares" exibidos quando não há match
+SIMILARIDADE_MINIMA_MATCH = 0.85
+SIMILARIDADE_MINIMA_SUGESTAO = 0.4
+
+# Itens com mais trigramas em comum avaliados para os "itens similares"
+SUGESTOES_CANDIDATOS = 50
+
+# Histórico da loja: um snapshot por execução, só acrescentado (nunca sobrescrito)
+SNAPSHOTS_PATH = os.environ.get('FORTNITE_SNAPSHOTS', 'fortnite_loja.sqlite3')
+
+# Itens que continuam na rotação reaproveitam a disponibilidade do último snapshot
+# enquanto a data de fim não passou, em vez de abrir o modal de novo
+# (0 = abre o modal de todos os itens monitorados)
+REUSAR_DISPONIBILIDADE = os.environ.get('FORTNITE_REUSAR_DISPONIBILIDADE', '1') != '0'
+
+# Modal do item pronto quando o texto de disponibilidade aparece
+SCRIPT_MODAL_PRONTO = """
+    const texto = (document.body && document.body.innerText || '').toLowerCase();
+    return texto.includes('ficará à venda até') || !!document.querySelector('[role="dialog"]');
+"""
+
+# Disponibilidade lida do modal sem sair da página; a loja só é recarregada
+# quando a grade não está intacta depois de fechar o modal (0 = sempre recarrega)
+DISPONIBILIDADE_SEM_RECARGA = os.environ.get('FORTNITE_DISPONIBILIDADE_MODAL', '1') != '0'
+
+# Linha "ficará à venda até" do modal aberto (ou do body), lida em uma chamada
+SCRIPT_LER_DISPONIBILIDADE = """
+    const alvo = 'ficará à venda até';
+    const raizes = [...document.querySelectorAll('[role="dialog"]'), document.body];
+    for (const raiz of raizes) {
+        for (const linha of (raiz.innerText || '').split('\\n')) {
+            if (linha.toLowerCase().includes(alvo)) return linha.trim();
+        }
+    }
+    return null;
+"""
+
+# Estado da grade depois de fechar o modal (arguments[0] = seletor do título)
+SCRIPT_ESTADO_GRADE = """
+    return {
+        titulos: document.querySelectorAll(arguments[0]).length,
+        modal_aberto: !!document.querySelector('[role="dialog"]'),
+        url: location.href,
+        caminho: location.pathname,
+    };
+"""
+
 # ========================================
 # FUNÇÕES AUXILIARES
 # ========================================
@@ -92,6 +239,10 @@ def palavras_em_comum(str1, str2):
     palavras2 = set(normalizar_texto(str2).split())
     return palavras1 & palavras2
 
+def palavras_relevantes(texto_norm):
+    """Palavras de um texto já normalizado, sem as genéricas"""
+    return set(texto_norm.split()) - PALAVRAS_GENERICAS
+
 def e_match_valido(item_busca, item_loja):
     """
     Determina se um item da loja é um match válido para a busca
@@ -100,20 +251,19 @@ def e_match_valido(item_busca, item_loja):
     # Normaliza ambos
     busca_norm = normalizar_texto(item_busca)
     loja_norm = normalizar_texto(item_loja)
-    
+    return comparar_normalizados(busca_norm, loja_norm, palavras_relevantes(busca_norm), palavras_relevantes(loja_norm))
+
+def comparar_normalizados(busca_norm, loja_norm, palavras_busca, palavras_loja, razao=None):
+    """
+    Critérios de e_match_valido sobre textos já normalizados e suas palavras relevantes
+    razao: função sem argumentos que calcula a razão do SequenceMatcher (reaproveita o do índice)
+    Retorna: (match, score, tipo)
+    """
     # Critério 1: Match exato ou substring
     if busca_norm == loja_norm or busca_norm in loja_norm:
         return True, 1.0, "match_exato"
     
     # Critério 2: Todas as palavras da busca estão na loja
-    palavras_busca = set(busca_norm.split())
-    palavras_loja = set(loja_norm.split())
-    
-    # Remove palavras muito comuns/genéricas
-    palavras_genericas = {'pacote', 'pacotao', 'pack', 'bundle', 'set', 'edition', 'skin', 'outfit'}
-    palavras_busca = palavras_busca - palavras_genericas
-    palavras_loja = palavras_loja - palavras_genericas
-    
     if palavras_busca and palavras_busca.issubset(palavras_loja):
         # Todas as palavras da busca estão na loja
         similaridade = len(palavras_busca) / len(palavras_loja) if palavras_loja else 0
@@ -129,8 +279,11 @@ def e_match_valido(item_busca, item_loja):
             return True, similaridade, "palavras_significativas"
     
     # Critério 4: Similaridade de string alta (para nomes compostos)
-    sim_score = similaridade_strings(item_busca, item_loja)
-    if sim_score >= 0.85:  # 85% de similaridade
+    if razao:
+        sim_score = razao()
+    else:
+        sim_score = SequenceMatcher(None, busca_norm, loja_norm).ratio()
+    if sim_score >= SIMILARIDADE_MINIMA_MATCH:  # 85% de similaridade
         return True, sim_score, "similaridade_alta"
     
     return False, 0.0, "nao_match"
@@ -248,21 +401,53 @@ def extrair_preco_do_card(driver, card_element, nome_item):
     
     return None
 
+def recarregar_loja(driver):
+    """Volta à loja, espera a grade e refaz o scroll (restaura o estado da listagem)"""
+    with etapa('recarga_loja'):
+        driver.get(FORTNITE_SHOP_URL)
+        aguardar_seletor(driver, SELETOR_TITULO_ITEM, 'fortnite.recarga_loja', timeout=20)
+        fazer_scroll_completo(driver)
+
+def grade_intacta(driver):
+    """
+    Confere, depois de fechar o modal, se a página ainda é a grade listada no PASSO 1:
+    nenhum modal aberto, mesmo caminho da loja (não uma rota /item-shop/<tipo>/<item>) e pelo menos tantos títulos quanto XPaths em cache.
+    """
+    try:
+        estado = driver.execute_script(SCRIPT_ESTADO_GRADE, SELETOR_TITULO_ITEM)
+    except Exception as e:
+        print(f"      ⚠️ Não foi possível conferir a grade: {e}")
+        return False
+
+    if estado['modal_aberto']:
+        print("      ⚠️ Modal continua aberto")
+        return False
+    if estado['caminho'].rstrip('/') != CAMINHO_LOJA:
+        print(f"      ⚠️ Página mudou: {estado['url'][:80]}")
+        return False
+    if estado['titulos'] < len(CACHE_XPATHS):
+        print(f"      ⚠️ Grade incompleta: {estado['titulos']} títulos para {len(CACHE_XPATHS)} itens listados")
+        return False
+    return True
+
+@cronometrar('extracao_disponibilidade')
 def extrair_disponibilidade_item(driver, nome_item, xpath_card=None):
     """
     Usa o XPath armazenado (se disponível) ou busca o item novamente
     Clica no card e extrai a informação de disponibilidade
+    Com DISPONIBILIDADE_SEM_RECARGA, fecha o modal e só recarrega a loja se a grade não estiver intacta
     """
     try:
         print("      🔍 Extraindo disponibilidade...")
         
         card_element = None
         
-        # Tenta usar o XPath do cache primeiro
-        if xpath_card and xpath_card in CACHE_XPATHS:
+        # Tenta usar o XPath do card (recebido ou do cache) primeiro
+        xpath_card = xpath_card or CACHE_XPATHS.get(normalizar_texto(nome_item))
+        if xpath_card:
             try:
-                print(f"      📍 Usando XPath do cache: {CACHE_XPATHS[xpath_card][:80]}...")
-                card_element = driver.find_element(By.XPATH, CACHE_XPATHS[xpath_card])
+                print(f"      📍 Usando XPath do cache: {xpath_card[:80]}...")
+                card_element = driver.find_element(By.XPATH, xpath_card)
                 print("      ✅ Card encontrado via cache")
             except Exception as e:
                 print(f"      ⚠️ Cache falhou: {e}")
@@ -289,44 +474,53 @@ def extrair_disponibilidade_item(driver, nome_item, xpath_card=None):
         
         # Scroll até o elemento
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", card_element)
-        time.sleep(1.5)
         
         # Clica no card
         print("      🖱️ Clicando no card...")
         driver.execute_script("arguments[0].click();", card_element)
-        time.sleep(3)  # Aumentado para 3 segundos
         
-        # Aguarda o modal carregar completamente
+        # Aguarda o modal abrir e terminar de renderizar
         print("      ⏳ Aguardando modal carregar...")
-        time.sleep(2)
+        if not aguardar_condicao(driver, lambda d: d.execute_script(SCRIPT_MODAL_PRONTO), 'fortnite.modal_item', timeout=10):
+            print("      ⚠️ Modal não sinalizou abertura no tempo limite")
+        aguardar_dom_estavel(driver, 'fortnite.modal_estavel', silencio_ms=400, timeout=5)
         
         disponibilidade = None
         
-        # Estratégia 1: XPath direto com a classe específica
-        print("      🔍 Estratégia 1: XPath com classe específica...")
+        # Leitura direta do modal, em uma chamada
         try:
-            xpath_queries = [
-                "//span[@class='font-heading-now-regular text-2xs']",
-                "//span[contains(@class, 'font-heading-now-regular') and contains(@class, 'text-2xs')]",
-                "//span[contains(@class, 'text-2xs')]"
-            ]
-            
-            for xpath in xpath_queries:
-                elements = driver.find_elements(By.XPATH, xpath)
-                print(f"         Encontrados {len(elements)} elementos para xpath: {xpath[:50]}...")
-                for element in elements:
-                    try:
-                        texto = element.text.strip()
-                        if texto and 'ficará à venda até' in texto.lower():
-                            disponibilidade = texto
-                            print(f"         ✅ Encontrado: {texto[:80]}...")
-                            break
-                    except:
-                        continue
-                if disponibilidade:
-                    break
+            disponibilidade = driver.execute_script(SCRIPT_LER_DISPONIBILIDADE)
+            if disponibilidade:
+                print(f"         ✅ Encontrado no modal: {disponibilidade[:80]}...")
         except Exception as e:
-            print(f"      ⚠️ Estratégia 1 falhou: {e}")
+            print(f"      ⚠️ Leitura direta do modal falhou: {e}")
+        
+        # Estratégia 1: XPath direto com a classe específica
+        if not disponibilidade:
+            print("      🔍 Estratégia 1: XPath com classe específica...")
+            try:
+                xpath_queries = [
+                    "//span[@class='font-heading-now-regular text-2xs']",
+                    "//span[contains(@class, 'font-heading-now-regular') and contains(@class, 'text-2xs')]",
+                    "//span[contains(@class, 'text-2xs')]"
+                ]
+                
+                for xpath in xpath_queries:
+                    elements = driver.find_elements(By.XPATH, xpath)
+                    print(f"         Encontrados {len(elements)} elementos para xpath: {xpath[:50]}...")
+                    for element in elements:
+                        try:
+                            texto = element.text.strip()
+                            if texto and 'ficará à venda até' in texto.lower():
+                                disponibilidade = texto
+                                print(f"         ✅ Encontrado: {texto[:80]}...")
+                                break
+                        except:
+                            continue
+                    if disponibilidade:
+                        break
+            except Exception as e:
+                print(f"      ⚠️ Estratégia 1 falhou: {e}")
         
         # Estratégia 2: Busca por texto no body inteiro
         if not disponibilidade:
@@ -420,7 +614,8 @@ def extrair_disponibilidade_item(driver, nome_item, xpath_card=None):
         print("      🚪 Fechando modal...")
         try:
             driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
-            time.sleep(1)
+            aguardar_condicao(driver, lambda d: not d.find_elements(By.CSS_SELECTOR, '[role="dialog"]'),
+                              'fortnite.modal_fechado', timeout=3)
             print("      ✅ Modal fechado com ESC")
         except Exception as e:
             print(f"      ⚠️ ESC falhou: {e}")
@@ -428,20 +623,22 @@ def extrair_disponibilidade_item(driver, nome_item, xpath_card=None):
                 close_buttons = driver.find_elements(By.XPATH, "//button[contains(@aria-label, 'close') or contains(@aria-label, 'fechar') or contains(@aria-label, 'Close')]")
                 if close_buttons:
                     close_buttons[0].click()
-                    time.sleep(1)
+                    aguardar_condicao(driver, lambda d: not d.find_elements(By.CSS_SELECTOR, '[role="dialog"]'),
+                                      'fortnite.modal_fechado', timeout=3)
                     print("      ✅ Modal fechado com botão")
             except:
                 pass
         
-        # SEMPRE retorna à página inicial após extrair disponibilidade
-        print("      🔄 Retornando à página inicial...")
-        try:
-            driver.get(FORTNITE_SHOP_URL)
-            time.sleep(3)
-            fazer_scroll_completo(driver)
-            print("      ✅ Página inicial recarregada")
-        except Exception as e:
-            print(f"      ⚠️ Erro ao recarregar página: {e}")
+        # Continua na mesma página se a grade sobreviveu ao modal; senão, volta à página inicial
+        if DISPONIBILIDADE_SEM_RECARGA and grade_intacta(driver):
+            print("      ✅ Grade intacta, sem recarregar a loja")
+        else:
+            print("      🔄 Retornando à página inicial...")
+            try:
+                recarregar_loja(driver)
+                print("      ✅ Página inicial recarregada")
+            except Exception as e:
+                print(f"      ⚠️ Erro ao recarregar página: {e}")
         
         if disponibilidade:
             disponibilidade = ' '.join(disponibilidade.split())
@@ -459,15 +656,15 @@ def extrair_disponibilidade_item(driver, nome_item, xpath_card=None):
         # SEMPRE garante retorno à página principal em caso de erro
         try:
             print("      🔄 Retornando à página principal após erro...")
-            driver.get(FORTNITE_SHOP_URL)
-            time.sleep(3)
-            fazer_scroll_completo(driver)
+            recarregar_loja(driver)
             print("      ✅ Página inicial recarregada após erro")
         except:
             pass
         return "Disponibilidade não informada"
 
 def inicializar_driver_antidetect():
+    import undetected_chromedriver as uc  # carrega o Chrome/patcher só quando o driver é criado
+    
     print("🔧 Configurando navegador anti-detecção...")
     
     # Criamos uma função interna para sempre gerar um NOVO objeto options
@@ -485,22 +682,32 @@ def inicializar_driver_antidetect():
         ]
         options.add_argument(f'--user-agent={random.choice(user_agents)}')
         options.add_argument('--headless=new')
+        aplicar_opcoes_bloqueio(options, BLOQUEIO_PERMITIR)
+        aplicar_carregamento_eager(options)
+        aplicar_perfil(options, PERFIL_CHROME)  # cookies do Cloudflare reaproveitados entre execuções
         return options, random.choice(user_agents)
     
-    try:
-        print("   🔍 Detectando versão do Chrome instalada...")
-        opcoes_tentativa_1, ua_1 = criar_opcoes()
-        # Adicionamos version_main=145 aqui
-        driver = uc.Chrome(options=opcoes_tentativa_1, version_main=145) 
-        user_agent_final = ua_1
-        print("   ✅ Driver inicializado com sucesso!")
-    except Exception as e:
-        print(f"   ⚠️ Erro ao inicializar: {e}")
-        print("   🔄 Tentando método alternativo...")
-        opcoes_tentativa_2, ua_2 = criar_opcoes()
-        # E aqui também
-        driver = uc.Chrome(options=opcoes_tentativa_2, use_subprocess=True, version_main=145)
-        user_agent_final = ua_2
+    user_agent_final = None
+    
+    def criar_driver():
+        nonlocal user_agent_final
+        try:
+            print("   🔍 Detectando versão do Chrome instalada...")
+            opcoes_tentativa_1, ua_1 = criar_opcoes()
+            # Adicionamos version_main=145 aqui
+            driver = uc.Chrome(options=opcoes_tentativa_1, version_main=145) 
+            user_agent_final = ua_1
+            print("   ✅ Driver inicializado com sucesso!")
+        except Exception as e:
+            print(f"   ⚠️ Erro ao inicializar: {e}")
+            print("   🔄 Tentando método alternativo...")
+            opcoes_tentativa_2, ua_2 = criar_opcoes()
+            # E aqui também
+            driver = uc.Chrome(options=opcoes_tentativa_2, use_subprocess=True, version_main=145)
+            user_agent_final = ua_2
+        return driver
+    
+    driver = iniciar_driver_perfil(PERFIL_CHROME, criar_driver)
     
     try:
         driver.execute_cdp_cmd('Network.setUserAgentOverride', {
@@ -510,41 +717,35 @@ def inicializar_driver_antidetect():
     except:
         pass
     
+    padroes = configurar_bloqueio(driver, BLOQUEIO_PERMITIR)
+    if padroes:
+        print(f"   🧱 Bloqueio de recursos ativo ({padroes} padrões)")
+    
     return driver
 
-def aguardar_pagina_carregar(driver, timeout=30):
+def aguardar_pagina_carregar(driver, timeout=45):
+    """Espera a grade de itens aparecer (passado o Cloudflare) e o DOM estabilizar"""
     print("⏳ Aguardando página carregar (pode demorar pelo Cloudflare)...")
     
     inicio = time.time()
-    time.sleep(10)
+    avisou_cloudflare = []
     
-    tentativas = 0
-    max_tentativas = 6
+    def grade_renderizada(d):
+        if d.find_elements(By.CSS_SELECTOR, SELETOR_TITULO_ITEM):
+            return True
+        if not avisou_cloudflare and "just a moment" in (d.title or "").lower():
+            print("   ⏳ Cloudflare verificando...")
+            avisou_cloudflare.append(True)
+        return False
     
-    while tentativas < max_tentativas:
-        try:
-            if "cloudflare" in driver.page_source.lower() and "checking" in driver.page_source.lower():
-                print(f"   ⏳ Cloudflare verificando... (tentativa {tentativas + 1}/{max_tentativas})")
-                time.sleep(5)
-                tentativas += 1
-                continue
-            
-            if "fortnite" in driver.page_source.lower() or "item" in driver.page_source.lower():
-                print("   ✅ Página carregada!")
-                time.sleep(3)
-                return True
-            
-            time.sleep(5)
-            tentativas += 1
-            
-        except Exception as e:
-            print(f"   ⚠️ Erro ao verificar: {e}")
-            time.sleep(5)
-            tentativas += 1
+    carregou = aguardar_condicao(driver, grade_renderizada, 'fortnite.grade_loja', timeout=timeout, intervalo=0.5)
+    if carregou:
+        aguardar_dom_estavel(driver, 'fortnite.grade_estavel', silencio_ms=800, timeout=8)
+        print("   ✅ Página carregada!")
     
     tempo_total = time.time() - inicio
     print(f"   ⏰ Tempo total de carregamento: {tempo_total:.1f}s")
-    return False
+    return bool(carregou)
 
 def fazer_scroll_completo(driver):
     """Faz scroll na página para carregar todos os itens"""
@@ -555,7 +756,8 @@ def fazer_scroll_completo(driver):
         
         for i in range(5):
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            # Espera os itens carregados pelo scroll pararem de entrar no DOM
+            aguardar_dom_estavel(driver, 'fortnite.scroll', silencio_ms=600, timeout=4)
             
             new_height = driver.execute_script("return document.body.scrollHeight")
             
@@ -565,7 +767,6 @@ def fazer_scroll_completo(driver):
             last_height = new_height
         
         driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(1)
         
         print("   ✅ Scroll completo\n")
     except Exception as e:
@@ -575,10 +776,75 @@ def fazer_scroll_completo(driver):
 # NOVA ESTRATÉGIA: LISTA TODOS OS ITENS PRIMEIRO
 # ========================================
 
+def listar_itens_via_script(driver):
+    """
+    Lista os itens com um único execute_script (SCRIPT_LISTAR_ITENS).
+    Retorna: lista de dicts {nome, preco, xpath, link, elemento, card} ou None se o script falhar
+    """
+    try:
+        itens = driver.execute_script(SCRIPT_LISTAR_ITENS, SELETOR_TITULO_ITEM)
+    except Exception as e:
+        print(f"   ⚠️ Listagem via script falhou ({e}), usando o caminho elemento a elemento")
+        return None
+
+    if not itens:
+        print("   ⚠️ Listagem via script não retornou itens, usando o caminho elemento a elemento")
+        return None
+
+    print(f"   📄 {len(itens)} itens extraídos em uma chamada ao navegador\n")
+    return itens
+
+def listar_itens_por_elemento(driver):
+    """
+    Lista os itens consultando cada título, card e preço com chamadas separadas ao driver
+    (caminho original, usado quando o script falha).
+    Retorna: lista de dicts {nome, preco, xpath, link, elemento, card}
+    """
+    itens = []
+    elementos_processados = set()
+
+    elementos_titulo = driver.find_elements(By.CSS_SELECTOR, SELETOR_TITULO_ITEM)
+    print(f"   📄 Encontrados {len(elementos_titulo)} elementos de título\n")
+
+    for elemento in elementos_titulo:
+        try:
+            nome = elemento.text.strip()
+
+            if not nome or len(nome) < 2:
+                continue
+
+            nome_norm = normalizar_texto(nome)
+            if nome_norm in elementos_processados:
+                continue
+
+            elementos_processados.add(nome_norm)
+
+            # Busca o card e preço
+            card = encontrar_card_correto(driver, elemento, nome)
+            preco = extrair_preco_do_card(driver, card, nome)
+            xpath = gerar_xpath_elemento(driver, card)
+
+            itens.append({
+                'nome': nome,
+                'preco': preco,
+                'xpath': xpath,
+                'link': None,
+                'elemento': elemento,
+                'card': card,
+            })
+
+        except Exception as e:
+            continue
+
+    return itens
+
+@cronometrar('extracao')
 def listar_todos_itens_da_loja(driver):
     """
     PASSO 1: Lista TODOS os itens disponíveis na loja
-    Retorna: lista de dicionários com {nome, elemento, card, xpath}
+    Um único script percorre a grade no navegador (LISTAGEM_VIA_SCRIPT); se falhar,
+    volta ao caminho elemento a elemento.
+    Retorna: lista de dicionários com {nome, nome_normalizado, elemento, card, preco, xpath, link}
     """
     print("\n📋 PASSO 1: Listando TODOS os itens da loja...")
     
@@ -588,47 +854,37 @@ def listar_todos_itens_da_loja(driver):
     elementos_processados = set()
     
     try:
-        elementos_titulo = driver.find_elements(By.CSS_SELECTOR, '[data-testid="item-title"]')
-        
-        print(f"   📄 Encontrados {len(elementos_titulo)} elementos de título\n")
-        
-        for elemento in elementos_titulo:
-            try:
-                nome = elemento.text.strip()
-                
-                if not nome or len(nome) < 2:
-                    continue
-                
-                nome_norm = normalizar_texto(nome)
-                if nome_norm in elementos_processados:
-                    continue
-                
-                elementos_processados.add(nome_norm)
-                
-                # Busca o card e preço
-                card = encontrar_card_correto(driver, elemento, nome)
-                preco = extrair_preco_do_card(driver, card, nome)
-                
-                # NOVO: Gera e armazena o XPath do card
-                xpath = gerar_xpath_elemento(driver, card)
-                if xpath:
-                    CACHE_XPATHS[nome_norm] = xpath
-                    print(f"   📍 XPath salvo para '{nome}': {xpath[:80]}...")
-                
-                itens_encontrados.append({
-                    'nome': nome,
-                    'nome_normalizado': nome_norm,
-                    'elemento': elemento,
-                    'card': card,
-                    'preco': preco,
-                    'xpath': xpath  # NOVO CAMPO
-                })
-                
-                preco_str = f"{preco} V-Bucks" if preco else "sem preço"
-                print(f"   • {nome} ({preco_str})")
-                
-            except Exception as e:
+        itens_brutos = listar_itens_via_script(driver) if LISTAGEM_VIA_SCRIPT else None
+        if itens_brutos is None:
+            itens_brutos = listar_itens_por_elemento(driver)
+
+        for item in itens_brutos:
+            nome = item['nome']
+            nome_norm = normalizar_texto(nome)
+            if nome_norm in elementos_processados:
                 continue
+
+            elementos_processados.add(nome_norm)
+
+            # Armazena o XPath do card
+            xpath = item.get('xpath')
+            if xpath:
+                CACHE_XPATHS[nome_norm] = xpath
+                print(f"   📍 XPath salvo para '{nome}': {xpath[:80]}...")
+
+            preco = item.get('preco')
+            itens_encontrados.append({
+                'nome': nome,
+                'nome_normalizado': nome_norm,
+                'elemento': item.get('elemento'),
+                'card': item.get('card'),
+                'preco': preco,
+                'xpath': xpath,
+                'link': item.get('link'),
+            })
+
+            preco_str = f"{preco} V-Bucks" if preco else "sem preço"
+            print(f"   • {nome} ({preco_str})")
         
         print(f"\n   ✅ Total de {len(itens_encontrados)} itens únicos na loja")
         print(f"   💾 {len(CACHE_XPATHS)} XPaths armazenados em cache\n")
@@ -638,28 +894,271 @@ def listar_todos_itens_da_loja(driver):
     
     return itens_encontrados
 
+# ========================================
+# ÍNDICE DE CORRESPONDÊNCIA
+# ========================================
+
+def trigramas(texto):
+    """Contagem dos trigramas de caracteres do texto"""
+    return Counter(texto[i:i + 3] for i in range(len(texto) - 2))
+
+def _pode_ser_similar(tamanho_busca, tamanho_loja, minimo=SIMILARIDADE_MINIMA_MATCH):
+    """Limite de tamanho do SequenceMatcher (real_quick_ratio): 2 * menor / soma >= minimo"""
+    total = tamanho_busca + tamanho_loja
+    return total == 0 or 2 * min(tamanho_busca, tamanho_loja) / total >= minimo
+
+@lru_cache(maxsize=None)
+def _minimo_trigramas(total):
+    """
+    Trigramas em comum (com repetições) que dois textos de tamanho somado total têm,
+    no mínimo, quando a razão do SequenceMatcher chega a SIMILARIDADE_MINIMA_MATCH.
+
+    Com M caracteres casados em k blocos e U = total - 2M sem par, blocos vizinhos são
+    separados por pelo menos um caractere sem par (k <= U + 1) e um bloco de tamanho t
+    tem t - 2 trigramas em comum: M - 2(U + 1) no mínimo. Zero ou menos = sem limite.
+    """
+    if total == 0:
+        return 0
+    casados = next(m for m in range(total + 1) if 2 * m / total >= SIMILARIDADE_MINIMA_MATCH)
+    return casados - 2 * (total - 2 * casados + 1)
+
+def indexar_itens_loja(itens_loja):
+    """
+    Normaliza e tokeniza cada nome da loja uma vez e monta os índices da correspondência:
+    palavra -> itens, trigrama -> itens (o item se repete a cada ocorrência do trigrama)
+    e tamanho do nome -> itens.
+    """
+    indice = {
+        'itens': itens_loja,
+        'nomes': [],
+        'palavras': [],
+        'letras': [],
+        'tamanhos': [],
+        'por_palavra': defaultdict(list),
+        'por_trigrama': defaultdict(list),
+        'por_tamanho': defaultdict(list),
+        'comparadores': {},
+    }
+
+    for i, item in enumerate(itens_loja):
+        nome_norm = item.get('nome_normalizado') or normalizar_texto(item['nome'])
+        palavras = palavras_relevantes(nome_norm)
+        indice['nomes'].append(nome_norm)
+        indice['palavras'].append(palavras)
+        indice['letras'].append(Counter(nome_norm))
+        indice['tamanhos'].append(len(nome_norm))
+        for palavra in palavras:
+            indice['por_palavra'][palavra].append(i)
+        for trigrama, repeticoes in trigramas(nome_norm).items():
+            indice['por_trigrama'][trigrama].extend([i] * repeticoes)
+        indice['por_tamanho'][len(nome_norm)].append(i)
+
+    return indice
+
+def _limite_letras(indice, i, busca_norm, letras_busca):
+    """Limite superior da razão pelas letras em comum (o quick_ratio do SequenceMatcher)"""
+    letras_item = indice['letras'][i]
+    comuns = sum(min(quantidade, letras_item[letra]) for letra, quantidade in letras_busca.items() if letra in letras_item)
+    return 2 * comuns / (len(busca_norm) + len(indice['nomes'][i]) or 1)
+
+def _razao(indice, i, busca_norm, letras_busca, minimo):
+    """
+    Razão do SequenceMatcher(None, busca, nome do item), com o lado do item preparado uma vez.
+    Devolve 0.0 sem calcular quando as letras em comum (quick_ratio) já ficam abaixo de minimo.
+    """
+    if _limite_letras(indice, i, busca_norm, letras_busca) < minimo:
+        return 0.0
+
+    comparador = indice['comparadores'].get(i)
+    if comparador is None:
+        comparador = indice['comparadores'][i] = SequenceMatcher(None, '', indice['nomes'][i])
+    comparador.set_seq1(busca_norm)
+    return comparador.ratio()
+
+def _trigramas_em_comum(indice, busca_norm):
+    """
+    Trigramas em comum entre a busca e cada item que divide algum, contando as repetições
+    do item (limite superior do mínimo entre as repetições dos dois lados).
+    """
+    por_trigrama = indice['por_trigrama']
+    return Counter(chain.from_iterable(por_trigrama.get(trigrama, ()) for trigrama in set(trigramas(busca_norm))))
+
+def candidatos_correspondencia(indice, busca_norm, palavras_busca):
+    """
+    Itens que ainda podem satisfazer algum critério de comparar_normalizados;
+    os que ficam de fora com certeza não casam.
+    Retorna: (candidatos, similares_possiveis), conjuntos de posições em indice['itens'];
+    só os do segundo podem chegar a SIMILARIDADE_MINIMA_MATCH no critério 4
+    """
+    tamanho_busca = len(busca_norm)
+    if tamanho_busca < 3:  # sem trigramas, a substring só sai por varredura
+        todos = set(range(len(indice['nomes'])))
+        return todos, todos
+
+    # Critérios 2 e 3: pelo menos uma palavra relevante em comum
+    candidatos = set()
+    for palavra in palavras_busca:
+        candidatos.update(indice['por_palavra'].get(palavra, ()))
+
+    # Critério 4: só tamanhos compatíveis, com o mínimo de trigramas de cada tamanho
+    minimos = {tamanho: _minimo_trigramas(tamanho_busca + tamanho)
+               for tamanho in indice['por_tamanho'] if _pode_ser_similar(tamanho_busca, tamanho)}
+
+    similares_possiveis = set()
+    trigramas_busca = tamanho_busca - 2
+    tamanhos = indice['tamanhos']
+    for i, comuns in _trigramas_em_comum(indice, busca_norm).items():
+        if comuns >= trigramas_busca:
+            candidatos.add(i)  # critério 1: uma substring traz todos os trigramas da busca
+        minimo = minimos.get(tamanhos[i])
+        if minimo is not None and comuns >= minimo:
+            similares_possiveis.add(i)
+
+    # Nomes curtos, onde o mínimo de trigramas não descarta nada
+    for tamanho, minimo in minimos.items():
+        if minimo <= 0:
+            similares_possiveis.update(indice['por_tamanho'][tamanho])
+
+    return candidatos | similares_possiveis, similares_possiveis
+
+def melhor_correspondencia(indice, item_busca):
+    """
+    Mesmo resultado de testar e_match_valido contra cada item da loja (o primeiro item
+    com o maior score), avaliando só os candidatos do índice.
+    Retorna: (item ou None, score, tipo)
+    """
+    busca_norm = normalizar_texto(item_busca)
+    palavras_busca = palavras_relevantes(busca_norm)
+    letras_busca = Counter(busca_norm)
+    candidatos, similares_possiveis = candidatos_correspondencia(indice, busca_norm, palavras_busca)
+
+    melhor, melhor_score, melhor_tipo = None, 0, None
+    for i in sorted(candidatos):
+        if i in similares_possiveis:
+            razao = lambda: _razao(indice, i, busca_norm, letras_busca, SIMILARIDADE_MINIMA_MATCH)
+        else:
+            razao = lambda: 0.0  # o índice já garante razão abaixo de SIMILARIDADE_MINIMA_MATCH
+        e_match, score, tipo = comparar_normalizados(
+            busca_norm, indice['nomes'][i], palavras_busca, indice['palavras'][i], razao=razao
+        )
+        if e_match and score > melhor_score:
+            melhor, melhor_score, melhor_tipo = i, score, tipo
+
+    return (indice['itens'][melhor] if melhor is not None else None), melhor_score, melhor_tipo
+
+def itens_similares(indice, item_busca, limite=3):
+    """
+    Itens com similaridade >= SIMILARIDADE_MINIMA_SUGESTAO, do mais parecido para o menos.
+    É a sugestão exibida quando não há match: a razão só é calculada para os
+    SUGESTOES_CANDIDATOS itens com mais trigramas em comum com a busca (ou todos,
+    se a busca for curta demais para ter trigramas).
+    Retorna: [(nome, similaridade)]
+    """
+    busca_norm = normalizar_texto(item_busca)
+    letras_busca = Counter(busca_norm)
+    if len(busca_norm) < 3:
+        candidatos = range(len(indice['nomes']))
+    else:
+        comuns = _trigramas_em_comum(indice, busca_norm)
+        candidatos = sorted(comuns, key=lambda i: (-comuns[i], i))[:SUGESTOES_CANDIDATOS]
+
+    similares = []
+    for i in candidatos:
+        if not _pode_ser_similar(len(busca_norm), len(indice['nomes'][i]), SIMILARIDADE_MINIMA_SUGESTAO):
+            continue
+        sim = _razao(indice, i, busca_norm, letras_busca, SIMILARIDADE_MINIMA_SUGESTAO)
+        if sim >= SIMILARIDADE_MINIMA_SUGESTAO:
+            similares.append((sim, i))
+
+    similares.sort(key=lambda x: (-x[0], x[1]))
+    return [(indice['itens'][i]['nome'], sim) for sim, i in similares[:limite]]
+
+def medir_correspondencia(total_busca=10000, total_loja=2000, amostra_linear=200, semente=42):
+    """
+    Compara o índice com o laço original de e_match_valido em nomes sintéticos:
+    total_busca itens monitorados contra total_loja itens na loja. O laço original
+    roda só em amostra_linear buscas (o tempo total é estimado) e os resultados das
+    duas versões são conferidos nessa amostra.
+    """
+    gerador = random.Random(semente)
+    silabas = ['ra', 'ven', 'to', 'ka', 'mi', 'lo', 'zar', 'ne', 'gu', 'tri', 'shi', 'bel', 'dor', 'xa', 'fe', 'lix',
+               'pa', 'qui', 'mo', 'bra', 'sen', 'vi', 'cor', 'hu', 'jo', 'pre', 'stel', 'an', 'dus', 'wyn', 'ce', 'o']
+    vocabulario = ['o', 'da', 'do', 'de', 'pacote', 'traje', 'samurai', 'sombrio', 'estelar', 'dourado'] + [
+        ''.join(gerador.choice(silabas) for _ in range(gerador.randint(2, 4))) for _ in range(600)
+    ]
+
+    def nome_aleatorio():
+        return ' '.join(gerador.choice(vocabulario).capitalize() for _ in range(gerador.randint(1, 4)))
+
+    def com_erro(nome):
+        posicao = gerador.randrange(len(nome))
+        return nome[:posicao] + gerador.choice('aeiourstn') + nome[posicao + 1:]
+
+    itens_loja = [{'nome': nome, 'nome_normalizado': normalizar_texto(nome)}
+                  for nome in (nome_aleatorio() for _ in range(total_loja))]
+    buscas = []
+    for _ in range(total_busca):
+        base = gerador.choice(itens_loja)['nome']
+        sorteio = gerador.random()
+        if sorteio < 0.3:
+            buscas.append(base.upper() if gerador.random() < 0.5 else base)
+        elif sorteio < 0.5:
+            palavras = base.split()
+            buscas.append(' '.join(gerador.sample(palavras, max(1, len(palavras) - 1))))
+        elif sorteio < 0.7:
+            buscas.append(com_erro(base))
+        else:
+            buscas.append(nome_aleatorio())
+
+    inicio = time.perf_counter()
+    indice = indexar_itens_loja(itens_loja)
+    tempo_indice = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados = [melhor_correspondencia(indice, busca) for busca in buscas]
+    tempo_busca = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    sugestoes = [itens_similares(indice, busca) for busca, (item, _, _) in zip(buscas, resultados) if item is None]
+    tempo_sugestoes = time.perf_counter() - inicio
+
+    amostra = buscas[:amostra_linear]
+    divergencias = 0
+    inicio = time.perf_counter()
+    for busca, (item, score, tipo) in zip(amostra, resultados):
+        melhor, melhor_score, melhor_tipo = None, 0, None
+        for item_loja in itens_loja:
+            e_match, score_loja, tipo_loja = e_match_valido(busca, item_loja['nome'])
+            if e_match and score_loja > melhor_score:
+                melhor, melhor_score, melhor_tipo = item_loja, score_loja, tipo_loja
+        if (melhor is not item, melhor_score, melhor_tipo) != (False, score, tipo):
+            divergencias += 1
+    tempo_linear = (time.perf_counter() - inicio) / len(amostra) * total_busca
+
+    encontrados = sum(1 for item, _, _ in resultados if item is not None)
+    print(f"\n🔍 Correspondência: {total_busca} itens monitorados x {total_loja} itens da loja")
+    print(f"   Índice montado em {tempo_indice * 1000:.0f} ms")
+    print(f"   Índice: {tempo_busca:.2f}s ({tempo_busca / total_busca * 1000:.2f} ms por busca) | "
+          f"{encontrados} encontrados")
+    print(f"   Sugestões dos {len(sugestoes)} não encontrados: {tempo_sugestoes:.2f}s")
+    print(f"   Laço original (estimado por {len(amostra)} buscas): {tempo_linear:.1f}s | "
+          f"{tempo_linear / tempo_busca:.0f}x mais lento")
+    print(f"   {'✅ Mesmos resultados' if not divergencias else f'❌ {divergencias} divergência(s)'} na amostra")
+    return divergencias
+
+@cronometrar('correspondencia')
 def buscar_itens_monitorados(driver, itens_loja, itens_procurados):
     """
     PASSO 2: Busca os itens monitorados na lista da loja
-    Usa matching inteligente e extrai disponibilidade
+    Usa matching inteligente (índice da loja montado uma vez) e extrai disponibilidade
     """
     print("🔍 PASSO 2: Buscando itens monitorados na lista...\n")
     
     resultados = []
+    indice = indexar_itens_loja(itens_loja)
     
     for item_busca in itens_procurados:
-        melhor_match = None
-        melhor_score = 0
-        melhor_tipo = None
-        
-        # Testa contra cada item da loja
-        for item_loja in itens_loja:
-            e_match, score, tipo = e_match_valido(item_busca, item_loja['nome'])
-            
-            if e_match and score > melhor_score:
-                melhor_match = item_loja
-                melhor_score = score
-                melhor_tipo = tipo
+        melhor_match, melhor_score, melhor_tipo = melhor_correspondencia(indice, item_busca)
         
         if melhor_match:
             print(f"   ✅ '{item_busca}' → '{melhor_match['nome']}'")
@@ -667,12 +1166,17 @@ def buscar_itens_monitorados(driver, itens_loja, itens_procurados):
             if melhor_match['preco']:
                 print(f"      Preço: {melhor_match['preco']} V-Bucks")
             
-            # Extrai disponibilidade usando o XPath armazenado
-            disponibilidade = extrair_disponibilidade_item(
-                driver, 
-                melhor_match['nome'],
-                melhor_match.get('xpath')
-            )
+            # Disponibilidade já conhecida (item que continua na rotação) ou lida no modal via XPath
+            if 'disponibilidade' in melhor_match:
+                disponibilidade = melhor_match['disponibilidade']
+                print(f"      ✅ Disponibilidade já conhecida: {disponibilidade}")
+            else:
+                disponibilidade = extrair_disponibilidade_item(
+                    driver, 
+                    melhor_match['nome'],
+                    melhor_match.get('xpath')
+                )
+                melhor_match['disponibilidade'] = disponibilidade  # vai para o snapshot da loja
             
             print()
             
@@ -690,16 +1194,10 @@ def buscar_itens_monitorados(driver, itens_loja, itens_procurados):
         else:
             print(f"   ❌ '{item_busca}' não encontrado")
             
-            similares = []
-            for item_loja in itens_loja:
-                sim = similaridade_strings(item_busca, item_loja['nome'])
-                if sim >= 0.4:
-                    similares.append((item_loja['nome'], sim))
-            
+            similares = itens_similares(indice, item_busca)
             if similares:
-                similares.sort(key=lambda x: x[1], reverse=True)
                 print(f"      Itens similares encontrados:")
-                for nome_sim, score_sim in similares[:3]:
+                for nome_sim, score_sim in similares:
                     print(f"         • {nome_sim} ({score_sim:.0%})")
             print()
             
@@ -736,6 +1234,264 @@ def salvar_lista_loja(itens_loja, arquivo='loja_fortnite_completa.txt'):
     except Exception as e:
         print(f"   ⚠️ Erro ao salvar lista: {e}\n")
 
+# ========================================
+# HISTÓRICO DA LOJA (SNAPSHOTS E ROTAÇÃO)
+# ========================================
+
+def agora_iso_brasilia():
+    """Data/hora atual em ISO 8601 (ordenável), no horário de Brasília quando disponível"""
+    try:
+        return datetime.now(ZoneInfo("America/Sao_Paulo")).isoformat(timespec='seconds')
+    except:
+        return datetime.now().isoformat(timespec='seconds')
+
+def abrir_historico_loja(caminho=SNAPSHOTS_PATH):
+    """
+    Abre (criando se preciso) o histórico da loja em SQLite.
+    execucoes: uma linha por execução; snapshot_itens: os itens de cada execução.
+    Retorna: conexão ou None se o arquivo não puder ser aberto
+    """
+    import sqlite3  # só quem grava o histórico paga a importação
+
+    try:
+        conn = sqlite3.connect(caminho, timeout=30)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS execucoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data_coleta TEXT NOT NULL,
+                total_itens INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS snapshot_itens (
+                execucao_id INTEGER NOT NULL REFERENCES execucoes (id),
+                nome TEXT NOT NULL,
+                nome_normalizado TEXT NOT NULL,
+                preco INTEGER,
+                xpath TEXT,
+                link TEXT,
+                disponibilidade TEXT,
+                primeira_vez TEXT NOT NULL,
+                PRIMARY KEY (execucao_id, nome_normalizado)
+            );
+            CREATE INDEX IF NOT EXISTS idx_snapshot_itens_nome ON snapshot_itens (nome_normalizado);
+        """)
+        return conn
+    except Exception as e:
+        print(f"   ⚠️ Histórico da loja indisponível ({caminho}): {e}")
+        return None
+
+def carregar_ultimo_snapshot(conn):
+    """
+    Itens da última execução gravada.
+    Retorna: {'data_coleta', 'itens': {nome_normalizado: {nome, preco, disponibilidade}}} ou None
+    """
+    execucao = conn.execute("SELECT id, data_coleta FROM execucoes ORDER BY id DESC LIMIT 1").fetchone()
+    if not execucao:
+        return None
+
+    linhas = conn.execute(
+        "SELECT nome_normalizado, nome, preco, disponibilidade FROM snapshot_itens WHERE execucao_id = ?",
+        (execucao[0],)
+    ).fetchall()
+    return {
+        'data_coleta': execucao[1],
+        'itens': {nome_norm: {'nome': nome, 'preco': preco, 'disponibilidade': disponibilidade}
+                  for nome_norm, nome, preco, disponibilidade in linhas},
+    }
+
+def carregar_primeiras_vezes(conn):
+    """Primeira vez que cada item apareceu na loja: {nome_normalizado: data_coleta}"""
+    return dict(conn.execute("SELECT nome_normalizado, MIN(primeira_vez) FROM snapshot_itens GROUP BY nome_normalizado"))
+
+def carregar_ultimas_vezes(conn, antes_de=None):
+    """
+    Última execução em que cada item esteve na loja: {nome_normalizado: data_coleta}.
+    antes_de: id de execução; considera só as execuções anteriores a ela
+    """
+    return dict(conn.execute(
+        """SELECT s.nome_normalizado, MAX(e.data_coleta)
+           FROM snapshot_itens s JOIN execucoes e ON e.id = s.execucao_id
+           WHERE ? IS NULL OR s.execucao_id < ?
+           GROUP BY s.nome_normalizado""",
+        (antes_de, antes_de)
+    ))
+
+def comparar_rotacao(anterior, itens_loja, primeiras_vezes, ultimas_vezes=None):
+    """
+    Compara a loja atual com o último snapshot.
+    Retorna: dict com 'entraram' (nunca vistos), 'voltaram' (vistos antes, fora da última
+    rotação), 'sairam', 'permaneceram' (nomes), 'precos_alterados' [(nome, antes, depois)]
+    e 'vistos_por_ultimo' {nome: data_coleta} dos itens que voltaram
+    """
+    itens_anteriores = anterior['itens'] if anterior else {}
+    atuais = {item['nome_normalizado']: item for item in itens_loja}
+    ultimas_vezes = ultimas_vezes or {}
+
+    rotacao = {'data_anterior': anterior['data_coleta'] if anterior else None,
+               'entraram': [], 'voltaram': [], 'sairam': [], 'permaneceram': [], 'precos_alterados': [],
+               'vistos_por_ultimo': {}}
+    for nome_norm, item in atuais.items():
+        if nome_norm in itens_anteriores:
+            rotacao['permaneceram'].append(item['nome'])
+            preco_anterior = itens_anteriores[nome_norm]['preco']
+            if preco_anterior and item['preco'] and preco_anterior != item['preco']:
+                rotacao['precos_alterados'].append((item['nome'], preco_anterior, item['preco']))
+        elif nome_norm in primeiras_vezes:
+            rotacao['voltaram'].append(item['nome'])
+            if nome_norm in ultimas_vezes:
+                rotacao['vistos_por_ultimo'][item['nome']] = ultimas_vezes[nome_norm]
+        else:
+            rotacao['entraram'].append(item['nome'])
+
+    rotacao['sairam'] = [item['nome'] for nome_norm, item in itens_anteriores.items() if nome_norm not in atuais]
+    return rotacao
+
+MESES_DISPONIBILIDADE = {
+    'janeiro': 1, 'fevereiro': 2, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6, 'julho': 7,
+    'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12,
+}
+
+def fim_disponibilidade(disponibilidade):
+    """
+    Data/hora de fim no texto "ficará à venda até ..." (horário de Brasília, sem fuso).
+    Aceita "DD/MM/YYYY [às HH:MM]" e "D de <mês> de YYYY [às HH:MM]"; sem horário,
+    vale o início do dia (a leitura mais cautelosa).
+    Retorna: datetime ou None se a data não puder ser lida
+    """
+    texto = normalizar_texto(disponibilidade or '')
+    hora = re.search(r'(\d{1,2})[:h](\d{2})', texto.split(' as ', 1)[1]) if ' as ' in texto else None
+
+    data = re.search(r'(\d{1,2})/(\d{1,2})/(\d{4})', texto)
+    if data:
+        dia, mes, ano = (int(parte) for parte in data.groups())
+    else:
+        data = re.search(r'(\d{1,2}) de ([a-z]+) de (\d{4})', texto)
+        if not data or data.group(2) not in MESES_DISPONIBILIDADE:
+            return None
+        dia, mes, ano = int(data.group(1)), MESES_DISPONIBILIDADE[data.group(2)], int(data.group(3))
+
+    try:
+        return datetime(ano, mes, dia, *((int(hora.group(1)), int(hora.group(2))) if hora else (0, 0)))
+    except ValueError:
+        return None
+
+def reaproveitar_disponibilidade(itens_loja, anterior, agora=None):
+    """
+    Itens que continuam na rotação (com o mesmo preço, ou seja, a mesma oferta) recebem
+    a disponibilidade do último snapshot, desde que a data de fim ainda não tenha
+    passado; os demais (novos, com data vencida ou ilegível) abrem o modal.
+    Retorna: quantidade de itens que reaproveitaram
+    """
+    if not anterior:
+        return 0
+
+    agora = agora or datetime.now(ZoneInfo("America/Sao_Paulo")).replace(tzinfo=None)
+    reaproveitados = 0
+    for item in itens_loja:
+        item_anterior = anterior['itens'].get(item['nome_normalizado'])
+        if 'disponibilidade' in item or not item_anterior or item_anterior['preco'] != item.get('preco'):
+            continue
+        disponibilidade = item_anterior['disponibilidade']
+        if not disponibilidade or disponibilidade == "Disponibilidade não informada":
+            continue
+        fim = fim_disponibilidade(disponibilidade)
+        if fim is None or fim <= agora:
+            continue
+        item['disponibilidade'] = disponibilidade
+        reaproveitados += 1
+    return reaproveitados
+
+def gravar_snapshot(conn, itens_loja, data_coleta, primeiras_vezes):
+    """Acrescenta a execução e seus itens ao histórico (com a primeira vez de cada item)"""
+    with conn:
+        execucao_id = conn.execute(
+            "INSERT INTO execucoes (data_coleta, total_itens) VALUES (?, ?)", (data_coleta, len(itens_loja))
+        ).lastrowid
+        conn.executemany(
+            """INSERT OR IGNORE INTO snapshot_itens
+               (execucao_id, nome, nome_normalizado, preco, xpath, link, disponibilidade, primeira_vez)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(execucao_id, item['nome'], item['nome_normalizado'], item.get('preco'), item.get('xpath'),
+              item.get('link'), item.get('disponibilidade'),
+              primeiras_vezes.get(item['nome_normalizado'], data_coleta))
+             for item in itens_loja]
+        )
+    return execucao_id
+
+def imprimir_rotacao(rotacao):
+    """Resumo do que entrou e saiu da loja desde a última execução"""
+    print("\n🔄 Rotação da loja", end="")
+    if not rotacao['data_anterior']:
+        print(": primeira execução com histórico, nada para comparar\n")
+        return
+
+    print(f" desde {rotacao['data_anterior']}:")
+    print(f"   ➕ {len(rotacao['entraram'])} novo(s) | ↩️ {len(rotacao['voltaram'])} voltaram | "
+          f"➖ {len(rotacao['sairam'])} saíram | = {len(rotacao['permaneceram'])} continuam")
+    vistos = rotacao.get('vistos_por_ultimo', {})
+    voltaram = [f"{nome} (visto em {vistos[nome][:10]})" if nome in vistos else nome for nome in rotacao['voltaram']]
+    for titulo, nomes in (("Novos", rotacao['entraram']), ("Voltaram", voltaram), ("Saíram", rotacao['sairam'])):
+        if nomes:
+            print(f"   {titulo}: {', '.join(nomes[:15])}{' ...' if len(nomes) > 15 else ''}")
+    for nome, antes, depois in rotacao['precos_alterados']:
+        print(f"   💰 {nome}: {antes} → {depois} V-Bucks")
+    print()
+
+def analisar_rotacao(conn, itens_loja):
+    """
+    Compara a loja com o último snapshot, imprime a rotação e, com REUSAR_DISPONIBILIDADE,
+    copia a disponibilidade dos itens que continuam.
+    Retorna: primeiras vezes de cada item (para gravar_snapshot)
+    """
+    if conn is None or not itens_loja:
+        return {}
+
+    with etapa('historico_loja'):
+        anterior = carregar_ultimo_snapshot(conn)
+        primeiras_vezes = carregar_primeiras_vezes(conn)
+        imprimir_rotacao(comparar_rotacao(anterior, itens_loja, primeiras_vezes, carregar_ultimas_vezes(conn)))
+
+        if REUSAR_DISPONIBILIDADE:
+            reaproveitados = reaproveitar_disponibilidade(itens_loja, anterior)
+            if reaproveitados:
+                print(f"   ♻️ {reaproveitados} item(ns) continuam na rotação: disponibilidade reaproveitada, sem abrir o modal\n")
+
+    return primeiras_vezes
+
+def historico_rotacao(caminho=SNAPSHOTS_PATH):
+    """Rotação entre os dois últimos snapshots gravados (sem navegador)"""
+    conn = abrir_historico_loja(caminho)
+    if conn is None:
+        return
+
+    execucoes = conn.execute("SELECT id, data_coleta, total_itens FROM execucoes ORDER BY id DESC LIMIT 2").fetchall()
+    if not execucoes:
+        conn.close()
+        print("\n📂 Nenhum snapshot gravado")
+        return
+
+    atual_id, data_atual, total = execucoes[0]
+    print(f"\n📂 Último snapshot: {data_atual} ({total} itens)")
+    itens_loja = [{'nome': nome, 'nome_normalizado': nome_norm, 'preco': preco}
+                  for nome, nome_norm, preco in conn.execute(
+                      "SELECT nome, nome_normalizado, preco FROM snapshot_itens WHERE execucao_id = ?", (atual_id,))]
+
+    anterior = None
+    if len(execucoes) > 1:
+        anterior_id, data_anterior, _ = execucoes[1]
+        anterior = {'data_coleta': data_anterior, 'itens': {
+            nome_norm: {'nome': nome, 'preco': preco}
+            for nome_norm, nome, preco in conn.execute(
+                "SELECT nome_normalizado, nome, preco FROM snapshot_itens WHERE execucao_id = ?", (anterior_id,))
+        }}
+
+    primeiras_vezes = dict(conn.execute(
+        "SELECT nome_normalizado, MIN(primeira_vez) FROM snapshot_itens WHERE execucao_id < ? GROUP BY nome_normalizado",
+        (atual_id,)
+    ))
+    ultimas_vezes = carregar_ultimas_vezes(conn, antes_de=atual_id)
+    conn.close()
+    imprimir_rotacao(comparar_rotacao(anterior, itens_loja, primeiras_vezes, ultimas_vezes))
+
 # ========================================
 # TELEGRAM
 # ========================================
@@ -775,7 +1531,9 @@ def enviar_telegram(resultados, agora):
             'disable_web_page_preview': True
         }
         
-        response = requests.post(url_api, json=payload, timeout=30)
+        import requests
+        with etapa('envio_telegram'):
+            response = requests.post(url_api, json=payload, timeout=30)
         
         if response.status_code == 200:
             print(f"✅ Telegram: {len(itens_disponiveis)} itens disponíveis enviados!")
@@ -792,6 +1550,7 @@ def enviar_telegram(resultados, agora):
 # EMAIL, DISPLAY E MAIN
 # ========================================
 
+@cronometrar('renderizacao_email')
 def criar_html_email(resultados, agora):
     """Cria HTML do email"""
     
@@ -1116,7 +1875,7 @@ def enviar_email(resultados, agora):
         msg.add_alternative(html_content, subtype='html')
         
         print("   📤 Enviando email...")
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
+        with etapa('envio_smtp'), smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
             smtp.login(EMAIL_REMETENTE, SENHA_APP)
             smtp.send_message(msg)
         
@@ -1178,6 +1937,7 @@ def imprimir_resumo(resultados):
     print(f"❌ Não encontrados: {nao_encontrados}")
     print(f"📋 Total: {len(resultados)}")
     print(f"💾 XPaths em cache: {len(CACHE_XPATHS)}")
+    imprimir_tempos_espera()
     print("="*100 + "\n")
 
 def main():
@@ -1187,13 +1947,18 @@ def main():
     
     print("🌐 Iniciando navegador...")
     driver = inicializar_driver_antidetect()
+    historico = None
     
     try:
         print(f"🔗 Acessando: {FORTNITE_SHOP_URL}")
-        driver.get(FORTNITE_SHOP_URL)
-        
-        if not aguardar_pagina_carregar(driver):
-            print("⚠️ Timeout - tentando mesmo assim...")
+        inicio_pagina = time.perf_counter()
+        with etapa('carregamento_pagina'):
+            driver.get(FORTNITE_SHOP_URL)
+            
+            if not aguardar_pagina_carregar(driver):
+                print("⚠️ Timeout - tentando mesmo assim...")
+        # Primeira página inclui o desafio do Cloudflare, que o perfil quente costuma pular
+        registrar_tempo_perfil(PERFIL_CHROME, 'primeira_pagina', time.perf_counter() - inicio_pagina)
         
         salvar_screenshot(driver, "fortnite_loja.png")
         
@@ -1203,9 +1968,18 @@ def main():
         # Salva lista completa
         salvar_lista_loja(itens_loja)
         
+        # Rotação desde a última execução (itens que continuam não abrem o modal de novo)
+        historico = abrir_historico_loja()
+        primeiras_vezes = analisar_rotacao(historico, itens_loja)
+        
         # 2. Busca os itens monitorados e extrai disponibilidade
         resultados = buscar_itens_monitorados(driver, itens_loja, ITENS_MONITORAR)
         
+        if historico is not None and itens_loja:
+            with etapa('historico_loja'):
+                gravar_snapshot(historico, itens_loja, agora_iso_brasilia(), primeiras_vezes)
+            print(f"💾 Snapshot da loja gravado em: {SNAPSHOTS_PATH}\n")
+        
         imprimir_resultados(resultados)
         imprimir_resumo(resultados)
         
@@ -1222,11 +1996,29 @@ def main():
         salvar_screenshot(driver, "fortnite_erro.png")
     
     finally:
+        if historico is not None:
+            historico.close()
         print("🔒 Fechando navegador...")
         try:
             driver.quit()
         except:
             pass
+        finalizar_perfil(PERFIL_CHROME, driver)
+        imprimir_relatorio_perfis()
+        imprimir_etapas()
+        gravar_metricas('fortnite')
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Monitor da loja do Fortnite")
+    parser.add_argument('--benchmark-correspondencia', action='store_true',
+                        help="mede a correspondência de 10.000 itens monitorados contra 2.000 itens da loja")
+    parser.add_argument('--rotacao', action='store_true',
+                        help="mostra o que entrou e saiu da loja entre os dois últimos snapshots, sem navegador")
+    args = parser.parse_args()
+    
+    if args.rotacao:
+        historico_rotacao()
+    elif args.benchmark_correspondencia:
+        medir_correspondencia()
+    else:
+        main()
@@ -1,15 +1,29 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+# Dependências pesadas (selenium, supabase, requests) são importadas sob demanda:
+# importar o módulo não conecta a nada nem abre navegador, e o caminho só HTTP
+# não paga a importação do selenium
 import time
 import re
-from datetime import datetime
+import json
+import queue
+import threading
+import uuid
+import csv
+import zlib
+import argparse
+import sqlite3
+from collections import Counter
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 import smtplib
+from string import Formatter, Template
 from email.message import EmailMessage
 import os
-from supabase import create_client, Client
-import requests
+from Navegador import (aplicar_opcoes_bloqueio, configurar_bloqueio, aplicar_carregamento_eager,
+                       aguardar_condicao, imprimir_tempos_espera, aplicar_perfil, iniciar_driver_perfil,
+                       carregar_pagina, finalizar_perfil, imprimir_relatorio_perfis)
+from Metricas import etapa, cronometrar, imprimir_etapas, gravar_metricas
 
 # ========================================
 # CONFIGURAÇÕES VIA VARIÁVEIS DE AMBIENTE
@@ -35,154 +49,174 @@ required_vars = {
     'SENHA_APP_P': SENHA_APP
 }
 
-# Inicializar Supabase
-try:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    print("✅ Conexão com Supabase estabelecida")
-except Exception as e:
-    print(f"❌ Erro ao conectar com Supabase: {e}")
-    exit(1)
+# Cliente Supabase (criado na primeira chamada de obter_supabase)
+_supabase = None
 
 # Destinatários (usa o mesmo email do remetente)
 DESTINATARIOS = [EMAIL_REMETENTE]
 
-# Produtos a monitorar (LISTA COMPLETA - 23 produtos)
-PRODUTOS = [
-    {
-        "product_key": "kabum-1",
-        "url": "https://www.kabum.com.br/produto/461173/cabo-em-espiral-para-teclado-hyperx-usb-c-para-usb-a-1-20m-azul-6j680aa",
-        "preco_estimado": 75.00
-    },
-    {
-        "product_key": "kabum-2",
-        "url": "https://www.kabum.com.br/produto/95803/hd-interno-seagate-barracuda-4tb-sata-3-5-st4000dm004",
-        "preco_estimado": 650.00
-    },
-    {
-        "product_key": "kabum-3",
-        "url": "https://www.kabum.com.br/produto/128256/hd-interno-seagate-barracuda-8tb-3-5-sata-st8000dm004",
-        "preco_estimado": 950.00
-    },
-    {
-        "product_key": "kabum-4",
-        "url": "https://www.kabum.com.br/produto/451197/caixa-de-som-gamer-rise-mode-aura-sound-s5-rgb-bluetooth-3wx2-preto-rm-sp-05-rgb",
-        "preco_estimado": 65.00
-    },
-    {
-        "product_key": "kabum-5",
-        "url": "https://www.kabum.com.br/produto/451195/caixa-de-som-gamer-rise-mode-aura-sound-s3-rgb-rainbow-3w-2-preto-rm-sp-03-rgb",
-        "preco_estimado": 50.00
-    },
-    {
-        "product_key": "kabum-6",
-        "url": "https://www.kabum.com.br/produto/527400/console-playstation-5-slim-sony-ssd-1tb-com-controle-sem-fio-dualsense-branco-2-jogos-1000038899",
-        "preco_estimado": 3300.00
-    },
-    {
-        "product_key": "kabum-7",
-        "url": "https://www.kabum.com.br/produto/875817/console-sony-playstation-5-slim-com-leitor-de-discos-ssd-1tb-controle-sem-fio-dualsense-2-jogos-1000038858",
-        "preco_estimado": 3300.00
-    },
-    {
-        "product_key": "kabum-8",
-        "url": "https://www.kabum.com.br/produto/922661/console-sony-playstation-5-com-leitor-de-discos-ssd-1tb-controle-sem-fio-dualsense-2-jogos-1000050613",
-        "preco_estimado": 3300.00
-    },
-    {
-        "product_key": "kabum-15",
-        "url": "https://www.kabum.com.br/produto/934759/console-sony-playstation-5-com-leitor-de-discos-ssd-1tb-controle-sem-fio-dualsense-2-jogos",
-        "preco_estimado": 3300.00
-    },
-    {
-        "product_key": "kabum-16",
-        "url": "https://www.kabum.com.br/produto/922661/console-sony-playstation-5-com-leitor-de-discos-ssd-1tb-controle-sem-fio-dualsense-2-jogos-1000050613",
-        "preco_estimado": 3300.00
-    },
-    {
-        "product_key": "kabum-17",
-        "url": "https://www.kabum.com.br/produto/636960/console-playstation-5-pro-sony-ssd-2tb-com-controle-sem-fio-dualsense-branco-1000046552",
-        "preco_estimado": 5000.00
-    },
-    {
-        "product_key": "kabum-9",
-        "url": "https://www.kabum.com.br/produto/316365/cartao-de-memoria-sandisk-ultra-microsd-uhs-i-128gb-100mb-s-com-adaptador-sdsqunr-128g-gn3ma",
-        "preco_estimado": 55.00
-    },
-    {
-        "product_key": "kabum-10",
-        "url": "https://www.kabum.com.br/produto/111807/cartao-de-memoria-kingston-microsd-de-128gb-canvas-select-plus-100mb-s-classe-10-com-adaptador-sd-sdcs2-128gb",
-        "preco_estimado": 55.00
-    },
-    {
-        "product_key": "kabum-11",
-        "url": "https://www.kabum.com.br/produto/728163/cartao-de-memoria-sandisk-creator-series-microsd-128gb-classe-10-leitura-190-mb-s-e-gravacao-90-mb-s-sdsqxaa-128g-gn6ms",
-        "preco_estimado": 130.00
-    },
-    {
-        "product_key": "kabum-12",
-        "url": "https://www.kabum.com.br/produto/728162/cartao-de-memoria-sandisk-creator-series-microsd-256gb-classe-10-leitura-190-mb-s-e-gravacao-130-mb-s-sdsqxav-256g-gn6ms",
-        "preco_estimado": 200.00
-    },
-    {
-        "product_key": "kabum-13",
-        "url": "https://www.kabum.com.br/produto/111808/cartao-de-memoria-kingston-microsd-de-256gb-canvas-select-plus-100mb-s-classe-10-com-adaptador-sd-sdcs2-256gb",
-        "preco_estimado": 120.00
-    },
-    {
-        "product_key": "kabum-14",
-        "url": "https://www.kabum.com.br/produto/728161/cartao-de-memoria-sandisk-creator-series-microsd-512gb-classe-10-leitura-190-mb-s-e-gravacao-130-mb-s-sdsqxav-512g-gn6ms",
-        "preco_estimado": 330.00
-    },
-    {
-        "product_key": "kabum-19",
-        "url": "https://www.kabum.com.br/produto/536958/leitor-de-disco-para-playstation-5-slim-ps5-pro-sony-edicao-digital-branco-cfi-2000-slim",
-        "preco_estimado": 449.90
-    },
-    {
-        "product_key": "kabum-20",
-        "url": "https://www.kabum.com.br/produto/442198/pen-drive-256gb-kingston-datatraveler-exodia-onyx-usb-3-2-preto-dtxon-256gb",
-        "preco_estimado": 99.99
-    },
-    {
-        "product_key": "kabum-21",
-        "url": "https://www.kabum.com.br/produto/498044/gabinete-jonsbo-d31-mesh-screen-matx-com-tela-lcd-aluminio-preto",
-        "preco_estimado": 1300.00
-    },
-    {
-        "product_key": "kabum-22",
-        "url": "https://www.kabum.com.br/produto/495500/mouse-sem-fio-logitech-pebble-2-m350s-usb-logi-bolt-ou-bluetooth-e-pilha-inclusa-com-clique-silencioso-grafite-910-007049",
-        "preco_estimado": 79.99
-    },
-    {
-        "product_key": "kabum-23",
-        "url": "https://www.kabum.com.br/produto/495497/teclado-sem-fio-logitech-bluetooth-e-usb-pebble-keys-2-k380s-easy-switch-e-pilha-inclusa-grafite-920-011789",
-        "preco_estimado": 169.90
-    },
-]
+# Número de navegadores Chrome verificando produtos em paralelo
+NUM_WORKERS = int(os.environ.get('KABUM_WORKERS', '3'))
+
+# Extração em um único execute_script (0 = usa apenas a varredura por XPath)
+EXTRACAO_SCRIPT = os.environ.get('KABUM_EXTRACAO_SCRIPT', '1') != '0'
+
+# Busca via HTTP antes de abrir o Chrome (0 = sempre usa Selenium)
+FETCH_HTTP = os.environ.get('KABUM_FETCH_HTTP', '1') != '0'
+HTTP_WORKERS = int(os.environ.get('KABUM_HTTP_WORKERS', '8'))
+HTTP_TIMEOUT = 20
+
+# Categorias de recursos que o Chrome do monitor carrega (o extrator só lê texto)
+BLOQUEIO_PERMITIR = ()
+
+# Espera máxima (s) pelo bloco de preço/esgotado após abrir a página do produto
+TIMEOUT_PAGINA_PRODUTO = 10
+
+# Escrita em lote no Supabase: linhas por insert e tentativas por lote
+SUPABASE_TAMANHO_LOTE = 500
+SUPABASE_MAX_TENTATIVAS = 3
+
+# Quantidade de product_keys por consulta "in" (mantém a URL do PostgREST curta)
+SUPABASE_LOTE_CONSULTA = 200
+
+# Linhas por página na leitura do histórico (o PostgREST limita a 1000 por resposta)
+HISTORICO_TAMANHO_PAGINA = 1000
+
+# Outbox local (SQLite): toda escrita passa por aqui antes de ir ao Supabase
+OUTBOX_PATH = os.environ.get('KABUM_OUTBOX', 'kabum_outbox.sqlite3')
+OUTBOX_INTERVALO_FLUSH = 5        # segundos entre tentativas do flusher
+OUTBOX_TIMEOUT_FINAL = 120        # espera máxima pelo flush no fim da execução
+OUTBOX_MAX_TENTATIVAS = 8         # falhas de um lote até a linha ir para outbox_falhas (dead letter)
+OUTBOX_ESPERA_MAXIMA = 300        # teto (s) da espera entre tentativas de um grupo que está falhando
+OUTBOX_DEPENDENCIAS = {           # tabela -> tabela cujas linhas anteriores precisam ter sido enviadas antes
+    'Estado Kabum': 'Monitoramento Kabum',   # o estado só avança depois que as mudanças estão no histórico
+}
+
+# Histórico só com mudanças (1 = grava em "Monitoramento Kabum" apenas quando preço ou
+# status mudam; o último estado de cada produto e o heartbeat ficam em "Estado Kabum")
+HISTORICO_DELTA = os.environ.get('KABUM_HISTORICO_DELTA', '0') == '1'
+
+# Resumo diário (1 = atualiza "Resumo Diário Kabum" ao fim de cada execução; a tabela
+# precisa existir no Supabase, ver o DDL na seção RESUMO DIÁRIO)
+RESUMO_DIARIO = os.environ.get('KABUM_RESUMO_DIARIO', '0') == '1'
+
+# Agendamento por volatilidade (1 = cada execução verifica só os produtos "devidos"
+# pela faixa de frequência; usa o Resumo Diário Kabum dos últimos dias, então
+# também liga a atualização do resumo)
+AGENDADOR_ATIVO = os.environ.get('KABUM_AGENDADOR', '0') == '1'
+AGENDADOR_JANELA_DIAS = 14
+AGENDADOR_INTERVALO_HORAS = {     # intervalo mínimo entre verificações por faixa
+    'alta': 0,                    # toda execução
+    'media': 24,
+    'baixa': 72,
+}
+AGENDADOR_FOLGA_HORAS = 2         # tolerância para variações no horário do cron
+AGENDADOR_PROXIMIDADE = 0.10      # até 10% acima do estimado conta como "perto"
+AGENDADOR_DISTANCIA = 0.30        # mais de 30% acima do estimado conta como "longe"
+AGENDADOR_MUDANCAS_ALTA = 0.30    # fração de dias com mudança que leva à faixa alta
+EXECUCOES_POR_DIA = float(os.environ.get('KABUM_EXECUCOES_DIA', '1'))
+
+# Análise do histórico com NumPy (Analise_Precos) para o email e o Telegram
+# (0 = desliga; sem NumPy instalado a análise é ignorada)
+ANALISE_PRECOS_ATIVA = os.environ.get('KABUM_ANALISE', '1') == '1'
+ANALISE_JANELA_DIAS = 365
+
+# Catálogo de produtos e filtros do Telegram (JSON ou CSV, ver carregar_catalogo)
+CATALOGO_PATH = os.environ.get('KABUM_CATALOGO', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kabum_catalogo.json'))
+
+# Catálogo carregado (na primeira chamada de obter_catalogo)
+_catalogo = None
 
 # ========================================
-# CONFIGURAÇÕES DE FILTRO TELEGRAM
+# CATÁLOGO DE PRODUTOS
 # ========================================
 
-# Lista de produtos para SEMPRE enviar no Telegram (whitelist prioritária)
-# Produtos nesta lista SEMPRE enviam notificação quando disponíveis, 
-# INDEPENDENTE do preço estar acima ou abaixo do estimado
-ENVIAR_TELEGRAM = [
-    "kabum-2",   # HD Seagate 4TB
-    "kabum-3",   # HD Seagate 8TB
-    "kabum-14",  # Cartão SanDisk 512GB
-]
-
-# Lista de produtos para NÃO enviar no Telegram (blacklist)
-# Útil para produtos que você não quer mais monitorar via Telegram
-NAO_ENVIAR_TELEGRAM = [
-    "kabum-6",  # Exemplo: descomentar para ignorar este produto
-]
+def carregar_catalogo(caminho=CATALOGO_PATH):
+    """
+    Carrega o catálogo de produtos de um arquivo JSON ou CSV.
+    
+    JSON: {"produtos": [{product_key, url, preco_estimado}, ...],
+           "enviar_telegram": [...], "nao_enviar_telegram": [...]}
+    CSV:  colunas product_key, url, preco_estimado e telegram ("sempre" / "nunca")
+    
+    Retorna: dict com 'produtos' (na ordem do arquivo), 'por_chave'
+    {product_key: produto} e os filtros 'enviar_telegram' / 'nao_enviar_telegram' (sets)
+    """
+    if caminho.lower().endswith('.csv'):
+        with open(caminho, encoding='utf-8', newline='') as arquivo:
+            linhas = list(csv.DictReader(arquivo))
+        produtos = [
+            {'product_key': linha.get('product_key') or None, 'url': linha['url'], 'preco_estimado': float(linha['preco_estimado'])}
+            for linha in linhas
+        ]
+        marcas_telegram = [(linha.get('telegram') or '').strip().lower() for linha in linhas]
+    else:
+        with open(caminho, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+        produtos = [dict(produto) for produto in dados['produtos']]
+        enviar = set(dados.get('enviar_telegram', []))
+        nao_enviar = set(dados.get('nao_enviar_telegram', []))
+    
+    por_chave = {}
+    for index, produto in enumerate(produtos, 1):
+        produto['product_key'] = produto.get('product_key') or f"kabum-{index}"
+        if produto['product_key'] in por_chave:
+            raise ValueError(f"product_key duplicado no catálogo: {produto['product_key']}")
+        por_chave[produto['product_key']] = produto
+    
+    if caminho.lower().endswith('.csv'):
+        enviar = {p['product_key'] for p, marca in zip(produtos, marcas_telegram) if marca == 'sempre'}
+        nao_enviar = {p['product_key'] for p, marca in zip(produtos, marcas_telegram) if marca == 'nunca'}
+    
+    return {
+        'produtos': produtos,
+        'por_chave': por_chave,
+        'enviar_telegram': enviar,
+        'nao_enviar_telegram': nao_enviar,
+    }
+
+def obter_catalogo():
+    """Carrega o catálogo na primeira chamada e reutiliza nas seguintes"""
+    global _catalogo
+    if _catalogo is None:
+        _catalogo = carregar_catalogo()
+    return _catalogo
+
+def interpretar_shard(texto):
+    """Converte "i/N" (1 <= i <= N) em (i, N)"""
+    try:
+        indice, total = (int(parte) for parte in texto.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard inválido: {texto!r} (use i/N, ex.: 2/4)")
+    if not 1 <= indice <= total:
+        raise argparse.ArgumentTypeError(f"shard inválido: {texto!r} (i deve estar entre 1 e N)")
+    return indice, total
+
+def produtos_do_shard(produtos, indice, total):
+    """
+    Fatia disjunta do catálogo para o shard indice/total.
+    
+    A fatia é definida pelo hash do product_key, então cada produto fica
+    sempre no mesmo shard mesmo quando o catálogo cresce ou é reordenado.
+    """
+    return [
+        produto for produto in produtos
+        if zlib.crc32(produto['product_key'].encode('utf-8')) % total == indice - 1
+    ]
 
 # ========================================
 # FUNÇÕES AUXILIARES
 # ========================================
 
+def obter_supabase():
+    """Cria o cliente Supabase na primeira chamada e reutiliza nas seguintes"""
+    global _supabase
+    if _supabase is None:
+        from supabase import create_client
+        _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        print("✅ Conexão com Supabase estabelecida")
+    return _supabase
+
 def obter_horario_brasilia():
     """Retorna o horário atual de Brasília formatado para exibição"""
     try:
@@ -252,41 +286,57 @@ def formatar_preco_brasileiro(valor):
     """Formata valor numérico para padrão brasileiro"""
     return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
 
-def obter_menor_preco_historico(product_key):
-    """Busca o menor preço histórico do banco de dados"""
-    try:
-        response = supabase.table("Menores Preços Kabum") \
-            .select("preco_atual") \
-            .eq("product_key", product_key) \
+def buscar_menores_precos(product_keys):
+    """
+    Busca os menores preços históricos de vários produtos de uma vez.
+    
+    Usa consultas "in" em lotes em vez de uma consulta por produto. Propaga
+    exceções, para quem precisa distinguir "sem registro" de "falha na consulta".
+    Retorna: dict {product_key: preco_atual}
+    """
+    product_keys = list(dict.fromkeys(product_keys))
+    menores_precos = {}
+    
+    for inicio in range(0, len(product_keys), SUPABASE_LOTE_CONSULTA):
+        lote = product_keys[inicio:inicio + SUPABASE_LOTE_CONSULTA]
+        response = obter_supabase().table("Menores Preços Kabum") \
+            .select("product_key, preco_atual") \
+            .in_("product_key", lote) \
             .execute()
         
-        if response.data and len(response.data) > 0:
-            preco = response.data[0].get('preco_atual')
-            return preco if preco is not None else None
-        return None
+        for registro in response.data or []:
+            menores_precos[registro['product_key']] = registro.get('preco_atual')
+    
+    return menores_precos
+
+def carregar_menores_precos_historicos(product_keys):
+    """Carrega os menores preços históricos para exibição (vazio em caso de erro)"""
+    try:
+        return buscar_menores_precos(product_keys)
     except Exception as e:
-        print(f"⚠️ Erro ao buscar menor preço para {product_key}: {str(e)}")
-        return None
+        print(f"⚠️ Erro ao carregar menores preços: {str(e)}")
+        return {}
 
 def produto_passa_filtros_telegram(produto):
     """
     Verifica se um produto deve ser enviado no Telegram baseado nos filtros configurados.
     
     Prioridade dos filtros:
-    1. Whitelist (ENVIAR_TELEGRAM) - sempre envia se disponível
-    2. Blacklist (NAO_ENVIAR_TELEGRAM) - nunca envia
+    1. Whitelist (enviar_telegram do catálogo) - sempre envia se disponível
+    2. Blacklist (nao_enviar_telegram do catálogo) - nunca envia
     
     Retorna: (bool, str) - (deve_enviar, motivo)
     """
     product_key = produto.get('product_key')
+    catalogo = obter_catalogo()
     
     # Filtro 1: Whitelist (PRIORIDADE MÁXIMA)
     # Se está na whitelist, SEMPRE envia (ignora comparação de preço)
-    if product_key in ENVIAR_TELEGRAM:
+    if product_key in catalogo['enviar_telegram']:
         return True, f"⭐ Produto na whitelist (sempre envia)"
     
     # Filtro 2: Blacklist
-    if product_key in NAO_ENVIAR_TELEGRAM:
+    if product_key in catalogo['nao_enviar_telegram']:
         return False, f"🚫 Produto na blacklist"
     
     # Se não está em nenhuma lista, segue regra normal (verifica preço)
@@ -296,8 +346,79 @@ def produto_passa_filtros_telegram(produto):
 # FUNÇÕES DE SCRAPING
 # ========================================
 
-def verificar_status_produto(driver):
-    """Verifica o status do produto na página"""
+# Lê o bloco do produto inteiro no navegador e devolve {status, price_text, source}
+SCRIPT_STATUS_PRODUTO = """
+    const base = document.evaluate(
+        '//*[@id="main-content"]/div[1]/div[1]/div[1]/div[3]',
+        document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+    if (!base) return null;
+
+    const regexPreco = /R\\$\\s*[\\d.,]+/;
+    const divs = Array.from(base.children).filter(el => el.tagName === 'DIV').slice(0, 3);
+
+    for (let i = 0; i < divs.length; i++) {
+        const texto = (divs[i].innerText || '').trim();
+        const source = 'div[' + (i + 1) + ']';
+
+        if (texto.toLowerCase().includes('esgotado')) {
+            return {status: 'esgotado', price_text: null, source: source};
+        }
+
+        const h4 = divs[i].querySelector('h4');
+        const textoH4 = h4 ? (h4.innerText || '').trim() : '';
+        const matchH4 = textoH4.match(regexPreco);
+        const match = matchH4 || texto.match(regexPreco);
+        if (match) {
+            return {status: 'disponivel', price_text: match[0], source: matchH4 ? source + '/h4' : source};
+        }
+    }
+    return null;
+"""
+
+# Pronto quando o bloco do produto já mostra um preço ou o aviso de esgotado
+SCRIPT_PRODUTO_PRONTO = """
+    const base = document.evaluate(
+        '//*[@id="main-content"]/div[1]/div[1]/div[1]/div[3]',
+        document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+    if (!base) return false;
+    const texto = base.innerText || '';
+    return /R\\$\\s*[\\d]/.test(texto) || texto.toLowerCase().includes('esgotado');
+"""
+
+# Quantos produtos cada caminho de extração resolveu (script, xpath, falha)
+CONTADOR_EXTRACAO = Counter()
+_lock_contador = threading.Lock()
+
+def registrar_extracao(caminho):
+    """Contabiliza o caminho de extração usado (seguro entre workers)"""
+    with _lock_contador:
+        CONTADOR_EXTRACAO[caminho] += 1
+
+def verificar_status_produto_script(driver):
+    """Extrai status e preço do bloco do produto em um único execute_script"""
+    try:
+        dados = driver.execute_script(SCRIPT_STATUS_PRODUTO)
+    except Exception:
+        return None
+    
+    if not dados:
+        return None
+    
+    if dados.get('status') == 'esgotado':
+        return ("esgotado", "Ops! Produto esgotado")
+    
+    preco = extrair_preco(dados.get('price_text') or '')
+    if dados.get('status') == 'disponivel' and preco:
+        return ("disponivel", preco)
+    
+    return None
+
+def verificar_status_produto_xpath(driver):
+    """Verifica o status do produto sondando cada XPath do bloco de preço"""
+    from selenium.webdriver.common.by import By
+    
     base_xpath = '//*[@id="main-content"]/div[1]/div[1]/div[1]/div[3]'
     
     for div_num in [1, 2, 3]:
@@ -325,229 +446,1363 @@ def verificar_status_produto(driver):
         except:
             continue
     
-    return ("erro", "Erro ao verificar")
+    return ("erro", "Erro ao verificar")
+
+def verificar_status_produto(driver):
+    """
+    Verifica o status do produto na página.
+    
+    Tenta primeiro a extração em um único roundtrip (execute_script) e, se ela
+    for inconclusiva, cai para a varredura por XPath.
+    """
+    if EXTRACAO_SCRIPT:
+        resultado = verificar_status_produto_script(driver)
+        if resultado:
+            registrar_extracao('script')
+            return resultado
+    
+    resultado = verificar_status_produto_xpath(driver)
+    registrar_extracao('xpath' if resultado[0] != 'erro' else 'falha')
+    return resultado
+
+def inicializar_driver(nome_perfil='kabum'):
+    """Inicializa o Chrome em modo headless (com o perfil persistente, se ativo)"""
+    return iniciar_driver_perfil(nome_perfil, lambda: criar_driver(nome_perfil))
+
+def criar_driver(nome_perfil):
+    """Cria o Chrome com bloqueio de recursos, carregamento eager e o perfil do worker"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--log-level=3')
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+    aplicar_opcoes_bloqueio(chrome_options, BLOQUEIO_PERMITIR)
+    aplicar_carregamento_eager(chrome_options)
+    aplicar_perfil(chrome_options, nome_perfil)
+    
+    driver = webdriver.Chrome(options=chrome_options)
+    configurar_bloqueio(driver, BLOQUEIO_PERMITIR)
+    return driver
+
+def verificar_produto(driver, url):
+    """Acessa a página do produto e retorna (tipo, status)"""
+    carregar_pagina(driver, url)
+    # Espera o bloco de preço renderizar; no timeout a extração segue e cai no caminho de erro
+    aguardar_condicao(driver, lambda d: d.execute_script(SCRIPT_PRODUTO_PRONTO),
+                      'kabum.bloco_produto', timeout=TIMEOUT_PAGINA_PRODUTO)
+    with etapa('extracao'):
+        return verificar_status_produto(driver)
+
+def executar_worker(worker_id, fila, resultados, estatisticas):
+    """
+    Consome produtos da fila com um driver próprio até a fila esvaziar.
+    
+    Os resultados são gravados por índice do catálogo; None indica erro ao processar.
+    """
+    inicio = time.time()
+    processados = 0
+    driver = None
+    
+    try:
+        driver = inicializar_driver(f"kabum-{worker_id}")
+        
+        while True:
+            try:
+                index, item = fila.get_nowait()
+            except queue.Empty:
+                break
+            
+            try:
+                resultados[index] = verificar_produto(driver, item['url'])
+            except Exception as e:
+                print(f"⚠️ Worker {worker_id}: erro em {item['url']}: {str(e)[:100]}")
+                resultados[index] = None
+            
+            processados += 1
+    
+    except Exception as e:
+        print(f"❌ Worker {worker_id}: erro ao inicializar driver: {e}")
+    
+    finally:
+        if driver:
+            driver.quit()
+            finalizar_perfil(f"kabum-{worker_id}", driver)
+        
+        tempo = time.time() - inicio
+        estatisticas[worker_id] = {
+            'produtos': processados,
+            'tempo': tempo,
+            'produtos_por_minuto': (processados / tempo * 60) if tempo > 0 else 0.0
+        }
+
+def verificar_produtos_em_paralelo(produtos_indexados, num_workers):
+    """
+    Divide os produtos entre um pool de drivers Chrome.
+    
+    Recebe pares (índice no catálogo, produto).
+    Retorna: (resultados, estatisticas) - resultados indexados pela posição no
+    catálogo e estatísticas de throughput por worker
+    """
+    fila = queue.Queue()
+    for index, item in produtos_indexados:
+        fila.put((index, item))
+    
+    num_workers = max(1, min(num_workers, fila.qsize()))
+    resultados = {}
+    estatisticas = {}
+    
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for worker_id in range(1, num_workers + 1):
+            executor.submit(executar_worker, worker_id, fila, resultados, estatisticas)
+    
+    return resultados, estatisticas
+
+# ========================================
+# FUNÇÕES DE SCRAPING (HTTP)
+# ========================================
+
+REGEX_JSON_LD = re.compile(r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S | re.I)
+REGEX_NEXT_DATA = re.compile(r'<script[^>]*id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S | re.I)
+REGEX_CODIGO_PRODUTO = re.compile(r'/produto/(\d+)')
+
+# Campos que identificam o produto nos objetos do __NEXT_DATA__
+CHAVES_CODIGO_NEXT_DATA = ('code', 'productCode', 'codigo', 'id', 'sku')
+CHAVES_URL_NEXT_DATA = ('url', 'link', 'friendlyName', 'canonical')
+
+def criar_sessao_http(pool_size=HTTP_WORKERS):
+    """Cria sessão HTTP com pool de conexões para as páginas da KaBuM"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+    })
+    return session
+
+def iterar_objetos_json(dados):
+    """Percorre todos os dicts de um JSON, inclusive JSON serializado dentro de strings"""
+    pilha = [dados]
+    while pilha:
+        atual = pilha.pop()
+        if isinstance(atual, dict):
+            yield atual
+            pilha.extend(atual.values())
+        elif isinstance(atual, list):
+            pilha.extend(atual)
+        elif isinstance(atual, str) and atual[:1] in ('{', '['):
+            try:
+                pilha.append(json.loads(atual))
+            except ValueError:
+                pass
+
+def converter_preco_json(valor):
+    """Converte preço vindo de JSON (número ou texto) em float positivo"""
+    try:
+        preco = float(str(valor).replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+    return preco if preco > 0 else None
+
+def codigo_produto(url):
+    """Código do produto na URL da KaBuM (/produto/<código>/...) ou None"""
+    match = REGEX_CODIGO_PRODUTO.search(url or '')
+    return match.group(1) if match else None
+
+def objeto_do_produto(obj, codigo):
+    """True se o objeto do __NEXT_DATA__ se refere ao produto de código informado"""
+    for chave in CHAVES_CODIGO_NEXT_DATA:
+        if str(obj.get(chave, '')).strip() == codigo:
+            return True
+    for chave in CHAVES_URL_NEXT_DATA:
+        valor = obj.get(chave)
+        if isinstance(valor, str) and codigo_produto(valor) == codigo:
+            return True
+    return False
+
+def extrair_status_next_data(html, url=None):
+    """
+    Lê status e preço do bloco __NEXT_DATA__ da página.
+    
+    Só vale o objeto do próprio produto (código ou URL iguais aos da página):
+    o bloco também traz recomendados e "quem viu comprou". Sem código na URL
+    ou sem objeto correspondente, retorna None e o produto vai para o Chrome.
+    """
+    codigo = codigo_produto(url)
+    if not codigo:
+        return None
+    
+    match = REGEX_NEXT_DATA.search(html)
+    if not match:
+        return None
+    
+    try:
+        dados = json.loads(match.group(1))
+    except ValueError:
+        return None
+    
+    for obj in iterar_objetos_json(dados):
+        if 'available' not in obj or not ('priceWithDiscount' in obj or 'price' in obj):
+            continue
+        if not objeto_do_produto(obj, codigo):
+            continue
+        
+        if obj['available'] is False:
+            return ("esgotado", "Ops! Produto esgotado")
+        
+        preco = converter_preco_json(obj.get('priceWithDiscount')) or converter_preco_json(obj.get('price'))
+        if obj['available'] is True and preco:
+            return ("disponivel", formatar_preco_brasileiro(preco))
+    
+    return None
+
+def extrair_status_json_ld(html):
+    """Lê status e preço das ofertas schema.org (JSON-LD) da página"""
+    for bloco in REGEX_JSON_LD.findall(html):
+        try:
+            dados = json.loads(bloco.strip())
+        except ValueError:
+            continue
+        
+        for obj in iterar_objetos_json(dados):
+            if obj.get('@type') not in ('Offer', 'AggregateOffer'):
+                continue
+            
+            disponibilidade = str(obj.get('availability', ''))
+            if 'OutOfStock' in disponibilidade or 'SoldOut' in disponibilidade:
+                return ("esgotado", "Ops! Produto esgotado")
+            
+            preco = converter_preco_json(obj.get('price')) or converter_preco_json(obj.get('lowPrice'))
+            if 'InStock' in disponibilidade and preco:
+                return ("disponivel", formatar_preco_brasileiro(preco))
+    
+    return None
+
+def extrair_status_html(html, url=None):
+    """
+    Extrai (tipo, status) do HTML renderizado no servidor.
+    
+    Retorna None quando o parse é inconclusivo e a página precisa do Chrome.
+    """
+    return extrair_status_next_data(html, url) or extrair_status_json_ld(html)
+
+def verificar_produto_http(session, url):
+    """Busca a página via HTTP e retorna (tipo, status) ou None se inconclusivo"""
+    import requests
+    
+    try:
+        with etapa('carregamento_pagina_http'):
+            response = session.get(url, timeout=HTTP_TIMEOUT)
+    except requests.RequestException:
+        return None
+    
+    if response.status_code != 200:
+        return None
+    
+    with etapa('extracao'):
+        return extrair_status_html(response.text, url)
+
+def verificar_produtos_via_http(produtos_indexados):
+    """
+    Tenta resolver os produtos só com HTTP, em paralelo e com sessão compartilhada.
+    
+    Retorna: dict {índice: (tipo, status)} apenas com os produtos resolvidos
+    """
+    resultados = {}
+    session = criar_sessao_http()
+    
+    def tarefa(index, item):
+        resultado = verificar_produto_http(session, item['url'])
+        if resultado:
+            registrar_extracao('http')
+            resultados[index] = resultado
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, HTTP_WORKERS)) as executor:
+            for index, item in produtos_indexados:
+                executor.submit(tarefa, index, item)
+    finally:
+        session.close()
+    
+    return resultados
+
+def verificar_produtos(produtos):
+    """
+    Verifica o catálogo: HTTP primeiro e Chrome apenas para os inconclusivos.
+    
+    Retorna: (resultados, estatisticas_workers) como verificar_produtos_em_paralelo
+    """
+    produtos_indexados = list(enumerate(produtos, 1))
+    resultados = {}
+    
+    if FETCH_HTTP:
+        resultados = verificar_produtos_via_http(produtos_indexados)
+        print(f"🌐 HTTP resolveu {len(resultados)}/{len(produtos_indexados)} produto(s)")
+    
+    pendentes = [(index, item) for index, item in produtos_indexados if index not in resultados]
+    estatisticas_workers = {}
+    
+    if pendentes:
+        print(f"🖥️ Abrindo Chrome para {len(pendentes)} produto(s)...\n")
+        resultados_chrome, estatisticas_workers = verificar_produtos_em_paralelo(pendentes, NUM_WORKERS)
+        resultados.update(resultados_chrome)
+    
+    return resultados, estatisticas_workers
+
+# ========================================
+# FUNÇÕES DE PERSISTÊNCIA
+# ========================================
+
+def gerar_run_id():
+    """Gera um identificador único para a execução do monitor"""
+    return uuid.uuid4().hex
+
+def enviar_lote(tabela, lote, on_conflict=None):
+    """Envia um lote ao Supabase em uma única requisição (insert ou upsert)"""
+    if on_conflict:
+        obter_supabase().table(tabela).upsert(lote, on_conflict=on_conflict).execute()
+    else:
+        obter_supabase().table(tabela).insert(lote).execute()
+
+def gravar_em_lotes(tabela, linhas, on_conflict=None, tamanho_lote=SUPABASE_TAMANHO_LOTE, max_tentativas=SUPABASE_MAX_TENTATIVAS):
+    """
+    Grava linhas em lotes (bulk insert, ou upsert quando on_conflict é informado),
+    com retry independente por lote.
+    
+    Um lote que falha não impede os demais de serem gravados.
+    Retorna: lista de linhas que não puderam ser gravadas
+    """
+    linhas_falhas = []
+    
+    for inicio in range(0, len(linhas), tamanho_lote):
+        lote = linhas[inicio:inicio + tamanho_lote]
+        numero_lote = inicio // tamanho_lote + 1
+        
+        for tentativa in range(1, max_tentativas + 1):
+            try:
+                enviar_lote(tabela, lote, on_conflict)
+                break
+            except Exception as e:
+                print(f"⚠️ Lote {numero_lote} ({len(lote)} linhas) falhou na tentativa {tentativa}/{max_tentativas}: {str(e)[:100]}")
+                if tentativa < max_tentativas:
+                    time.sleep(2 ** tentativa)
+        else:
+            linhas_falhas.extend(lote)
+    
+    return linhas_falhas
+
+# ========================================
+# OUTBOX LOCAL (SQLITE)
+# ========================================
+
+class OutboxSupabase:
+    """
+    Fila local (SQLite em modo WAL) para as escritas no Supabase.
+    
+    As linhas são gravadas primeiro no arquivo local e enviadas em lote por uma
+    thread em segundo plano. O que não for enviado até o fim da execução
+    continua pendente e é retomado na próxima.
+    
+    Cada (tabela, on_conflict) é enviado de forma independente: um grupo que falha
+    (tabela ou coluna inexistente, por exemplo) espera com backoff exponencial e não
+    trava os outros. Depois de OUTBOX_MAX_TENTATIVAS falhas, a linha vai para a
+    tabela outbox_falhas, de onde reenfileirar_falhas a devolve depois de corrigido.
+    
+    A exceção são as tabelas de OUTBOX_DEPENDENCIAS: uma linha de "Estado Kabum"
+    só é enviada quando nenhuma linha de "Monitoramento Kabum" enfileirada antes
+    dela continua pendente ou em outbox_falhas, como no caminho sem outbox.
+    """
+
+    def __init__(self, caminho=OUTBOX_PATH, intervalo=OUTBOX_INTERVALO_FLUSH):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self._novos_dados = threading.Event()
+        self._parar = threading.Event()
+        self._lock_envio = threading.Lock()   # protege o envio e _espera_grupos
+        self._thread = None
+        self._espera_grupos = {}   # (tabela, on_conflict) -> (falhas seguidas, próxima tentativa)
+        self.enviadas = 0
+        
+        with self._conectar() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tabela TEXT NOT NULL,
+                    on_conflict TEXT,
+                    payload TEXT NOT NULL,
+                    criado_em TEXT NOT NULL,
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    ultimo_erro TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox_falhas (
+                    id INTEGER PRIMARY KEY,
+                    tabela TEXT NOT NULL,
+                    on_conflict TEXT,
+                    payload TEXT NOT NULL,
+                    criado_em TEXT NOT NULL,
+                    tentativas INTEGER NOT NULL,
+                    ultimo_erro TEXT,
+                    movido_em TEXT NOT NULL
+                )
+            """)
+
+    def _conectar(self):
+        """Abre uma conexão própria (conexões SQLite não são compartilhadas entre threads)"""
+        conn = sqlite3.connect(self.caminho, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def enfileirar(self, tabela, linhas, on_conflict=None):
+        """Grava linhas na outbox local e acorda o flusher"""
+        criado_em = obter_horario_brasilia_iso()
+        with self._conectar() as conn:
+            conn.executemany(
+                "INSERT INTO outbox (tabela, on_conflict, payload, criado_em) VALUES (?, ?, ?, ?)",
+                [(tabela, on_conflict, json.dumps(linha, ensure_ascii=False), criado_em) for linha in linhas]
+            )
+        self._novos_dados.set()
+        return len(linhas)
+
+    def contar_pendentes(self):
+        """Quantidade de linhas ainda não enviadas ao Supabase"""
+        with self._conectar() as conn:
+            return conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def contar_falhas(self):
+        """Quantidade de linhas paradas em outbox_falhas"""
+        with self._conectar() as conn:
+            return conn.execute("SELECT COUNT(*) FROM outbox_falhas").fetchone()[0]
+
+    def reenfileirar_falhas(self, tabela=None):
+        """Devolve as linhas de outbox_falhas (de uma tabela ou todas) para a outbox, zerando as tentativas"""
+        filtro, parametros = ("WHERE tabela = ?", (tabela,)) if tabela else ("", ())
+        # Mesmo lock do flusher: não corre junto com um envio que lê/grava _espera_grupos
+        with self._lock_envio:
+            with self._conectar() as conn:
+                # Mantém o id original: a ordem de enfileiramento vale para as dependências
+                conn.execute(f"""
+                    INSERT INTO outbox (id, tabela, on_conflict, payload, criado_em)
+                    SELECT id, tabela, on_conflict, payload, criado_em FROM outbox_falhas {filtro} ORDER BY id
+                """, parametros)
+                movidas = conn.execute(f"DELETE FROM outbox_falhas {filtro}", parametros).rowcount
+            self._espera_grupos.clear()
+        self._novos_dados.set()
+        return movidas
+
+    def linhas_pendentes(self, tabela):
+        """Linhas pendentes de uma tabela, na ordem em que foram enfileiradas"""
+        with self._conectar() as conn:
+            cursor = conn.execute("SELECT payload FROM outbox WHERE tabela = ? ORDER BY id", (tabela,))
+            return [json.loads(payload) for (payload,) in cursor]
+
+    def enviar_pendentes(self, tamanho_lote=SUPABASE_TAMANHO_LOTE, ignorar_espera=False):
+        """
+        Envia as linhas pendentes em lotes, grupo a grupo (tabela, on_conflict).
+        
+        Linhas enviadas são removidas da outbox. Se um lote falha, as tentativas das
+        suas linhas aumentam, as que chegam a OUTBOX_MAX_TENTATIVAS vão para
+        outbox_falhas e o grupo espera (backoff) enquanto os demais continuam.
+        Retorna: quantidade de linhas enviadas nesta chamada
+        """
+        with self._lock_envio:
+            with self._conectar() as conn:
+                grupos = conn.execute(
+                    "SELECT tabela, on_conflict FROM outbox GROUP BY tabela, on_conflict ORDER BY MIN(id)"
+                ).fetchall()
+            
+            enviadas = 0
+            for tabela, on_conflict in grupos:
+                falhas, proxima = self._espera_grupos.get((tabela, on_conflict), (0, 0))
+                if not ignorar_espera and time.time() < proxima:
+                    continue
+                enviadas += self._enviar_grupo(tabela, on_conflict, tamanho_lote)
+            
+            self.enviadas += enviadas
+            return enviadas
+
+    def _limite_dependencia(self, conn, tabela):
+        """
+        Menor id ainda não enviado (pendente ou em outbox_falhas) da tabela de que
+        esta depende: só as linhas enfileiradas antes dele podem ser enviadas.
+        Retorna: id limite, ou None se não há dependência bloqueando
+        """
+        dependencia = OUTBOX_DEPENDENCIAS.get(tabela)
+        if not dependencia:
+            return None
+        return conn.execute("""
+            SELECT MIN(id) FROM (
+                SELECT id FROM outbox WHERE tabela = ?
+                UNION ALL
+                SELECT id FROM outbox_falhas WHERE tabela = ?
+            )
+        """, (dependencia, dependencia)).fetchone()[0]
+
+    def _enviar_grupo(self, tabela, on_conflict, tamanho_lote):
+        """Envia as linhas pendentes de um grupo até o primeiro lote que falhar"""
+        with self._conectar() as conn:
+            limite = self._limite_dependencia(conn, tabela)
+            registros = conn.execute(
+                "SELECT id, payload FROM outbox WHERE tabela = ? AND on_conflict IS ? AND (? IS NULL OR id < ?) "
+                "ORDER BY id LIMIT ?",
+                (tabela, on_conflict, limite, limite, tamanho_lote * 4)
+            ).fetchall()
+        
+        enviadas = 0
+        for inicio in range(0, len(registros), tamanho_lote):
+            lote = registros[inicio:inicio + tamanho_lote]
+            ids = [id_registro for id_registro, _ in lote]
+            linhas = [json.loads(payload) for _, payload in lote]
+            
+            # Um upsert não pode tocar a mesma chave duas vezes: vale a última versão
+            if on_conflict:
+                linhas = list({linha[on_conflict]: linha for linha in linhas}.values())
+            
+            try:
+                enviar_lote(tabela, linhas, on_conflict)
+            except Exception as e:
+                self._registrar_falha(tabela, on_conflict, ids, e)
+                return enviadas
+            
+            with self._conectar() as conn:
+                conn.executemany("DELETE FROM outbox WHERE id = ?", [(id_registro,) for id_registro in ids])
+            enviadas += len(ids)
+        
+        self._espera_grupos.pop((tabela, on_conflict), None)
+        return enviadas
+
+    def _registrar_falha(self, tabela, on_conflict, ids, erro):
+        """Conta a tentativa, move para outbox_falhas quem esgotou e agenda o grupo com backoff"""
+        marcadores = ",".join("?" * len(ids))
+        with self._conectar() as conn:
+            conn.executemany(
+                "UPDATE outbox SET tentativas = tentativas + 1, ultimo_erro = ? WHERE id = ?",
+                [(str(erro)[:500], id_registro) for id_registro in ids]
+            )
+            conn.execute(f"""
+                INSERT INTO outbox_falhas (id, tabela, on_conflict, payload, criado_em, tentativas, ultimo_erro, movido_em)
+                SELECT id, tabela, on_conflict, payload, criado_em, tentativas, ultimo_erro, ?
+                FROM outbox WHERE id IN ({marcadores}) AND tentativas >= ?
+            """, (obter_horario_brasilia_iso(), *ids, OUTBOX_MAX_TENTATIVAS))
+            descartadas = conn.execute(
+                f"DELETE FROM outbox WHERE id IN ({marcadores}) AND tentativas >= ?", (*ids, OUTBOX_MAX_TENTATIVAS)
+            ).rowcount
+        
+        falhas = self._espera_grupos.get((tabela, on_conflict), (0, 0))[0] + 1
+        espera = min(self.intervalo * 2 ** falhas, OUTBOX_ESPERA_MAXIMA)
+        self._espera_grupos[(tabela, on_conflict)] = (falhas, time.time() + espera)
+        
+        print(f"⚠️ Outbox: lote de {len(ids)} linha(s) para '{tabela}' falhou: {str(erro)[:100]} "
+              f"(nova tentativa em {espera:.0f}s)")
+        if descartadas:
+            print(f"   ☠️ {descartadas} linha(s) de '{tabela}' esgotaram {OUTBOX_MAX_TENTATIVAS} tentativas "
+                  f"e foram para outbox_falhas")
+
+    def _executar(self):
+        """Loop do flusher em segundo plano"""
+        while not self._parar.is_set():
+            try:
+                enviadas = self.enviar_pendentes()
+            except Exception as e:
+                print(f"⚠️ Outbox: erro no flusher: {str(e)[:100]}")
+                enviadas = 0
+            
+            if not enviadas:
+                self._novos_dados.wait(self.intervalo)
+                self._novos_dados.clear()
+
+    def iniciar(self):
+        """Inicia o flusher (começa retomando o que ficou pendente de execuções anteriores)"""
+        pendentes = self.contar_pendentes()
+        if pendentes:
+            print(f"📤 Outbox: retomando {pendentes} linha(s) pendente(s) de execuções anteriores")
+        falhas = self.contar_falhas()
+        if falhas:
+            print(f"☠️ Outbox: {falhas} linha(s) em outbox_falhas (reenvie com --reprocessar-outbox)")
+        
+        self._thread = threading.Thread(target=self._executar, name="outbox-flusher", daemon=True)
+        self._thread.start()
+
+    def finalizar(self, timeout=OUTBOX_TIMEOUT_FINAL):
+        """
+        Aguarda o flush até o timeout e encerra o flusher.
+        
+        Para antes do timeout quando uma passada por todos os grupos (sem esperar o
+        backoff) não diminui as pendentes: o que sobrou só sai numa próxima execução.
+        Retorna: quantidade de linhas que continuam pendentes para a próxima execução
+        """
+        limite = time.time() + timeout
+        self._novos_dados.set()
+        
+        while time.time() < limite:
+            antes = self.contar_pendentes()
+            if not antes:
+                break
+            self.enviar_pendentes(ignorar_espera=True)
+            if self.contar_pendentes() >= antes:
+                break
+        
+        self._parar.set()
+        self._novos_dados.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+        
+        return self.contar_pendentes()
+
+def montar_linhas_historico(produtos_info, data_coleta_iso, run_id):
+    """Converte os resultados da execução em linhas da tabela Monitoramento Kabum"""
+    linhas = []
+    for produto in produtos_info:
+        if produto["tipo"] == "disponivel":
+            preco_atual = extrair_valor_numerico(produto["status"])
+        elif produto["tipo"] == "esgotado":
+            preco_atual = 0.00
+        else:
+            preco_atual = None
+        
+        linhas.append({
+            "product_key": produto["product_key"],
+            "nome": produto["nome"],
+            "url": produto["url"],
+            "preco_atual": preco_atual,
+            "status": produto["tipo"],
+            "data_coleta": data_coleta_iso,
+            "run_id": run_id
+        })
+    return linhas
+
+def buscar_estados_produtos(product_keys):
+    """
+    Busca o último estado conhecido (Estado Kabum) de vários produtos, em lotes.
+    
+    Propaga exceções, como buscar_menores_precos.
+    Retorna: dict {product_key: linha do estado}
+    """
+    product_keys = list(dict.fromkeys(product_keys))
+    estados = {}
+    
+    for inicio in range(0, len(product_keys), SUPABASE_LOTE_CONSULTA):
+        lote = product_keys[inicio:inicio + SUPABASE_LOTE_CONSULTA]
+        response = obter_supabase().table("Estado Kabum") \
+            .select("product_key, preco_atual, status, data_coleta") \
+            .in_("product_key", lote) \
+            .execute()
+        
+        for registro in response.data or []:
+            estados[registro['product_key']] = registro
+    
+    return estados
+
+def separar_mudancas(linhas, estados):
+    """
+    Compara cada observação com o último estado conhecido do produto.
+    
+    Retorna: (linhas_alteradas, linhas_estado) - as linhas de histórico cujo
+    preco_atual ou status mudou e o novo estado de todos os produtos (com
+    ultima_verificacao como heartbeat; data_coleta marca o início do estado)
+    """
+    alteradas = []
+    linhas_estado = []
+    
+    for linha in linhas:
+        anterior = estados.get(linha["product_key"])
+        mudou = (
+            anterior is None
+            or anterior.get("status") != linha["status"]
+            or anterior.get("preco_atual") != linha["preco_atual"]
+        )
+        if mudou:
+            alteradas.append(linha)
+        
+        linhas_estado.append({
+            **linha,
+            "data_coleta": linha["data_coleta"] if mudou else anterior.get("data_coleta"),
+            "ultima_verificacao": linha["data_coleta"]
+        })
+    
+    return alteradas, linhas_estado
+
+@cronometrar('gravacao_banco')
+def salvar_no_supabase(produtos_info, data_coleta_iso=None, run_id=None, outbox=None, delta=None):
+    """
+    Salva dados no Supabase - Tabela de Monitoramento (histórico).
+    
+    Todas as linhas da execução compartilham o mesmo data_coleta e run_id e
+    são enviadas em bulk inserts. Com uma outbox, as linhas são apenas
+    enfileiradas localmente e o flusher cuida do envio.
+    
+    No modo delta (HISTORICO_DELTA), só entram no histórico as observações
+    cujo preço ou status mudou; o estado atual de todos os produtos (com o
+    heartbeat em ultima_verificacao) vai em um único upsert em Estado Kabum.
+    Cada linha do histórico vale até a próxima linha do mesmo produto.
+    """
+    data_coleta_iso = data_coleta_iso or obter_horario_brasilia_iso()
+    run_id = run_id or gerar_run_id()
+    delta = HISTORICO_DELTA if delta is None else delta
+    
+    linhas = montar_linhas_historico(produtos_info, data_coleta_iso, run_id)
+    linhas_estado = []
+    
+    if delta:
+        try:
+            estados = buscar_estados_produtos(linha["product_key"] for linha in linhas)
+        except Exception as e:
+            # Sem o último estado, tudo conta como mudança (e o estado é regravado)
+            print(f"⚠️ Erro ao carregar o último estado ({str(e)[:100]}), gravando histórico completo")
+            estados = {}
+        
+        if outbox:
+            for pendente in outbox.linhas_pendentes("Estado Kabum"):
+                estados[pendente["product_key"]] = pendente
+        
+        total = len(linhas)
+        linhas, linhas_estado = separar_mudancas(linhas, estados)
+        print(f"📝 {len(linhas)} mudança(s) para o histórico | 💓 {total - len(linhas)} produto(s) sem mudança (heartbeat)")
+    
+    if outbox:
+        outbox.enfileirar("Monitoramento Kabum", linhas)
+        if linhas_estado:
+            outbox.enfileirar("Estado Kabum", linhas_estado, on_conflict="product_key")
+        print(f"📥 {len(linhas)} linha(s) gravadas na outbox local (Monitoramento Kabum) [run {run_id}]")
+        return True
+    
+    linhas_falhas = gravar_em_lotes("Monitoramento Kabum", linhas)
+    
+    if linhas_falhas:
+        chaves = ', '.join(linha["product_key"] for linha in linhas_falhas)
+        print(f"❌ Erro ao salvar no Supabase: {len(linhas_falhas)}/{len(linhas)} linha(s) não gravadas ({chaves})")
+        return False
+    
+    # O estado só avança depois que as mudanças estão no histórico
+    if linhas_estado:
+        estados_falhos = gravar_em_lotes("Estado Kabum", linhas_estado, on_conflict="product_key")
+        if estados_falhos:
+            chaves = ', '.join(linha["product_key"] for linha in estados_falhos)
+            print(f"❌ Erro ao atualizar Estado Kabum: {len(estados_falhos)} linha(s) não gravadas ({chaves})")
+            return False
+    
+    print(f"✅ {len(linhas)} linha(s) salvas no Supabase (Monitoramento Kabum) com sucesso! [run {run_id}]")
+    return True
+
+def calcular_novos_menores_precos(produtos_info, menores_existentes, data_coleta_iso):
+    """
+    Compara os preços da execução com os menores preços existentes, em memória.
+    
+    Retorna: (linhas_alteradas, mensagens) - linhas para upsert (uma por
+    product_key) e o diff por produto para exibição no console
+    """
+    menores = dict(menores_existentes)
+    alteradas = {}
+    mensagens = []
+    
+    for produto in produtos_info:
+        if produto["tipo"] == "disponivel":
+            preco_atual = extrair_valor_numerico(produto["status"])
+        else:
+            preco_atual = None
+        
+        if preco_atual is None or preco_atual == 0.00:
+            continue
+        
+        product_key = produto["product_key"]
+        
+        dados_produto = {
+            "product_key": product_key,
+            "nome": produto["nome"],
+            "url": produto["url"],
+            "preco_atual": preco_atual,
+            "status": "disponivel",
+            "data_coleta": data_coleta_iso
+        }
+        
+        if product_key not in menores:
+            mensagens.append(f"   ➕ {product_key}: Adicionado com preço {formatar_preco_brasileiro(preco_atual)}")
+        else:
+            preco_existente = menores[product_key]
+            
+            if preco_existente is None:
+                mensagens.append(f"   🔄 {product_key}: Atualizado (era None) → {formatar_preco_brasileiro(preco_atual)}")
+            elif preco_atual < preco_existente:
+                economia = preco_existente - preco_atual
+                economia_percent = (economia / preco_existente) * 100
+                mensagens.append(f"   📉 {product_key}: MENOR PREÇO! {formatar_preco_brasileiro(preco_existente)} → {formatar_preco_brasileiro(preco_atual)} (economiza {formatar_preco_brasileiro(economia)} | -{economia_percent:.1f}%)")
+            else:
+                mensagens.append(f"   ⏸️ {product_key}: Mantido {formatar_preco_brasileiro(preco_existente)} (atual: {formatar_preco_brasileiro(preco_atual)})")
+                continue
+        
+        menores[product_key] = preco_atual
+        alteradas[product_key] = dados_produto
+    
+    return list(alteradas.values()), mensagens
+
+@cronometrar('gravacao_banco')
+def atualizar_menores_precos(produtos_info, data_coleta_iso=None, outbox=None):
+    """
+    Atualiza a tabela Menores Preços Kabum apenas com os menores preços históricos.
+    
+    Busca os registros existentes uma única vez, calcula o diff em memória e
+    grava só as linhas alteradas em um upsert por product_key. Com uma outbox,
+    os upserts ainda pendentes localmente entram na comparação e as linhas
+    alteradas são enfileiradas em vez de enviadas.
+    """
+    try:
+        data_coleta_iso = data_coleta_iso or obter_horario_brasilia_iso()
+        
+        menores_existentes = buscar_menores_precos(p["product_key"] for p in produtos_info)
+        
+        if outbox:
+            for linha in outbox.linhas_pendentes("Menores Preços Kabum"):
+                existente = menores_existentes.get(linha["product_key"])
+                if existente is None or linha["preco_atual"] < existente:
+                    menores_existentes[linha["product_key"]] = linha["preco_atual"]
+        
+        linhas_alteradas, mensagens = calcular_novos_menores_precos(produtos_info, menores_existentes, data_coleta_iso)
+        
+        for mensagem in mensagens:
+            print(mensagem)
+        
+        if outbox:
+            outbox.enfileirar("Menores Preços Kabum", linhas_alteradas, on_conflict="product_key")
+            print(f"\n📥 {len(linhas_alteradas)} alteração(ões) de menor preço gravadas na outbox local")
+            return True
+        
+        linhas_falhas = gravar_em_lotes("Menores Preços Kabum", linhas_alteradas, on_conflict="product_key")
+        if linhas_falhas:
+            chaves = ', '.join(linha["product_key"] for linha in linhas_falhas)
+            print(f"❌ Erro ao atualizar 'Menores Preços Kabum': {len(linhas_falhas)} linha(s) não gravadas ({chaves})")
+            return False
+        
+        print(f"\n✅ Tabela 'Menores Preços Kabum' atualizada com sucesso! ({len(linhas_alteradas)} alteração(ões))")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Erro ao atualizar 'Menores Preços Kabum': {str(e)}")
+        return False
+
+# ========================================
+# RESUMO DIÁRIO (ROLLUP)
+# ========================================
+# Opcional (KABUM_RESUMO_DIARIO=1 ou KABUM_AGENDADOR=1). Tabela esperada no Supabase:
+#
+#   CREATE TABLE "Resumo Diário Kabum" (
+#       id                    bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+#       chave_dia             text NOT NULL UNIQUE,   -- "product_key|YYYY-MM-DD" (alvo do upsert)
+#       product_key           text NOT NULL,
+#       dia                   date NOT NULL,
+#       preco_minimo          numeric,
+#       preco_maximo          numeric,
+#       preco_abertura        numeric,
+#       preco_fechamento      numeric,
+#       amostras              integer NOT NULL DEFAULT 0,
+#       amostras_disponivel   integer NOT NULL DEFAULT 0,
+#       razao_disponibilidade numeric,
+#       ultima_coleta         timestamptz,
+#       ultimo_run_id         text
+#   );
+#   CREATE INDEX ON "Resumo Diário Kabum" (product_key, dia);
+
+def chave_resumo_diario(product_key, dia):
+    """Chave única da linha de resumo de um produto em um dia (YYYY-MM-DD)"""
+    return f"{product_key}|{dia}"
+
+def buscar_resumos_diarios(chaves):
+    """
+    Busca linhas de Resumo Diário Kabum por chave_dia, em lotes.
+    
+    Propaga exceções, como buscar_menores_precos.
+    Retorna: dict {chave_dia: linha}
+    """
+    chaves = list(dict.fromkeys(chaves))
+    resumos = {}
+    
+    for inicio in range(0, len(chaves), SUPABASE_LOTE_CONSULTA):
+        lote = chaves[inicio:inicio + SUPABASE_LOTE_CONSULTA]
+        response = obter_supabase().table("Resumo Diário Kabum") \
+            .select("*") \
+            .in_("chave_dia", lote) \
+            .execute()
+        
+        for registro in response.data or []:
+            resumos[registro['chave_dia']] = registro
+    
+    return resumos
+
+def acumular_resumo_diario(resumo, linha):
+    """
+    Soma uma observação (linha do histórico) ao resumo do dia do produto.
+    
+    Preços só contam quando o produto está disponível; observações com erro
+    não entram. Uma observação da mesma execução já contabilizada (ultimo_run_id)
+    é ignorada, o que torna o reenvio de uma execução idempotente.
+    Retorna: o resumo atualizado, ou None se nada mudou
+    """
+    if linha["status"] not in ("disponivel", "esgotado"):
+        return None
+    if resumo and linha["run_id"] and resumo.get("ultimo_run_id") == linha["run_id"]:
+        return None
+    
+    dia = linha["data_coleta"][:10]
+    novo = dict(resumo) if resumo else {
+        "chave_dia": chave_resumo_diario(linha["product_key"], dia),
+        "product_key": linha["product_key"],
+        "dia": dia,
+        "preco_minimo": None,
+        "preco_maximo": None,
+        "preco_abertura": None,
+        "preco_fechamento": None,
+        "amostras": 0,
+        "amostras_disponivel": 0,
+    }
+    
+    novo["amostras"] += 1
+    preco = linha["preco_atual"]
+    if linha["status"] == "disponivel" and preco:
+        novo["amostras_disponivel"] += 1
+        novo["preco_minimo"] = preco if novo["preco_minimo"] is None else min(novo["preco_minimo"], preco)
+        novo["preco_maximo"] = preco if novo["preco_maximo"] is None else max(novo["preco_maximo"], preco)
+        if novo["preco_abertura"] is None:
+            novo["preco_abertura"] = preco
+        novo["preco_fechamento"] = preco
+    
+    novo["razao_disponibilidade"] = round(novo["amostras_disponivel"] / novo["amostras"], 4)
+    novo["ultima_coleta"] = linha["data_coleta"]
+    novo["ultimo_run_id"] = linha["run_id"]
+    return novo
+
+@cronometrar('gravacao_banco')
+def atualizar_resumos_diarios(produtos_info, data_coleta_iso=None, run_id=None, outbox=None):
+    """
+    Atualiza incrementalmente Resumo Diário Kabum com a execução atual.
+    
+    Uma linha por (product_key, dia) com mínimo, máximo, abertura, fechamento,
+    número de amostras e razão de disponibilidade. Lê só as linhas do dia dos
+    produtos da execução, acumula em memória e grava em um upsert por
+    chave_dia (ou enfileira na outbox, contando com os resumos pendentes).
+    """
+    try:
+        data_coleta_iso = data_coleta_iso or obter_horario_brasilia_iso()
+        linhas = montar_linhas_historico(produtos_info, data_coleta_iso, run_id or gerar_run_id())
+        dia = data_coleta_iso[:10]
+        
+        resumos = buscar_resumos_diarios(chave_resumo_diario(linha["product_key"], dia) for linha in linhas)
+        if outbox:
+            for pendente in outbox.linhas_pendentes("Resumo Diário Kabum"):
+                resumos[pendente["chave_dia"]] = pendente
+        
+        alterados = {}
+        for linha in linhas:
+            chave = chave_resumo_diario(linha["product_key"], dia)
+            novo = acumular_resumo_diario(alterados.get(chave) or resumos.get(chave), linha)
+            if novo:
+                alterados[chave] = novo
+        
+        linhas_resumo = list(alterados.values())
+        
+        if outbox:
+            outbox.enfileirar("Resumo Diário Kabum", linhas_resumo, on_conflict="chave_dia")
+            print(f"📥 {len(linhas_resumo)} resumo(s) diário(s) gravados na outbox local")
+            return True
+        
+        linhas_falhas = gravar_em_lotes("Resumo Diário Kabum", linhas_resumo, on_conflict="chave_dia")
+        if linhas_falhas:
+            chaves = ', '.join(linha["product_key"] for linha in linhas_falhas)
+            print(f"❌ Erro ao atualizar 'Resumo Diário Kabum': {len(linhas_falhas)} linha(s) não gravadas ({chaves})")
+            return False
+        
+        print(f"✅ {len(linhas_resumo)} resumo(s) diário(s) atualizados (Resumo Diário Kabum)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Erro ao atualizar 'Resumo Diário Kabum': {str(e)}")
+        return False
+
+def consultar_resumos_diarios(product_key, inicio_dia=None, fim_dia=None):
+    """
+    Lê o resumo diário de um produto (para gráficos e tendências), em ordem de dia.
+    
+    inicio_dia / fim_dia: 'YYYY-MM-DD' (inclusivos, opcionais)
+    """
+    query = obter_supabase().table("Resumo Diário Kabum") \
+        .select("*") \
+        .eq("product_key", product_key)
+    if inicio_dia:
+        query = query.gte("dia", inicio_dia)
+    if fim_dia:
+        query = query.lte("dia", fim_dia)
+    
+    return query.order("dia").execute().data or []
+
+# ========================================
+# AGENDAMENTO POR VOLATILIDADE
+# ========================================
+
+def buscar_resumos_recentes(product_keys, dias=AGENDADOR_JANELA_DIAS):
+    """
+    Busca o Resumo Diário Kabum dos últimos dias de vários produtos, em lotes.
+    
+    Retorna: dict {product_key: [linhas em ordem de dia]}
+    """
+    product_keys = list(dict.fromkeys(product_keys))
+    inicio = (datetime.now(ZoneInfo("America/Sao_Paulo")) - timedelta(days=dias)).strftime("%Y-%m-%d")
+    resumos = {}
+    
+    for posicao in range(0, len(product_keys), SUPABASE_LOTE_CONSULTA):
+        lote = product_keys[posicao:posicao + SUPABASE_LOTE_CONSULTA]
+        response = obter_supabase().table("Resumo Diário Kabum") \
+            .select("product_key, dia, preco_minimo, preco_maximo, preco_fechamento, razao_disponibilidade, ultima_coleta") \
+            .in_("product_key", lote) \
+            .gte("dia", inicio) \
+            .order("dia") \
+            .execute()
+        
+        for registro in response.data or []:
+            resumos.setdefault(registro['product_key'], []).append(registro)
+    
+    return resumos
+
+def calcular_volatilidade(resumos):
+    """
+    Métricas de volatilidade a partir dos resumos diários de um produto.
+    
+    Um dia "com mudança" teve preço mínimo diferente do máximo ou fechou com
+    preço diferente do dia anterior; uma troca de disponibilidade é um dia com
+    razão diferente de 0 e 1 ou um dia que mudou entre disponível e esgotado.
+    """
+    dias_com_mudanca = 0
+    trocas_disponibilidade = 0
+    fechamento_anterior = None
+    disponivel_anterior = None
+    
+    for resumo in resumos:
+        razao = resumo.get('razao_disponibilidade') or 0
+        disponivel = razao >= 0.5
+        if 0 < razao < 1 or (disponivel_anterior is not None and disponivel != disponivel_anterior):
+            trocas_disponibilidade += 1
+        disponivel_anterior = disponivel
+        
+        fechamento = resumo.get('preco_fechamento')
+        if resumo.get('preco_minimo') != resumo.get('preco_maximo') or \
+                (fechamento is not None and fechamento_anterior is not None and fechamento != fechamento_anterior):
+            dias_com_mudanca += 1
+        if fechamento is not None:
+            fechamento_anterior = fechamento
+    
+    return {
+        'dias': len(resumos),
+        'dias_com_mudanca': dias_com_mudanca,
+        'trocas_disponibilidade': trocas_disponibilidade,
+        'ultimo_preco': fechamento_anterior,
+        'esgotado': disponivel_anterior is False,
+        'ultima_coleta': resumos[-1].get('ultima_coleta') if resumos else None,
+    }
+
+def classificar_frequencia(produto, metricas):
+    """
+    Define a faixa de frequência de verificação de um produto.
+    
+    Produto esgotado no último dia fica no mínimo na faixa média: o preço parado
+    não diz nada sobre quando ele volta ao estoque.
+    Retorna: (faixa, motivo) com faixa em 'alta', 'media' ou 'baixa'
+    """
+    if not metricas['dias']:
+        return 'alta', "sem histórico recente"
+    
+    preco = metricas['ultimo_preco']
+    estimado = produto.get('preco_estimado')
+    distancia = (preco - estimado) / estimado if preco and estimado else None
+    fracao_mudancas = metricas['dias_com_mudanca'] / metricas['dias']
+    
+    if distancia is not None and distancia <= AGENDADOR_PROXIMIDADE:
+        return 'alta', f"preço a {distancia * 100:+.0f}% do estimado"
+    if fracao_mudancas >= AGENDADOR_MUDANCAS_ALTA:
+        return 'alta', f"preço mudou em {metricas['dias_com_mudanca']}/{metricas['dias']} dia(s)"
+    if metricas['trocas_disponibilidade']:
+        return 'media', f"{metricas['trocas_disponibilidade']} troca(s) de disponibilidade"
+    if metricas.get('esgotado'):
+        return 'media', "esgotado (aguardando reposição)"
+    if metricas['dias_com_mudanca'] == 0 and (distancia is None or distancia > AGENDADOR_DISTANCIA):
+        return 'baixa', f"estável há {metricas['dias']} dia(s)"
+    return 'media', f"preço mudou em {metricas['dias_com_mudanca']}/{metricas['dias']} dia(s)"
+
+def horas_desde(data_iso, agora):
+    """Horas entre um data_coleta (horário de Brasília) e agora; None se não interpretável"""
+    try:
+        data = datetime.fromisoformat(str(data_iso).replace('T', ' ')[:19])
+    except ValueError:
+        return None
+    return (agora - data).total_seconds() / 3600
+
+@cronometrar('agendamento')
+def agendar_produtos(produtos, resumos=None, agora=None):
+    """
+    Escolhe os produtos devidos nesta execução de acordo com a faixa de frequência.
+    
+    Retorna: (devidos, relatorio) - relatorio tem 'faixas' {faixa: quantidade},
+    'produtos' [(product_key, faixa, motivo, devido)] e a projeção de buscas
+    por dia comparada à agenda fixa (todos os produtos em toda execução)
+    """
+    if resumos is None:
+        resumos = buscar_resumos_recentes(produto['product_key'] for produto in produtos)
+    agora = agora or datetime.now(ZoneInfo("America/Sao_Paulo")).replace(tzinfo=None)
+    
+    devidos = []
+    detalhes = []
+    faixas = Counter()
+    buscas_dia = 0.0
+    
+    for produto in produtos:
+        metricas = calcular_volatilidade(resumos.get(produto['product_key'], []))
+        faixa, motivo = classificar_frequencia(produto, metricas)
+        intervalo = AGENDADOR_INTERVALO_HORAS[faixa]
+        
+        decorrido = horas_desde(metricas['ultima_coleta'], agora) if metricas['ultima_coleta'] else None
+        devido = intervalo == 0 or decorrido is None or decorrido >= intervalo - AGENDADOR_FOLGA_HORAS
+        
+        if devido:
+            devidos.append(produto)
+        faixas[faixa] += 1
+        detalhes.append((produto['product_key'], faixa, motivo, devido))
+        buscas_dia += EXECUCOES_POR_DIA if intervalo == 0 else min(EXECUCOES_POR_DIA, 24 / intervalo)
+    
+    buscas_fixas = len(produtos) * EXECUCOES_POR_DIA
+    return devidos, {
+        'faixas': dict(faixas),
+        'produtos': detalhes,
+        'devidos': len(devidos),
+        'total': len(produtos),
+        'buscas_dia_fixo': buscas_fixas,
+        'buscas_dia_agendado': buscas_dia,
+    }
 
-def inicializar_driver():
-    """Inicializa o Chrome em modo headless"""
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--log-level=3')
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+def imprimir_agendamento(relatorio, detalhado=False):
+    """Imprime as faixas de frequência e a economia de buscas"""
+    faixas = relatorio['faixas']
+    economia_execucao = relatorio['total'] - relatorio['devidos']
+    economia_dia = relatorio['buscas_dia_fixo'] - relatorio['buscas_dia_agendado']
+    percentual = economia_dia / relatorio['buscas_dia_fixo'] * 100 if relatorio['buscas_dia_fixo'] else 0
+    
+    print("🗓️ Agendamento por volatilidade:")
+    print(f"   🔥 Alta: {faixas.get('alta', 0)} | 🌤️ Média: {faixas.get('media', 0)} | 🧊 Baixa: {faixas.get('baixa', 0)}")
+    print(f"   ✅ {relatorio['devidos']}/{relatorio['total']} produto(s) devidos nesta execução "
+          f"(⏭️ {economia_execucao} busca(s) evitadas)")
+    print(f"   📉 Projeção: {relatorio['buscas_dia_agendado']:.1f} busca(s)/dia contra "
+          f"{relatorio['buscas_dia_fixo']:.1f} na agenda fixa ({percentual:.0f}% a menos)")
     
-    return webdriver.Chrome(options=chrome_options)
+    if detalhado:
+        for product_key, faixa, motivo, devido in relatorio['produtos']:
+            print(f"   {'▶️' if devido else '⏸️'} {product_key:<20} {faixa:<6} {motivo}")
+    print()
 
 # ========================================
-# FUNÇÕES DE PERSISTÊNCIA
+# ANÁLISE DE PREÇOS
 # ========================================
 
-def salvar_no_supabase(produtos_info):
-    """Salva dados no Supabase - Tabela de Monitoramento (histórico completo)"""
-    try:
-        for produto in produtos_info:
-            if produto["tipo"] == "disponivel":
-                preco_atual = extrair_valor_numerico(produto["status"])
-            elif produto["tipo"] == "esgotado":
-                preco_atual = 0.00
-            else:
-                preco_atual = None
-            
-            data_coleta_iso = obter_horario_brasilia_iso()
-            
-            data = {
-                "product_key": produto["product_key"],
-                "nome": produto["nome"],
-                "url": produto["url"],
-                "preco_atual": preco_atual,
-                "status": produto["tipo"],
-                "data_coleta": data_coleta_iso
-            }
-            
-            supabase.table("Monitoramento Kabum").insert(data).execute()
-        
-        print("✅ Dados salvos no Supabase (Monitoramento Kabum) com sucesso!")
-        return True
-    except Exception as e:
-        print(f"❌ Erro ao salvar no Supabase: {str(e)}")
-        return False
-
-def atualizar_menores_precos(produtos_info):
+@cronometrar('analise_precos')
+def analisar_precos_catalogo(produtos_info, run_id=None, agora=None):
     """
-    Atualiza a tabela Menores Preços Kabum apenas com os menores preços históricos.
+    Estatísticas do histórico (Analise_Precos) de todos os produtos de uma vez.
+    
+    O histórico dos últimos ANALISE_JANELA_DIAS (todos os status, mais a linha
+    em vigor no início da janela) é lido em páginas e vira arrays NumPy, com
+    cada preço pesando o tempo em que esteve em vigor, o que dá a mesma resposta
+    com o histórico completo ou só com mudanças (HISTORICO_DELTA). O preço desta
+    execução entra como a amostra mais recente (as linhas do próprio run_id, se
+    já gravadas, são ignoradas).
+    Retorna: dict {product_key: métricas}; vazio se desligada ou se falhar
     """
+    if not ANALISE_PRECOS_ATIVA or not produtos_info:
+        return {}
+    
     try:
-        for produto in produtos_info:
-            if produto["tipo"] == "disponivel":
-                preco_atual = extrair_valor_numerico(produto["status"])
-            else:
-                preco_atual = None
-            
-            if preco_atual is None or preco_atual == 0.00:
-                continue
-            
-            product_key = produto["product_key"]
-            
-            response = supabase.table("Menores Preços Kabum") \
-                .select("*") \
-                .eq("product_key", product_key) \
-                .execute()
-            
-            data_coleta_iso = obter_horario_brasilia_iso()
-            
-            dados_produto = {
-                "product_key": product_key,
-                "nome": produto["nome"],
-                "url": produto["url"],
-                "preco_atual": preco_atual,
-                "status": "disponivel",
-                "data_coleta": data_coleta_iso
-            }
-            
-            if len(response.data) == 0:
-                supabase.table("Menores Preços Kabum").insert(dados_produto).execute()
-                print(f"   ➕ {product_key}: Adicionado com preço {formatar_preco_brasileiro(preco_atual)}")
-                
-            else:
-                registro_existente = response.data[0]
-                preco_existente = registro_existente.get("preco_atual")
-                
-                if preco_existente is None or preco_atual < preco_existente:
-                    supabase.table("Menores Preços Kabum") \
-                        .update(dados_produto) \
-                        .eq("product_key", product_key) \
-                        .execute()
-                    
-                    if preco_existente is None:
-                        print(f"   🔄 {product_key}: Atualizado (era None) → {formatar_preco_brasileiro(preco_atual)}")
-                    else:
-                        economia = preco_existente - preco_atual
-                        economia_percent = (economia / preco_existente) * 100
-                        print(f"   📉 {product_key}: MENOR PREÇO! {formatar_preco_brasileiro(preco_existente)} → {formatar_preco_brasileiro(preco_atual)} (economiza {formatar_preco_brasileiro(economia)} | -{economia_percent:.1f}%)")
-                else:
-                    print(f"   ⏸️ {product_key}: Mantido {formatar_preco_brasileiro(preco_existente)} (atual: {formatar_preco_brasileiro(preco_atual)})")
-        
-        print("\n✅ Tabela 'Menores Preços Kabum' atualizada com sucesso!")
-        return True
-        
+        from Analise_Precos import carregar_arrays, analisar_precos, para_dicionarios
+    except ImportError:
+        print("⚠️ NumPy não instalado: análise de preços ignorada")
+        return {}
+    
+    agora = agora or datetime.now(ZoneInfo("America/Sao_Paulo")).replace(tzinfo=None)
+    agora_epoca = int((agora - datetime(1970, 1, 1)).total_seconds())  # mesma base das datas do banco
+    inicio_janela = agora - timedelta(days=ANALISE_JANELA_DIAS)
+    inicio_epoca = int((inicio_janela - datetime(1970, 1, 1)).total_seconds())
+    inicio = inicio_janela.strftime("%Y-%m-%dT%H:%M:%S")
+    
+    chaves = [produto['product_key'] for produto in produtos_info]
+    precos_atuais = [
+        extrair_valor_numerico(produto['status']) if produto['tipo'] == 'disponivel' else None
+        for produto in produtos_info
+    ]
+    
+    try:
+        lotes = [chaves[i:i + SUPABASE_LOTE_CONSULTA] for i in range(0, len(chaves), SUPABASE_LOTE_CONSULTA)]
+        with ThreadPoolExecutor(max_workers=max(1, HTTP_WORKERS)) as executor:
+            em_vigor = [linha for linha in executor.map(lambda chave: buscar_linha_em_vigor(chave, inicio), chaves) if linha]
+        linhas = (
+            linha
+            for linha in chain(em_vigor, (linha for lote in lotes
+                                          for linha in iterar_historico(lote, inicio, converter_datas=False)))
+            if run_id is None or linha.get('run_id') != run_id
+        )
+        arrays = carregar_arrays(linhas, chaves, precos_atuais, agora_epoca, inicio_epoca)
+        return para_dicionarios(chaves, analisar_precos(arrays, len(chaves), agora_epoca))
     except Exception as e:
-        print(f"❌ Erro ao atualizar 'Menores Preços Kabum': {str(e)}")
-        return False
+        print(f"⚠️ Erro na análise de preços (relatórios seguem sem ela): {str(e)}")
+        return {}
+
+def anexar_analise(produtos_info, metricas):
+    """Guarda as métricas de cada produto em produto['analise'] e imprime o resumo"""
+    for produto in produtos_info:
+        produto['analise'] = metricas.get(produto['product_key'])
+    
+    if not metricas:
+        return
+    disponiveis = [p['analise'] for p in produtos_info if p['tipo'] == 'disponivel' and p['analise']]
+    no_minimo = sum(1 for a in disponiveis if a['minimo_30d'] is not None and a['atual'] <= a['minimo_30d'])
+    anomalias = sum(1 for a in disponiveis if a['anomalia'])
+    print(f"📊 Análise de preços: {len(metricas)} produto(s) com histórico, "
+          f"{no_minimo} no menor preço de 30 dias, {anomalias} fora do padrão")
+
+def imprimir_analise_precos(produtos_info):
+    """Tabela das métricas do histórico por produto"""
+    print(f"\n{'Produto':<22} {'Amostras':>8} {'Atual':>12} {'Mín. hist.':>12} {'Mín. 30d':>12} "
+          f"{'Mediana':>12} {'Percentil':>9} {'Drawdown':>9} {'Z':>6}")
+    print("-"*110)
+    for produto in produtos_info:
+        analise = produto.get('analise')
+        if not analise:
+            print(f"{produto['product_key']:<22} {'sem histórico':>8}")
+            continue
+        minimo_30d = formatar_preco_brasileiro(analise['minimo_30d']) if analise['minimo_30d'] else '—'
+        print(f"{produto['product_key']:<22} {analise['amostras']:>8} "
+              f"{formatar_preco_brasileiro(analise['atual']):>12} "
+              f"{formatar_preco_brasileiro(analise['minimo_historico']):>12} {minimo_30d:>12} "
+              f"{formatar_preco_brasileiro(analise['p50']):>12} {analise['percentil_atual']:>8.0f}% "
+              f"{analise['drawdown'] * 100:>8.1f}% {analise['zscore']:>+6.1f}{' ⚠️' if analise['anomalia'] else ''}")
+    print()
 
 # ========================================
 # FUNÇÕES DE EMAIL
 # ========================================
 
-def criar_html_email(produtos_info, disponiveis, esgotados, erros, agora):
-    """Cria HTML do email com relatório completo"""
-    
-    html = f"""
+# Modelo do email compilado uma vez no carregamento do módulo: o cabeçalho
+# (com o CSS) é um string.Template e a linha da tabela é analisada uma vez
+# (compilar_template) e renderizada uma vez por produto
+TEMPLATE_EMAIL_INICIO = Template("""
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <style>
-            body {{
+            body {
                 font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 margin: 0;
                 padding: 20px;
-            }}
-            .container {{
+            }
+            .container {
                 max-width: 1400px;
                 margin: 0 auto;
                 background-color: #ffffff;
                 border-radius: 15px;
                 box-shadow: 0 10px 40px rgba(0,0,0,0.2);
                 overflow: hidden;
-            }}
-            .header {{
+            }
+            .header {
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 color: white;
                 padding: 30px;
                 text-align: center;
-            }}
-            .header h1 {{
+            }
+            .header h1 {
                 margin: 0;
                 font-size: 28px;
                 font-weight: 600;
-            }}
-            .header p {{
+            }
+            .header p {
                 margin: 10px 0 0 0;
                 font-size: 14px;
                 opacity: 0.9;
-            }}
-            .summary {{
+            }
+            .summary {
                 padding: 30px;
                 background-color: #f8f9fa;
                 border-bottom: 3px solid #e9ecef;
-            }}
-            .summary-table {{
+            }
+            .summary-table {
                 width: 100%;
                 border-collapse: separate;
                 border-spacing: 20px;
-            }}
-            .summary-table td {{
+            }
+            .summary-table td {
                 width: 33.33%;
                 vertical-align: top;
-            }}
-            .summary-item {{
+            }
+            .summary-item {
                 text-align: center;
                 padding: 25px;
                 border-radius: 12px;
                 box-shadow: 0 2px 8px rgba(0,0,0,0.08);
                 transition: transform 0.2s ease;
-            }}
-            .summary-item:hover {{
+            }
+            .summary-item:hover {
                 transform: translateY(-2px);
                 box-shadow: 0 4px 12px rgba(0,0,0,0.12);
-            }}
-            .summary-item.disponivel-card {{
+            }
+            .summary-item.disponivel-card {
                 background: linear-gradient(135deg, #d4edda 0%, #c3e6cb 100%);
                 border: 2px solid #28a745;
-            }}
-            .summary-item.esgotado-card {{
+            }
+            .summary-item.esgotado-card {
                 background: linear-gradient(135deg, #f8d7da 0%, #f5c6cb 100%);
                 border: 2px solid #dc3545;
-            }}
-            .summary-item.erro-card {{
+            }
+            .summary-item.erro-card {
                 background: linear-gradient(135deg, #fff3cd 0%, #ffe8a1 100%);
                 border: 2px solid #ffc107;
-            }}
-            .summary-item .icon {{
+            }
+            .summary-item .icon {
                 font-size: 32px;
                 margin-bottom: 10px;
-            }}
-            .summary-item .number {{
+            }
+            .summary-item .number {
                 font-size: 48px;
                 font-weight: bold;
                 margin-bottom: 8px;
                 line-height: 1;
-            }}
-            .disponivel {{ color: #28a745; }}
-            .esgotado {{ color: #dc3545; }}
-            .erro {{ color: #ffc107; }}
-            .summary-item .label {{
+            }
+            .disponivel { color: #28a745; }
+            .esgotado { color: #dc3545; }
+            .erro { color: #ffc107; }
+            .summary-item .label {
                 font-size: 14px;
                 font-weight: 600;
                 text-transform: uppercase;
                 letter-spacing: 1.2px;
-            }}
-            .table-container {{
+            }
+            .table-container {
                 padding: 30px;
                 overflow-x: auto;
-            }}
-            table {{
+            }
+            table {
                 width: 100%;
                 border-collapse: collapse;
                 box-shadow: 0 2px 15px rgba(0,0,0,0.1);
-            }}
-            thead {{
+            }
+            thead {
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 color: white;
-            }}
-            th {{
+            }
+            th {
                 padding: 15px 10px;
                 text-align: center;
                 font-weight: 600;
@@ -555,30 +1810,30 @@ def criar_html_email(produtos_info, disponiveis, esgotados, erros, agora):
                 text-transform: uppercase;
                 letter-spacing: 0.5px;
                 white-space: nowrap;
-            }}
-            th:nth-child(2) {{
+            }
+            th:nth-child(2) {
                 text-align: left;
-            }}
-            tbody tr {{
+            }
+            tbody tr {
                 border-bottom: 1px solid #e9ecef;
                 transition: background-color 0.3s ease;
-            }}
-            tbody tr:hover {{ background-color: #f8f9fa; }}
-            tbody tr:last-child {{ border-bottom: none; }}
-            td {{
+            }
+            tbody tr:hover { background-color: #f8f9fa; }
+            tbody tr:last-child { border-bottom: none; }
+            td {
                 padding: 15px 10px;
                 font-size: 14px;
                 text-align: center;
-            }}
-            td:nth-child(2) {{
+            }
+            td:nth-child(2) {
                 text-align: left;
-            }}
-            .produto-nome {{
+            }
+            .produto-nome {
                 font-weight: 500;
                 color: #2c3e50;
                 max-width: 350px;
-            }}
-            .status {{
+            }
+            .status {
                 display: inline-block;
                 padding: 6px 12px;
                 border-radius: 20px;
@@ -586,58 +1841,58 @@ def criar_html_email(produtos_info, disponiveis, esgotados, erros, agora):
                 font-weight: 600;
                 text-align: center;
                 white-space: nowrap;
-            }}
-            .status.disponivel {{
+            }
+            .status.disponivel {
                 background-color: #d4edda;
                 color: #155724;
-            }}
-            .status.esgotado {{
+            }
+            .status.esgotado {
                 background-color: #f8d7da;
                 color: #721c24;
-            }}
-            .status.erro {{
+            }
+            .status.erro {
                 background-color: #fff3cd;
                 color: #856404;
-            }}
-            .preco {{
+            }
+            .preco {
                 font-size: 18px;
                 font-weight: bold;
                 color: #28a745;
                 white-space: nowrap;
-            }}
-            .preco-menor {{
+            }
+            .preco-menor {
                 font-size: 16px;
                 font-weight: bold;
                 color: #007bff;
                 white-space: nowrap;
-            }}
-            .preco-estimado {{
+            }
+            .preco-estimado {
                 font-size: 14px;
                 font-weight: 500;
                 color: #6c757d;
                 white-space: nowrap;
-            }}
-            .diferenca {{
+            }
+            .diferenca {
                 display: inline-block;
                 padding: 6px 12px;
                 border-radius: 20px;
                 font-size: 12px;
                 font-weight: 600;
                 white-space: nowrap;
-            }}
-            .diferenca.positiva {{
+            }
+            .diferenca.positiva {
                 background-color: #d4edda;
                 color: #155724;
-            }}
-            .diferenca.negativa {{
+            }
+            .diferenca.negativa {
                 background-color: #f8d7da;
                 color: #721c24;
-            }}
-            .diferenca.neutro {{
+            }
+            .diferenca.neutro {
                 background-color: #e2e3e5;
                 color: #383d41;
-            }}
-            .link {{
+            }
+            .link {
                 display: inline-block;
                 padding: 6px 12px;
                 border-radius: 20px;
@@ -649,20 +1904,20 @@ def criar_html_email(produtos_info, disponiveis, esgotados, erros, agora):
                 font-weight: 600;
                 transition: all 0.3s ease;
                 white-space: nowrap;
-            }}
-            .link:hover {{
+            }
+            .link:hover {
                 background-color: #667eea;
                 color: white;
-            }}
-            .footer {{
+            }
+            .footer {
                 background-color: #f8f9fa;
                 padding: 20px;
                 text-align: center;
                 color: #6c757d;
                 font-size: 12px;
                 border-top: 3px solid #e9ecef;
-            }}
-            .index {{
+            }
+            .index {
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 color: white;
                 width: 42px;
@@ -674,18 +1929,18 @@ def criar_html_email(produtos_info, disponiveis, esgotados, erros, agora):
                 font-weight: bold;
                 font-size: 16px;
                 box-shadow: 0 2px 8px rgba(102, 126, 234, 0.4);
-            }}
-            .index-cell {{
+            }
+            .index-cell {
                 text-align: center;
                 vertical-align: middle;
-            }}
+            }
         </style>
     </head>
     <body>
         <div class="container">
             <div class="header">
                 <h1>🔍 Relatório de Verificação - KaBuM!</h1>
-                <p>📅 Verificação realizada em {agora}</p>
+                <p>📅 Verificação realizada em ${agora}</p>
             </div>
             
             <div class="summary">
@@ -694,21 +1949,21 @@ def criar_html_email(produtos_info, disponiveis, esgotados, erros, agora):
                         <td>
                             <div class="summary-item disponivel-card">
                                 <div class="icon">✅</div>
-                                <div class="number disponivel">{disponiveis}</div>
+                                <div class="number disponivel">${disponiveis}</div>
                                 <div class="label">Disponíveis</div>
                             </div>
                         </td>
                         <td>
                             <div class="summary-item esgotado-card">
                                 <div class="icon">❌</div>
-                                <div class="number esgotado">{esgotados}</div>
+                                <div class="number esgotado">${esgotados}</div>
                                 <div class="label">Esgotados</div>
                             </div>
                         </td>
                         <td>
                             <div class="summary-item erro-card">
                                 <div class="icon">⚠</div>
-                                <div class="number erro">{erros}</div>
+                                <div class="number erro">${erros}</div>
                                 <div class="label">Erros</div>
                             </div>
                         </td>
@@ -731,55 +1986,9 @@ def criar_html_email(produtos_info, disponiveis, esgotados, erros, agora):
                         </tr>
                     </thead>
                     <tbody>
-    """
-    
-    for i, produto in enumerate(produtos_info, 1):
-        nome = produto['nome']
-        tipo = produto['tipo']
-        status = produto['status']
-        url = produto['url']
-        preco_estimado = produto.get('preco_estimado', 0)
-        menor_preco = produto.get('menor_preco', None)
-        
-        preco_estimado_display = formatar_preco_brasileiro(preco_estimado)
-        
-        # Formata menor preço
-        if menor_preco is not None and menor_preco > 0:
-            menor_preco_display = f'<span class="preco-menor">{formatar_preco_brasileiro(menor_preco)}</span>'
-        else:
-            menor_preco_display = '<span style="color: #6c757d;">—</span>'
-        
-        status_class = tipo
-        if tipo == "disponivel":
-            status_display = "✓ Disponível"
-            preco_display = f'<span class="preco">{status}</span>'
-            
-            preco_atual_num = extrair_valor_numerico(status)
-            diferenca = calcular_diferenca_preco(preco_atual_num, preco_estimado)
-            
-            if diferenca is not None:
-                if diferenca > 0:
-                    diferenca_class = "negativa"
-                    diferenca_display = f'<span class="diferenca {diferenca_class}">📈 +{diferenca:.1f}%</span>'
-                elif diferenca < 0:
-                    diferenca_class = "positiva"
-                    diferenca_display = f'<span class="diferenca {diferenca_class}">📉 {diferenca:.1f}%</span>'
-                else:
-                    diferenca_class = "neutro"
-                    diferenca_display = f'<span class="diferenca {diferenca_class}">0%</span>'
-            else:
-                diferenca_display = '<span style="color: #6c757d;">—</span>'
-                
-        elif tipo == "esgotado":
-            status_display = "✗ Esgotado"
-            preco_display = '<span style="color: #dc3545;">—</span>'
-            diferenca_display = '<span style="color: #6c757d;">—</span>'
-        else:
-            status_display = "⚠ Erro"
-            preco_display = '<span style="color: #ffc107;">—</span>'
-            diferenca_display = '<span style="color: #6c757d;">—</span>'
-        
-        html += f"""
+    """)
+
+TEMPLATE_EMAIL_LINHA = """
                         <tr>
                             <td class="index-cell"><span class="index">{i}</span></td>
                             <td class="produto-nome">{nome}</td>
@@ -791,8 +2000,8 @@ def criar_html_email(produtos_info, disponiveis, esgotados, erros, agora):
                             <td><a href="{url}" class="link" target="_blank">🛒 Ver</a></td>
                         </tr>
         """
-    
-    html += """
+
+TEMPLATE_EMAIL_FIM = """
                     </tbody>
                 </table>
             </div>
@@ -805,8 +2014,174 @@ def criar_html_email(produtos_info, disponiveis, esgotados, erros, agora):
     </body>
     </html>
     """
+
+def compilar_template(texto):
+    """
+    Compila um modelo no formato do str.format ({campo}) em uma função Python.
+    
+    O modelo é analisado uma única vez (Formatter.parse) em pedaços de texto
+    fixo e campos; cada chamada só resolve os campos e junta os pedaços, sem
+    interpretar o modelo de novo. Aceita o mesmo que o str.format
+    ({p.nome}, {x[0]}, {valor!r:>10}).
+    Retorna: função que recebe os campos do modelo como argumentos nomeados
+    """
+    formatador = Formatter()
+    pedacos = []
+    for literal, campo, especificacao, conversao in formatador.parse(texto):
+        if literal:
+            pedacos.append((literal, None, None, None))
+        if campo is not None:
+            pedacos.append((None, campo, especificacao or '', conversao))
+    pedacos = tuple(pedacos)
+    
+    def renderizar(**campos):
+        partes = []
+        for literal, campo, especificacao, conversao in pedacos:
+            if campo is None:
+                partes.append(literal)
+                continue
+            valor = formatador.get_field(campo, (), campos)[0]
+            valor = formatador.convert_field(valor, conversao)
+            partes.append(format(valor, especificacao))
+        return ''.join(partes)
+    
+    return renderizar
+
+renderizar_template_linha_email = compilar_template(TEMPLATE_EMAIL_LINHA)
+
+SEM_VALOR_EMAIL = '<span style="color: #6c757d;">—</span>'
+
+# Por tipo: (texto do status, célula de preço quando não há preço); qualquer outro tipo é erro
+CELULAS_STATUS_EMAIL = {
+    "disponivel": ("✓ Disponível", None),
+    "esgotado": ("✗ Esgotado", '<span style="color: #dc3545;">—</span>'),
+}
+CELULAS_STATUS_ERRO_EMAIL = ("⚠ Erro", '<span style="color: #ffc107;">—</span>')
+
+def selos_analise_email(analise):
+    """Selos do histórico (Analise_Precos) ao lado do nome de um produto disponível"""
+    if not analise:
+        return ''
+    selos = []
+    if analise['amostras'] > 1 and analise['drawdown'] == 0:
+        selos.append('<span style="color: #28a745; font-weight: bold;">🏆 menor preço do histórico</span>')
+    elif analise['minimo_30d'] is not None and analise['atual'] <= analise['minimo_30d']:
+        selos.append('<span style="color: #28a745;">⬇️ menor preço em 30 dias</span>')
+    if analise['anomalia']:
+        selos.append(f'<span style="color: #fd7e14;">⚠️ fora do padrão (z {analise["zscore"]:+.1f})</span>')
+    return ''.join(f'<br><small>{selo}</small>' for selo in selos)
+
+def renderizar_linha_email(i, produto):
+    """Renderiza a linha da tabela de um produto"""
+    tipo = produto['tipo']
+    status = produto['status']
+    preco_estimado = produto.get('preco_estimado', 0)
+    menor_preco = produto.get('menor_preco', None)
+    
+    if menor_preco is not None and menor_preco > 0:
+        menor_preco_display = f'<span class="preco-menor">{formatar_preco_brasileiro(menor_preco)}</span>'
+    else:
+        menor_preco_display = SEM_VALOR_EMAIL
+    
+    status_display, preco_display = CELULAS_STATUS_EMAIL.get(tipo, CELULAS_STATUS_ERRO_EMAIL)
+    diferenca_display = SEM_VALOR_EMAIL
+    
+    if tipo == "disponivel":
+        preco_display = f'<span class="preco">{status}</span>'
+        diferenca = calcular_diferenca_preco(extrair_valor_numerico(status), preco_estimado)
+        if diferenca is not None:
+            if diferenca > 0:
+                diferenca_display = f'<span class="diferenca negativa">📈 +{diferenca:.1f}%</span>'
+            elif diferenca < 0:
+                diferenca_display = f'<span class="diferenca positiva">📉 {diferenca:.1f}%</span>'
+            else:
+                diferenca_display = '<span class="diferenca neutro">0%</span>'
+    
+    nome = produto['nome']
+    if tipo == "disponivel" and produto.get('analise'):
+        nome += selos_analise_email(produto['analise'])
+    
+    return renderizar_template_linha_email(
+        i=i,
+        nome=nome,
+        status_class=tipo,
+        status_display=status_display,
+        preco_display=preco_display,
+        menor_preco_display=menor_preco_display,
+        preco_estimado_display=formatar_preco_brasileiro(preco_estimado),
+        diferenca_display=diferenca_display,
+        url=produto['url'],
+    )
+
+@cronometrar('renderizacao_email')
+def criar_html_email(produtos_info, disponiveis=None, esgotados=None, erros=None, agora=None):
+    """
+    Cria HTML do email com relatório completo.
     
-    return html
+    Uma única passada por produtos_info renderiza as linhas em um buffer e
+    conta disponíveis/esgotados/erros (usada quando as contagens não vêm prontas).
+    O buffer é uma lista de trechos unida uma vez no final.
+    """
+    buffer = [None]  # reservado para o cabeçalho, que depende das contagens
+    contagem = Counter()
+    
+    for i, produto in enumerate(produtos_info, 1):
+        contagem[produto['tipo']] += 1
+        buffer.append(renderizar_linha_email(i, produto))
+    
+    if disponiveis is None:
+        disponiveis = contagem['disponivel']
+    if esgotados is None:
+        esgotados = contagem['esgotado']
+    if erros is None:
+        erros = sum(contagem.values()) - contagem['disponivel'] - contagem['esgotado']
+    
+    buffer[0] = TEMPLATE_EMAIL_INICIO.substitute(
+        agora=agora or obter_horario_brasilia(), disponiveis=disponiveis, esgotados=esgotados, erros=erros
+    )
+    buffer.append(TEMPLATE_EMAIL_FIM)
+    return ''.join(buffer)
+
+def gerar_produtos_info_exemplo(quantidade):
+    """produtos_info sintético (disponíveis, esgotados e erros) para o benchmark do email"""
+    tipos = ("disponivel", "disponivel", "disponivel", "esgotado", "erro")
+    produtos_info = []
+    for indice in range(1, quantidade + 1):
+        tipo = tipos[indice % len(tipos)]
+        preco = 50.0 + (indice * 37) % 5000
+        produtos_info.append({
+            'product_key': f"exemplo-{indice}",
+            'nome': f"Produto Exemplo {indice} Com Um Nome Razoavelmente Longo",
+            'tipo': tipo,
+            'status': formatar_preco_brasileiro(preco) if tipo == "disponivel" else tipo,
+            'url': f"https://www.kabum.com.br/produto/{indice}/exemplo",
+            'preco_estimado': preco * 1.05,
+            'menor_preco': preco * 0.9 if indice % 3 else None,
+        })
+    return produtos_info
+
+def medir_renderizacao_email(tamanhos=(20, 100, 1000, 5000), repeticoes=5):
+    """Micro-benchmark de criar_html_email: melhor tempo de várias repetições por tamanho"""
+    print("\n" + "="*80)
+    print("⏱️ BENCHMARK - RENDERIZAÇÃO DO EMAIL".center(80))
+    print("="*80)
+    print(f"{'Produtos':>10} | {'Tempo':>10} | {'Por produto':>12} | {'Tamanho HTML':>14}")
+    print("-"*80)
+    
+    resultados = []
+    for tamanho in tamanhos:
+        produtos_info = gerar_produtos_info_exemplo(tamanho)
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            html = criar_html_email(produtos_info, agora="01/01/2026 10:00:00")
+            tempos.append(time.perf_counter() - inicio)
+        melhor = min(tempos)
+        resultados.append({'produtos': tamanho, 'tempo': melhor, 'bytes': len(html.encode('utf-8'))})
+        print(f"{tamanho:>10} | {melhor * 1000:>8.2f}ms | {melhor / tamanho * 1e6:>10.1f}µs | {len(html) / 1024:>11.1f} KB")
+    
+    print("="*80 + "\n")
+    return resultados
 
 def enviar_email(produtos_info, disponiveis, esgotados, erros, agora):
     """Envia email com o relatório"""
@@ -819,7 +2194,7 @@ def enviar_email(produtos_info, disponiveis, esgotados, erros, agora):
         html_content = criar_html_email(produtos_info, disponiveis, esgotados, erros, agora)
         msg.add_alternative(html_content, subtype='html')
         
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
+        with etapa('envio_smtp'), smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
             smtp.login(EMAIL_REMETENTE, SENHA_APP)
             smtp.send_message(msg)
         
@@ -855,7 +2230,7 @@ def criar_mensagem_telegram_filtrada(produtos_filtrados, agora):
         emoji_num = numeros_emoji[i-1] if i <= 10 else f"{i}."
         
         # Verifica se é produto da whitelist
-        badge_whitelist = " ⭐" if product_key in ENVIAR_TELEGRAM else ""
+        badge_whitelist = " ⭐" if product_key in obter_catalogo()['enviar_telegram'] else ""
         
         mensagem += f"{emoji_num} <b>{nome}</b>{badge_whitelist}\n"
         mensagem += f"┣ 💵 <b>{status}</b>\n"
@@ -897,6 +2272,15 @@ def criar_mensagem_telegram_filtrada(produtos_filtrados, agora):
                 diferenca = preco_atual - preco_estimado
                 mensagem += f"┣ ⚠️ Acima do estimado: +{formatar_preco_brasileiro(diferenca)}\n"
         
+        # Análise do histórico (Analise_Precos)
+        analise = produto.get('analise')
+        if analise:
+            mensagem += f"┣ 📈 Percentil {analise['percentil_atual']:.0f} do histórico ({analise['dias']:.0f} dia(s))\n"
+            if analise['minimo_30d'] is not None:
+                mensagem += f"┣ 📉 Menor em 30 dias: <code>{formatar_preco_brasileiro(analise['minimo_30d'])}</code>\n"
+            if analise['anomalia']:
+                mensagem += f"┣ ⚠️ <b>Preço fora do padrão</b> (z-score {analise['zscore']:+.1f})\n"
+        
         mensagem += f"┗ 🛒 <a href='{url}'>COMPRAR AGORA</a>\n\n"
 
     # Rodapé
@@ -910,8 +2294,8 @@ def enviar_telegram(produtos_info, disponiveis, esgotados, erros, agora):
     Envia notificação via Telegram com sistema de filtros inteligente.
     
     Lógica de filtros:
-    1. Produtos na WHITELIST (ENVIAR_TELEGRAM): sempre enviam quando disponíveis
-    2. Produtos na BLACKLIST (NAO_ENVIAR_TELEGRAM): nunca enviam
+    1. Produtos na WHITELIST (enviar_telegram do catálogo): sempre enviam quando disponíveis
+    2. Produtos na BLACKLIST (nao_enviar_telegram do catálogo): nunca enviam
     3. Outros produtos: só enviam se preço <= estimado
     """
     try:
@@ -969,8 +2353,8 @@ def enviar_telegram(produtos_info, disponiveis, esgotados, erros, agora):
         if not ofertas_aprovadas:
             print("\nℹ️ Nenhuma oferta passou nos filtros configurados. Telegram não enviado.")
             print(f"   Filtros ativos:")
-            print(f"   - Whitelist: {len(ENVIAR_TELEGRAM)} produto(s)")
-            print(f"   - Blacklist: {len(NAO_ENVIAR_TELEGRAM)} produto(s)")
+            print(f"   - Whitelist: {len(obter_catalogo()['enviar_telegram'])} produto(s)")
+            print(f"   - Blacklist: {len(obter_catalogo()['nao_enviar_telegram'])} produto(s)")
             print(f"   - Regra de preço: preço <= estimado")
             return False
         
@@ -985,7 +2369,9 @@ def enviar_telegram(produtos_info, disponiveis, esgotados, erros, agora):
             'disable_web_page_preview': True
         }
         
-        response = requests.post(url, json=payload, timeout=30)
+        import requests
+        with etapa('envio_telegram'):
+            response = requests.post(url, json=payload, timeout=30)
         
         if response.status_code == 200:
             print(f"\n✅ Notificação de {len(ofertas_aprovadas)} oferta(s) enviada ao Telegram!")
@@ -1014,9 +2400,10 @@ def imprimir_cabecalho(agora):
     print(f"📧 Email: {EMAIL_REMETENTE}")
     print(f"📱 Telegram: Chat ID {TELEGRAM_CHAT_ID}")
     print(f"🌐 Ambiente: {'CI/CD' if os.environ.get('CI') else 'Local'}")
+    print(f"⚙️ Workers: {NUM_WORKERS} navegador(es) em paralelo")
     print("\n🎯 FILTROS TELEGRAM ATIVOS:")
-    print(f"   ⭐ Whitelist: {len(ENVIAR_TELEGRAM)} produto(s) - SEMPRE envia quando disponível")
-    print(f"   🚫 Blacklist: {len(NAO_ENVIAR_TELEGRAM)} produto(s) - NUNCA envia")
+    print(f"   ⭐ Whitelist: {len(obter_catalogo()['enviar_telegram'])} produto(s) - SEMPRE envia quando disponível")
+    print(f"   🚫 Blacklist: {len(obter_catalogo()['nao_enviar_telegram'])} produto(s) - NUNCA envia")
     print(f"   💰 Outros produtos: só envia se preço <= estimado")
     print("="*120 + "\n")
 
@@ -1048,7 +2435,7 @@ def imprimir_resultado(index, total, produto, status, preco_estimado, menor_prec
     print(f"      Link: {url}")
     print("-"*120)
 
-def imprimir_rodape(disponiveis, esgotados, erros):
+def imprimir_rodape(disponiveis, esgotados, erros, estatisticas_workers=None):
     """Imprime resumo final"""
     print("\n" + "="*120)
     print("📊 RESUMO DA VERIFICAÇÃO".center(120))
@@ -1056,110 +2443,109 @@ def imprimir_rodape(disponiveis, esgotados, erros):
     print(f"✅ Produtos disponíveis: {disponiveis}")
     print(f"❌ Produtos esgotados: {esgotados}")
     print(f"⚠️ Erros ao verificar: {erros}")
+    
+    if estatisticas_workers:
+        print("\n⚙️ Desempenho por worker:")
+        for worker_id, stats in sorted(estatisticas_workers.items()):
+            print(f"   Worker {worker_id}: {stats['produtos']} produto(s) em {stats['tempo']:.1f}s "
+                  f"({stats['produtos_por_minuto']:.1f} produtos/min)")
+    
+    if CONTADOR_EXTRACAO:
+        print(f"\n🔎 Extração: {CONTADOR_EXTRACAO['http']} via HTTP | {CONTADOR_EXTRACAO['script']} via script | "
+              f"{CONTADOR_EXTRACAO['xpath']} via XPath | {CONTADOR_EXTRACAO['falha']} sem resultado")
+    imprimir_tempos_espera()
+    imprimir_relatorio_perfis()
     print("="*120 + "\n")
 
 # ========================================
 # FUNÇÃO PRINCIPAL
 # ========================================
 
-def main():
-    """Função principal do monitor"""
-    agora = obter_horario_brasilia()
-    print("Horário de Brasília:", agora)
+def verificar_catalogo(produtos, menores_precos):
+    """
+    Verifica os produtos e monta produtos_info na ordem recebida, imprimindo cada resultado.
     
-    # Inicializa variáveis
-    produtos_disponiveis = 0
-    produtos_esgotados = 0
-    erros = 0
-    total_urls = len(PRODUTOS)
+    Retorna: (produtos_info, estatisticas_workers)
+    """
+    total_urls = len(produtos)
     produtos_info = []
     
-    # Inicializa driver
-    driver = inicializar_driver()
+    # Verifica produtos (HTTP primeiro, pool de drivers para o restante)
+    resultados, estatisticas_workers = verificar_produtos(produtos)
     
-    # Imprime cabeçalho
-    imprimir_cabecalho(agora)
+    # Processa resultados na ordem do catálogo
+    for index, item in enumerate(produtos, 1):
+        url = item['url']
+        preco_estimado = item['preco_estimado']
+        product_key = item['product_key']
+        nome_produto = formatar_nome_produto(url)
+        resultado = resultados.get(index)
+        
+        # Menor preço histórico (já carregado em memória)
+        menor_preco_historico = menores_precos.get(product_key)
+        
+        if resultado is None:
+            tipo, status = 'erro', 'Erro ao verificar'
+            status_display = "⚠️ Erro ao processar"
+        else:
+            tipo, status = resultado
+            if tipo == "disponivel":
+                status_display = f"💰 {status}"
+            elif tipo == "esgotado":
+                status_display = "❌ Ops! Produto esgotado"
+            else:
+                status_display = "⚠️ Não foi possível verificar"
+        
+        # Armazena informações
+        produtos_info.append({
+            'product_key': product_key,
+            'nome': nome_produto,
+            'tipo': tipo,
+            'status': status,
+            'url': url,
+            'preco_estimado': preco_estimado,
+            'menor_preco': menor_preco_historico
+        })
+        
+        # Imprime resultado
+        imprimir_resultado(index, total_urls, nome_produto, status_display, preco_estimado, menor_preco_historico, url)
     
+    return produtos_info, estatisticas_workers
+
+def contar_resultados(produtos_info):
+    """Retorna (disponiveis, esgotados, erros)"""
+    contagem = Counter(produto['tipo'] for produto in produtos_info)
+    disponiveis, esgotados = contagem['disponivel'], contagem['esgotado']
+    return disponiveis, esgotados, len(produtos_info) - disponiveis - esgotados
+
+def conectar_ou_sair():
+    """Conecta ao Supabase ou encerra o processo (como no início de toda execução)"""
     try:
-        # Processa cada produto
-        for index, item in enumerate(PRODUTOS, 1):
-            url = item['url']
-            preco_estimado = item['preco_estimado']
-            product_key = item.get('product_key', f"kabum-{index}")
-            
-            try:
-                # Acessa página
-                driver.get(url)
-                time.sleep(3)
-                
-                # Verifica status
-                tipo, status = verificar_status_produto(driver)
-                
-                # Busca menor preço histórico
-                menor_preco_historico = obter_menor_preco_historico(product_key)
-                
-                # Contabiliza
-                if tipo == "disponivel":
-                    produtos_disponiveis += 1
-                    status_display = f"💰 {status}"
-                elif tipo == "esgotado":
-                    produtos_esgotados += 1
-                    status_display = "❌ Ops! Produto esgotado"
-                else:
-                    erros += 1
-                    status_display = "⚠️ Não foi possível verificar"
-                
-                # Formata nome
-                nome_produto = formatar_nome_produto(url)
-                
-                # Armazena informações
-                produtos_info.append({
-                    'product_key': product_key,
-                    'nome': nome_produto,
-                    'tipo': tipo,
-                    'status': status,
-                    'url': url,
-                    'preco_estimado': preco_estimado,
-                    'menor_preco': menor_preco_historico
-                })
-                
-                # Imprime resultado
-                imprimir_resultado(index, total_urls, nome_produto, status_display, preco_estimado, menor_preco_historico, url)
-                
-            except Exception as e:
-                nome_produto = formatar_nome_produto(url)
-                status_display = "⚠️ Erro ao processar"
-                
-                # Busca menor preço mesmo em caso de erro
-                menor_preco_historico = obter_menor_preco_historico(product_key)
-                
-                imprimir_resultado(index, total_urls, nome_produto, status_display, preco_estimado, menor_preco_historico, url)
-                erros += 1
-                
-                produtos_info.append({
-                    'product_key': product_key,
-                    'nome': nome_produto,
-                    'tipo': 'erro',
-                    'status': 'Erro ao verificar',
-                    'url': url,
-                    'preco_estimado': preco_estimado,
-                    'menor_preco': menor_preco_historico
-                })
-    
-    finally:
-        # Fecha driver
-        driver.quit()
+        obter_supabase()
+    except Exception as e:
+        print(f"❌ Erro ao conectar com Supabase: {e}")
+        exit(1)
+
+def concluir_execucao(produtos_info, agora, run_id, data_coleta_iso, estatisticas_workers, outbox):
+    """Resumo, persistência (via outbox) e notificações de uma execução completa"""
+    produtos_disponiveis, produtos_esgotados, erros = contar_resultados(produtos_info)
     
     # Imprime resumo
-    imprimir_rodape(produtos_disponiveis, produtos_esgotados, erros)
+    imprimir_rodape(produtos_disponiveis, produtos_esgotados, erros, estatisticas_workers)
     
     # Salva no Supabase (histórico completo)
     print("💾 Salvando dados no Supabase (Monitoramento Kabum)...")
-    salvar_no_supabase(produtos_info)
+    salvar_no_supabase(produtos_info, data_coleta_iso, run_id, outbox)
+    if RESUMO_DIARIO or AGENDADOR_ATIVO:
+        atualizar_resumos_diarios(produtos_info, data_coleta_iso, run_id, outbox)
     
     # Atualiza menores preços
     print("\n💰 Atualizando menores preços históricos...")
-    atualizar_menores_precos(produtos_info)
+    atualizar_menores_precos(produtos_info, data_coleta_iso, outbox)
+    
+    # Estatísticas do histórico para os relatórios
+    print("\n📊 Analisando histórico de preços...")
+    anexar_analise(produtos_info, analisar_precos_catalogo(produtos_info, run_id))
     
     # Envia email
     print("\n📧 Enviando relatório por email...")
@@ -1169,42 +2555,320 @@ def main():
     print("\n📱 Enviando notificação via Telegram...")
     enviar_telegram(produtos_info, produtos_disponiveis, produtos_esgotados, erros, agora)
     
+    # Aguarda o flush da outbox (o que sobrar é retomado na próxima execução)
+    print("\n📤 Enviando outbox para o Supabase...")
+    with etapa('flush_outbox'):
+        pendentes = outbox.finalizar()
+    if pendentes:
+        print(f"⚠️ {pendentes} linha(s) continuam na outbox local e serão enviadas na próxima execução")
+    else:
+        print(f"✅ Outbox vazia ({outbox.enviadas} linha(s) enviadas ao Supabase)")
+    
+    imprimir_etapas()
+    gravar_metricas('kabum')
     print("\n✅ Monitoramento concluído com sucesso!")
 
+def main(shard=None, saida=None):
+    """
+    Função principal do monitor.
+    
+    Com shard=(i, N), verifica só a fatia i/N do catálogo e grava o resultado
+    em um arquivo (sem banco nem notificações); mesclar_shards conclui a execução.
+    """
+    agora = obter_horario_brasilia()
+    print("Horário de Brasília:", agora)
+    
+    conectar_ou_sair()
+    
+    # Identificação da execução (compartilhada por todas as linhas salvas)
+    run_id = gerar_run_id()
+    data_coleta_iso = obter_horario_brasilia_iso()
+    
+    produtos = obter_catalogo()['produtos']
+    if shard:
+        produtos = produtos_do_shard(produtos, *shard)
+    
+    # Imprime cabeçalho
+    imprimir_cabecalho(agora)
+    if shard:
+        print(f"🧩 Shard {shard[0]}/{shard[1]}: {len(produtos)} de {len(obter_catalogo()['produtos'])} produto(s)\n")
+    
+    # Só os produtos devidos pela faixa de frequência (em caso de erro, verifica todos)
+    if AGENDADOR_ATIVO:
+        try:
+            produtos, relatorio = agendar_produtos(produtos)
+            imprimir_agendamento(relatorio)
+        except Exception as e:
+            print(f"⚠️ Erro no agendamento ({str(e)[:100]}), verificando todos os produtos\n")
+    
+    # Outbox local: o flusher já começa enviando o que ficou de execuções anteriores
+    outbox = None
+    if not shard:
+        outbox = OutboxSupabase()
+        outbox.iniciar()
+    
+    # Carrega os menores preços históricos dos produtos em memória
+    menores_precos = carregar_menores_precos_historicos(item['product_key'] for item in produtos)
+    print(f"🏆 {len(menores_precos)} menor(es) preço(s) histórico(s) carregado(s)\n")
+    
+    produtos_info, estatisticas_workers = verificar_catalogo(produtos, menores_precos)
+    
+    if shard:
+        imprimir_rodape(*contar_resultados(produtos_info), estatisticas_workers)
+        caminho = saida or f"kabum_shard_{shard[0]}_de_{shard[1]}.json"
+        salvar_resultado_shard(caminho, shard, agora, data_coleta_iso, produtos_info, estatisticas_workers)
+        print(f"🧩 Resultado do shard gravado em {caminho} (conclua com --mesclar)")
+        imprimir_etapas()
+        gravar_metricas(f"kabum_shard_{shard[0]}_de_{shard[1]}")
+        return
+    
+    concluir_execucao(produtos_info, agora, run_id, data_coleta_iso, estatisticas_workers, outbox)
+
+# ========================================
+# EXECUÇÃO EM SHARDS
+# ========================================
+
+def salvar_resultado_shard(caminho, shard, agora, data_coleta_iso, produtos_info, estatisticas_workers):
+    """Grava o resultado de um shard para a etapa de mesclagem"""
+    dados = {
+        'shard': list(shard),
+        'agora': agora,
+        'data_coleta': data_coleta_iso,
+        'produtos_info': produtos_info,
+        'estatisticas_workers': estatisticas_workers,
+        'extracao': dict(CONTADOR_EXTRACAO),
+    }
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False)
+
+def mesclar_shards(caminhos):
+    """
+    Combina os resultados dos shards em uma única execução: um relatório,
+    um flush para o Supabase e uma notificação.
+    
+    Os produtos voltam à ordem do catálogo; data_coleta é a do shard que
+    começou primeiro, para que toda a execução compartilhe o mesmo instante.
+    """
+    agora = obter_horario_brasilia()
+    print("Horário de Brasília:", agora)
+    
+    conectar_ou_sair()
+    
+    shards = []
+    for caminho in caminhos:
+        with open(caminho, encoding='utf-8') as arquivo:
+            shards.append(json.load(arquivo))
+    
+    totais = {dados['shard'][1] for dados in shards}
+    indices = {dados['shard'][0] for dados in shards}
+    if len(totais) != 1:
+        print(f"❌ Arquivos de execuções com números de shards diferentes: {sorted(totais)}")
+        exit(1)
+    total = totais.pop()
+    faltando = sorted(set(range(1, total + 1)) - indices)
+    if faltando or len(indices) != len(shards):
+        print(f"⚠️ Shards ausentes ou repetidos (faltando: {faltando or 'nenhum'}); mesclando o que existe")
+    
+    # Ordem do catálogo (produtos fora do catálogo atual vão para o fim)
+    posicoes = {chave: posicao for posicao, chave in enumerate(obter_catalogo()['por_chave'])}
+    produtos_info = {}
+    estatisticas_workers = {}
+    for dados in shards:
+        for produto in dados['produtos_info']:
+            produtos_info[produto['product_key']] = produto
+        for worker_id, stats in dados['estatisticas_workers'].items():
+            estatisticas_workers[f"{dados['shard'][0]}.{worker_id}"] = stats
+        CONTADOR_EXTRACAO.update(dados.get('extracao', {}))
+    
+    produtos_info = sorted(produtos_info.values(), key=lambda p: posicoes.get(p['product_key'], len(posicoes)))
+    data_coleta_iso = min(dados['data_coleta'] for dados in shards)
+    
+    imprimir_cabecalho(agora)
+    print(f"🧩 Mesclando {len(shards)} shard(s) de {total}: {len(produtos_info)} produto(s)\n")
+    
+    outbox = OutboxSupabase()
+    outbox.iniciar()
+    concluir_execucao(produtos_info, agora, gerar_run_id(), data_coleta_iso, estatisticas_workers, outbox)
+
 # ========================================
-# FUNÇÃO PARA CONSULTAR DADOS (EXEMPLO)
+# LEITURA DO HISTÓRICO
 # ========================================
 
+def converter_datas_para_brasilia(linhas, campo='data_coleta', destino='data_brasilia'):
+    """
+    Converte em lote a data das linhas para o horário de Brasília (em destino).
+    
+    Linhas da mesma execução compartilham data_coleta, então cada valor
+    distinto da página é convertido uma vez só.
+    """
+    convertidas = {}
+    for linha in linhas:
+        valor = linha.get(campo)
+        if valor not in convertidas:
+            convertidas[valor] = converter_utc_para_brasilia(valor) if valor else None
+        linha[destino] = convertidas[valor]
+    return linhas
+
+def filtro_apos_cursor(data_coleta, id_linha, desc=False):
+    """Filtro 'or' do PostgREST para as linhas depois de (data_coleta, id) na ordenação"""
+    operador = "lt" if desc else "gt"
+    return f'data_coleta.{operador}."{data_coleta}",and(data_coleta.eq."{data_coleta}",id.{operador}.{id_linha})'
+
+def iterar_historico(product_key=None, inicio_iso=None, fim_iso=None, status=None, desc=False,
+                     tamanho_pagina=HISTORICO_TAMANHO_PAGINA, converter_datas=True):
+    """
+    Percorre "Monitoramento Kabum" página a página, em ordem de (data_coleta, id).
+    
+    Paginação por chave: cada página continua depois da última linha da
+    anterior (sem offset), então o custo por página não cresce com o
+    histórico e só uma página fica em memória.
+    product_key e status aceitam um valor ou uma lista; inicio_iso/fim_iso
+    são inclusivos. Com converter_datas, cada linha ganha 'data_brasilia'.
+    Gera: linhas do histórico
+    """
+    cursor = None
+    while True:
+        consulta = obter_supabase().table("Monitoramento Kabum").select("*")
+        
+        if isinstance(product_key, (list, tuple, set)):
+            consulta = consulta.in_("product_key", list(product_key))
+        elif product_key:
+            consulta = consulta.eq("product_key", product_key)
+        if isinstance(status, (list, tuple, set)):
+            consulta = consulta.in_("status", list(status))
+        elif status:
+            consulta = consulta.eq("status", status)
+        if inicio_iso:
+            consulta = consulta.gte("data_coleta", inicio_iso)
+        if fim_iso:
+            consulta = consulta.lte("data_coleta", fim_iso)
+        if cursor:
+            consulta = consulta.or_(filtro_apos_cursor(*cursor, desc=desc))
+        
+        pagina = consulta \
+            .order("data_coleta", desc=desc) \
+            .order("id", desc=desc) \
+            .limit(tamanho_pagina) \
+            .execute().data or []
+        
+        if converter_datas:
+            converter_datas_para_brasilia(pagina)
+        yield from pagina
+        
+        if len(pagina) < tamanho_pagina:
+            return
+        cursor = (pagina[-1]['data_coleta'], pagina[-1]['id'])
+
+def exportar_historico(caminho, product_key=None, inicio_iso=None, fim_iso=None, status=None):
+    """
+    Exporta o histórico filtrado para CSV, escrevendo página a página
+    (memória constante, qualquer que seja o período).
+    Retorna: quantidade de linhas exportadas
+    """
+    total = 0
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        escritor = None
+        for linha in iterar_historico(product_key, inicio_iso, fim_iso, status):
+            if escritor is None:
+                escritor = csv.DictWriter(arquivo, fieldnames=list(linha), extrasaction='ignore')
+                escritor.writeheader()
+            escritor.writerow(linha)
+            total += 1
+    
+    print(f"✅ {total} linha(s) do histórico exportada(s) para {caminho}")
+    return total
+
 def consultar_ultimas_verificacoes(limit=10):
-    """Exemplo: Consulta últimas verificações e exibe em horário de Brasília"""
+    """Consulta as últimas verificações e exibe em horário de Brasília"""
     try:
-        response = supabase.table("Monitoramento Kabum") \
-            .select("*") \
-            .order("data_coleta", desc=True) \
-            .limit(limit) \
-            .execute()
+        itens = list(islice(iterar_historico(desc=True, tamanho_pagina=min(limit, HISTORICO_TAMANHO_PAGINA)), limit))
         
         print(f"\n📋 Últimas {limit} verificações:")
         print("="*120)
         
-        for item in response.data:
-            # Converte data UTC para Brasília
-            data_brasilia = converter_utc_para_brasilia(item['data_coleta'])
-            
+        for item in itens:
             print(f"Produto: {item['nome']}")
             print(f"Preço: {formatar_preco_brasileiro(item['preco_atual']) if item['preco_atual'] else 'N/A'}")
             print(f"Status: {item['status']}")
-            print(f"Data (Brasília): {data_brasilia}")
+            print(f"Data (Brasília): {item['data_brasilia']}")
             print("-"*120)
         
-        return response.data
+        return itens
     except Exception as e:
         print(f"❌ Erro ao consultar: {str(e)}")
         return None
 
+def buscar_linha_em_vigor(product_key, data_iso):
+    """Última linha do histórico de um produto anterior a data_iso (o estado em vigor nela), ou None"""
+    response = obter_supabase().table("Monitoramento Kabum") \
+        .select("*") \
+        .eq("product_key", product_key) \
+        .lt("data_coleta", data_iso) \
+        .order("data_coleta", desc=True) \
+        .order("id", desc=True) \
+        .limit(1) \
+        .execute()
+    return (response.data or [None])[0]
+
+def consultar_historico_periodo(product_key, inicio_iso, fim_iso):
+    """
+    Histórico de um produto no intervalo [inicio_iso, fim_iso], incluindo a
+    última linha anterior ao início (o estado em vigor quando o período começa).
+    
+    Cada linha vale até a próxima, então a resposta é a mesma com o histórico
+    completo ou só com mudanças (HISTORICO_DELTA).
+    Retorna: lista de linhas em ordem de data_coleta
+    """
+    anterior = buscar_linha_em_vigor(product_key, inicio_iso)
+    periodo = iterar_historico(product_key, inicio_iso, fim_iso, converter_datas=False)
+    return ([anterior] if anterior else []) + list(periodo)
+
 # ========================================
 # EXECUÇÃO
 # ========================================
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Monitor de preços KaBuM")
+    parser.add_argument('--shard', type=interpretar_shard, metavar='i/N',
+                        help="verifica só a fatia i/N do catálogo e grava o resultado em arquivo")
+    parser.add_argument('--saida', help="arquivo de resultado do shard (padrão: kabum_shard_i_de_N.json)")
+    parser.add_argument('--mesclar', nargs='+', metavar='ARQUIVO',
+                        help="combina os resultados dos shards em um relatório, um flush e uma notificação")
+    parser.add_argument('--agendamento', action='store_true',
+                        help="mostra a faixa de frequência de cada produto e a economia de buscas, sem verificar")
+    parser.add_argument('--analise', action='store_true',
+                        help="mostra as estatísticas do histórico de cada produto do catálogo, sem verificar")
+    parser.add_argument('--benchmark-email', action='store_true',
+                        help="mede a renderização do email de 20 a 5.000 produtos, sem verificar nem enviar")
+    parser.add_argument('--exportar-historico', metavar='CSV',
+                        help="exporta o histórico (filtrado por --produto/--inicio/--fim/--status) para CSV")
+    parser.add_argument('--produto', nargs='+', metavar='PRODUCT_KEY', help="filtro da exportação")
+    parser.add_argument('--inicio', metavar='DATA', help="filtro da exportação (data_coleta >=, ex.: 2026-01-01)")
+    parser.add_argument('--fim', metavar='DATA', help="filtro da exportação (data_coleta <=)")
+    parser.add_argument('--status', nargs='+', help="filtro da exportação (ex.: esgotado erro)")
+    parser.add_argument('--reprocessar-outbox', nargs='?', const='', metavar='TABELA',
+                        help="devolve as linhas de outbox_falhas (todas ou de uma tabela) para a outbox")
+    args = parser.parse_args()
+    
+    if args.reprocessar_outbox is not None:
+        movidas = OutboxSupabase().reenfileirar_falhas(args.reprocessar_outbox or None)
+        print(f"📤 {movidas} linha(s) devolvida(s) à outbox; serão enviadas na próxima execução")
+    elif args.benchmark_email:
+        medir_renderizacao_email()
+    elif args.analise:
+        conectar_ou_sair()
+        produtos_info = [{'product_key': p['product_key'], 'tipo': 'sem_coleta', 'status': ''}
+                         for p in obter_catalogo()['produtos']]
+        anexar_analise(produtos_info, analisar_precos_catalogo(produtos_info))
+        imprimir_analise_precos(produtos_info)
+    elif args.exportar_historico:
+        conectar_ou_sair()
+        exportar_historico(args.exportar_historico, args.produto, args.inicio, args.fim, args.status)
+    elif args.agendamento:
+        conectar_ou_sair()
+        _, relatorio = agendar_produtos(obter_catalogo()['produtos'])
+        imprimir_agendamento(relatorio, detalhado=True)
+    elif args.mesclar:
+        mesclar_shards(args.mesclar)
+    else:
+        main(args.shard, args.saida)
@@ -5,8 +5,8 @@
 ╚═══════════════════════════════════════════════════════════════════════════════╝
 """
 
-import requests
-from bs4 import BeautifulSoup
+from __future__ import annotations
+
 from collections import defaultdict
 import time
 import smtplib
@@ -18,17 +18,21 @@ import re
 import json
 import logging
 import sys
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 from urllib.parse import urljoin
 
-# Selenium imports
+# Selenium imports (WebDriverWait/expected_conditions, requests, bs4 e IMAP são
+# importados sob demanda, só nos caminhos que usam)
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-import imaplib
-import email as email_lib
+from Navegador import (aplicar_opcoes_bloqueio, configurar_bloqueio, aplicar_perfil, iniciar_driver_perfil,
+                       carregar_pagina, perfil_quente, finalizar_perfil, imprimir_relatorio_perfis)
+from Metricas import etapa, cronometrar, registrar_etapa, imprimir_etapas, gravar_metricas
+
+if TYPE_CHECKING:
+    import requests
+    from bs4 import BeautifulSoup
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONFIGURAÇÃO DE LOGGING (APENAS TERMINAL)
@@ -106,6 +110,13 @@ CONFIG = {
     'padroes_vermelho': ["vermelho", "automac", "app", "automaq", "maisto", "modelo vermelho"],
     'padroes_dupla': ["set 2un", "kit 2x", "kit c/2", "dupla", "2x miniatura", "kit com 2"],
 
+    # Categorias de recursos que o Chrome do login carrega (ver Navegador.CATEGORIAS_BLOQUEIO)
+    'bloqueio_permitir': (),
+
+    # Perfil persistente do Chrome (Navegador.PERFIL_PERSISTENTE): a sessão logada
+    # fica no perfil e o login é pulado enquanto continuar válida
+    'perfil_chrome': 'mercado_livre',
+
     # Configurações de rede
     'timeout': 20,
     'delay_entre_paginas': (2, 4),
@@ -155,9 +166,14 @@ class AutoLogin:
         options.add_experimental_option('useAutomationExtension', False)
         options.add_argument("--disable-blink-features=AutomationControlled")
         options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        aplicar_opcoes_bloqueio(options, CONFIG['bloqueio_permitir'])
+        aplicar_perfil(options, CONFIG['perfil_chrome'])
 
         try:
-            driver = webdriver.Chrome(options=options)
+            driver = iniciar_driver_perfil(CONFIG['perfil_chrome'], lambda: webdriver.Chrome(options=options))
+            padroes = configurar_bloqueio(driver, CONFIG['bloqueio_permitir'])
+            if padroes:
+                logger.info(f"🧱 Bloqueio de recursos ativo ({padroes} padrões)")
             try:
                 driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
                 logger.info("✅ Script anti-detecção aplicado")
@@ -171,6 +187,9 @@ class AutoLogin:
 
     def fazer_login(self, url: str) -> bool:
         """Executa processo completo de login"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         try:
             logger.info("🔐 Iniciando processo de login...")
 
@@ -178,11 +197,17 @@ class AutoLogin:
 
             # Acessar página
             logger.info("Acessando Mercado Livre...")
-            self.driver.get(url)
+            carregar_pagina(self.driver, url)
             if not is_ci:
                 self.driver.maximize_window()
             self.esperar_natural(2, 4)
 
+            # Perfil quente: os cookies da execução anterior podem ainda valer
+            url_atual = self.driver.current_url
+            if perfil_quente(CONFIG['perfil_chrome']) and "account-verification" not in url_atual and "security" not in url_atual:
+                logger.info("✅ Sessão do perfil persistente ainda válida - login dispensado")
+                return True
+
             try:
                 os.makedirs('debug_temp', exist_ok=True)
                 self.driver.save_screenshot('debug_temp/login_step1.png')
@@ -343,6 +368,9 @@ class AutoLogin:
 
     def buscar_codigo_imap(self) -> Optional[str]:
         """Busca código de verificação via IMAP"""
+        import imaplib
+        import email as email_lib
+
         try:
             imap = imaplib.IMAP4_SSL("imap.gmail.com")
             senha_limpa = self.senha_app.replace(" ", "")
@@ -413,6 +441,9 @@ class AutoLogin:
 
     def inserir_codigo(self, codigo: str) -> bool:
         """Insere código de verificação"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         try:
             logger.info("📝 Inserindo código...")
             for i, digito in enumerate(codigo):
@@ -455,6 +486,8 @@ class AutoLogin:
         """Fecha o driver"""
         if self.driver:
             self.driver.quit()
+            finalizar_perfil(CONFIG['perfil_chrome'], self.driver)
+            imprimir_relatorio_perfis()
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CLASSE PARA GERENCIAR SCRAPING
@@ -473,6 +506,8 @@ class MercadoLivreScraper:
 
     def _criar_sessao(self) -> requests.Session:
         """Cria sessão HTTP com headers realistas"""
+        import requests
+
         session = requests.Session()
 
         user_agents = [
@@ -522,6 +557,9 @@ class MercadoLivreScraper:
 
     def buscar_pagina(self, url: str, pagina_num: int, tentativa: int = 1) -> Optional[BeautifulSoup]:
         """Busca uma página com retry e auto-login se necessário"""
+        import requests
+        from bs4 import BeautifulSoup
+
         self.tentativas_totais += 1
         logger.info(f"Buscando página {pagina_num} (tentativa {tentativa}/{CONFIG['max_tentativas']})")
 
@@ -529,7 +567,7 @@ class MercadoLivreScraper:
         if self.auto_login and self.auto_login.driver:
             logger.info("🌐 Usando Selenium autenticado")
             try:
-                self.auto_login.driver.get(url)
+                carregar_pagina(self.auto_login.driver, url)
                 self.auto_login.esperar_natural(2, 4)
 
                 if self.verificar_bloqueio(self.auto_login.driver.current_url):
@@ -570,7 +608,8 @@ class MercadoLivreScraper:
                 time.sleep(delay)
 
             inicio = time.time()
-            response = self.session.get(url, timeout=CONFIG['timeout'], allow_redirects=True)
+            with etapa('carregamento_pagina_http'):
+                response = self.session.get(url, timeout=CONFIG['timeout'], allow_redirects=True)
             duracao = time.time() - inicio
             logger.info(f"Status: {response.status_code} | Tempo: {duracao:.2f}s")
 
@@ -660,6 +699,7 @@ class ProdutoExtractor:
     """Extrai e processa produtos do HTML"""
 
     @staticmethod
+    @cronometrar('extracao')
     def extrair_produtos(soup: BeautifulSoup, pagina_num: int) -> List[Dict]:
         """Extrai produtos usando múltiplas estratégias"""
         logger.info(f"Extraindo produtos da página {pagina_num}")
@@ -862,6 +902,7 @@ def exibir_relatorio_console(produtos: List[Dict]):
 def enviar_email(produtos: List[Dict]) -> bool:
     """Envia relatório por email com design moderno"""
     logger.info("Preparando envio de e-mail...")
+    inicio_renderizacao = time.perf_counter()
 
     email = CONFIG['email_destino']
     senha = CONFIG['senha_app_destino']
@@ -1265,6 +1306,8 @@ def enviar_email(produtos: List[Dict]) -> bool:
 </body>
 </html>"""
 
+    registrar_etapa('renderizacao_email', time.perf_counter() - inicio_renderizacao)
+
     # Criar e enviar email
     msg = EmailMessage()
     msg['Subject'] = f"🏎️ F1 McDonald's 1/43 - {len(produtos)} produtos encontrados"
@@ -1275,7 +1318,7 @@ def enviar_email(produtos: List[Dict]) -> bool:
 
     try:
         logger.info("Conectando ao SMTP do Gmail...")
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
+        with etapa('envio_smtp'), smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
             smtp.login(email, senha)
             smtp.send_message(msg)
         logger.info("✅ E-mail enviado com sucesso!")
@@ -1449,6 +1492,11 @@ def main():
             pass
         sys.exit(1)
 
+    finally:
+        # Também roda nos sys.exit acima
+        imprimir_etapas()
+        gravar_metricas('mercado_livre')
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # PONTO DE ENTRADA
 # ═══════════════════════════════════════════════════════════════════════════════
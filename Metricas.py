@@ -0,0 +1,210 @@
+"""
+MÉTRICAS - Tempo por etapa dos monitores
+Camada de instrumentação compartilhada: as etapas (início do driver, carregamento
+de página, extração, correspondência, gravação no banco, renderização do email,
+envio SMTP e envio ao Telegram) são cronometradas com um context manager ou um
+decorator e, no fim da execução, viram histogramas em um arquivo JSON e/ou
+no formato texto do Prometheus (textfile collector do node_exporter).
+
+Uso:
+    with etapa('extracao'):
+        ...
+
+    @cronometrar('renderizacao_email')
+    def criar_html_email(...):
+        ...
+
+    gravar_metricas('kabum')   # metricas/kabum.json (+ histórico .jsonl) e/ou metricas/kabum.prom
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+# Pasta dos arquivos de métricas e formatos gravados ("json", "prometheus" ou os dois, separados por vírgula)
+METRICAS_PASTA = os.environ.get('METRICAS_PASTA', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metricas'))
+METRICAS_FORMATOS = [f.strip() for f in os.environ.get('METRICAS_FORMATO', 'json').split(',') if f.strip()]
+
+# Limites superiores (s) dos baldes dos histogramas
+BALDES_SEGUNDOS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Execuções guardadas no histórico JSON Lines de cada monitor
+METRICAS_HISTORICO_MAXIMO = 500
+
+# Duração de cada etapa, por nome: [(segundos, concluiu_sem_erro)]
+TEMPOS_ETAPAS = defaultdict(list)
+_lock_etapas = threading.Lock()
+_inicio_execucao = time.time()
+
+# ========================================
+# INSTRUMENTAÇÃO
+# ========================================
+
+def registrar_etapa(nome, segundos, sucesso=True):
+    """Registra a duração de uma etapa (seguro entre threads)"""
+    with _lock_etapas:
+        TEMPOS_ETAPAS[nome].append((segundos, sucesso))
+
+@contextmanager
+def etapa(nome):
+    """Cronometra o bloco; uma exceção conta como falha da etapa e é propagada"""
+    inicio = time.perf_counter()
+    sucesso = False
+    try:
+        yield
+        sucesso = True
+    finally:
+        registrar_etapa(nome, time.perf_counter() - inicio, sucesso)
+
+def cronometrar(nome):
+    """Decorator: cada chamada da função é uma ocorrência da etapa"""
+    def decorator(funcao):
+        @wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with etapa(nome):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorator
+
+# ========================================
+# RESUMO E HISTOGRAMAS
+# ========================================
+
+def resumo_etapas():
+    """
+    Estatísticas e histograma por etapa.
+
+    Retorna: dict {nome: {'quantidade', 'total', 'media', 'p50', 'p95', 'maximo',
+                          'falhas', 'baldes': [(limite, acumulado)]}}
+    """
+    with _lock_etapas:
+        copia = {nome: list(tempos) for nome, tempos in TEMPOS_ETAPAS.items()}
+
+    resumo = {}
+    for nome, tempos in copia.items():
+        duracoes = sorted(segundos for segundos, _ in tempos)
+        quantidade = len(duracoes)
+        resumo[nome] = {
+            'quantidade': quantidade,
+            'total': sum(duracoes),
+            'media': sum(duracoes) / quantidade,
+            'p50': duracoes[min(quantidade - 1, int(quantidade * 0.5))],
+            'p95': duracoes[min(quantidade - 1, int(quantidade * 0.95))],
+            'maximo': duracoes[-1],
+            'falhas': sum(1 for _, sucesso in tempos if not sucesso),
+            'baldes': [(limite, sum(1 for d in duracoes if d <= limite)) for limite in BALDES_SEGUNDOS],
+        }
+    return resumo
+
+def imprimir_etapas():
+    """Imprime o tempo gasto em cada etapa, da que mais consumiu para a que menos"""
+    resumo = resumo_etapas()
+    if not resumo:
+        return
+
+    print("\n⏱️ Tempo por etapa:")
+    for nome, stats in sorted(resumo.items(), key=lambda item: item[1]['total'], reverse=True):
+        print(f"   {nome:<24} {stats['quantidade']:>5}x | total {stats['total']:>7.2f}s | média {stats['media']:.2f}s | "
+              f"p95 {stats['p95']:.2f}s | máx {stats['maximo']:.2f}s | {stats['falhas']} falha(s)")
+
+# ========================================
+# ARQUIVOS DE MÉTRICAS
+# ========================================
+
+def _rotulo(valor):
+    """Escapa um valor de rótulo do formato texto do Prometheus"""
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def formatar_prometheus(monitor, resumo, duracao_execucao, instante):
+    """Histograma monitor_etapa_segundos por etapa, no formato texto do Prometheus (textfile do node_exporter)"""
+    linhas = [
+        "# TYPE monitor_etapa_segundos histogram",
+        "# HELP monitor_etapa_segundos Duração das etapas da última execução do monitor.",
+    ]
+    for nome, stats in sorted(resumo.items()):
+        rotulos = f'monitor="{_rotulo(monitor)}",etapa="{_rotulo(nome)}"'
+        for limite, acumulado in stats['baldes']:
+            linhas.append(f'monitor_etapa_segundos_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+        linhas.append(f'monitor_etapa_segundos_bucket{{{rotulos},le="+Inf"}} {stats["quantidade"]}')
+        linhas.append(f'monitor_etapa_segundos_sum{{{rotulos}}} {stats["total"]:.6f}')
+        linhas.append(f'monitor_etapa_segundos_count{{{rotulos}}} {stats["quantidade"]}')
+
+    linhas += ["# TYPE monitor_etapa_falhas_total counter",
+               "# HELP monitor_etapa_falhas_total Ocorrências da etapa que terminaram com exceção."]
+    for nome, stats in sorted(resumo.items()):
+        linhas.append(f'monitor_etapa_falhas_total{{monitor="{_rotulo(monitor)}",etapa="{_rotulo(nome)}"}} {stats["falhas"]}')
+
+    linhas += ["# TYPE monitor_execucao_segundos gauge",
+               "# HELP monitor_execucao_segundos Duração total da última execução.",
+               f'monitor_execucao_segundos{{monitor="{_rotulo(monitor)}"}} {duracao_execucao:.3f}',
+               "# TYPE monitor_ultima_execucao_timestamp_segundos gauge",
+               "# HELP monitor_ultima_execucao_timestamp_segundos Fim da última execução (epoch).",
+               f'monitor_ultima_execucao_timestamp_segundos{{monitor="{_rotulo(monitor)}"}} {instante:.0f}']
+    return "\n".join(linhas) + "\n"
+
+def _gravar_atomico(caminho, conteudo):
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(caminho + '.tmp', caminho)
+
+def gravar_metricas(monitor, pasta=METRICAS_PASTA, formatos=None):
+    """
+    Grava as métricas da execução no fim do monitor.
+
+    json: <monitor>.json (última execução) + uma linha em <monitor>_historico.jsonl
+    prometheus: <monitor>.prom, para o textfile collector do node_exporter
+    Retorna: lista de arquivos gravados (vazia se falhar; a execução não é interrompida)
+    """
+    formatos = formatos or METRICAS_FORMATOS
+    resumo = resumo_etapas()
+    instante = time.time()
+    duracao = instante - _inicio_execucao
+    gravados = []
+
+    try:
+        os.makedirs(pasta, exist_ok=True)
+
+        if 'json' in formatos:
+            registro = {
+                'monitor': monitor,
+                'fim': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(instante)),
+                'duracao_execucao': round(duracao, 3),
+                'etapas': {
+                    nome: {**{chave: round(valor, 4) if isinstance(valor, float) else valor
+                              for chave, valor in stats.items() if chave != 'baldes'},
+                           'histograma': {str(limite): acumulado for limite, acumulado in stats['baldes']}}
+                    for nome, stats in resumo.items()
+                },
+            }
+            caminho = os.path.join(pasta, f"{monitor}.json")
+            _gravar_atomico(caminho, json.dumps(registro, ensure_ascii=False, indent=2))
+            gravados.append(caminho)
+
+            historico = os.path.join(pasta, f"{monitor}_historico.jsonl")
+            linhas = []
+            if os.path.exists(historico):
+                with open(historico, encoding='utf-8') as arquivo:
+                    linhas = arquivo.read().splitlines()
+            linhas = (linhas + [json.dumps(registro, ensure_ascii=False)])[-METRICAS_HISTORICO_MAXIMO:]
+            _gravar_atomico(historico, "\n".join(linhas) + "\n")
+            gravados.append(historico)
+
+        if 'prometheus' in formatos:
+            caminho = os.path.join(pasta, f"{monitor}.prom")
+            _gravar_atomico(caminho, formatar_prometheus(monitor, resumo, duracao, instante))
+            gravados.append(caminho)
+
+        print(f"📈 Métricas gravadas: {', '.join(os.path.basename(c) for c in gravados)}")
+    except Exception as e:
+        print(f"⚠️ Erro ao gravar métricas: {e}")
+        return []
+
+    return gravados
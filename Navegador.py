@@ -0,0 +1,653 @@
+"""
+NAVEGADOR - Utilitários compartilhados pelos drivers Chrome dos monitores
+Bloqueio de recursos que os extratores não leem (imagens, fontes, mídia, analytics),
+esperas orientadas a eventos no lugar de sleeps fixos e perfil persistente do
+Chrome por monitor (cache, cookies e desafios já resolvidos entre execuções).
+
+Uso (comparação de bytes e tempo de carregamento com bloqueio ligado e desligado):
+    python Navegador.py comparar <url> [<url> ...] [--permitir imagem fonte]
+    python Navegador.py perfis [--resetar kabum-1 fortnite]   # estado dos perfis persistentes
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from collections import defaultdict
+
+# selenium é importado nas funções que o usam: os monitores importam este
+# módulo mesmo quando resolvem tudo via HTTP
+from Metricas import etapa
+
+# ========================================
+# BLOQUEIO DE RECURSOS
+# ========================================
+
+# Padrões do Network.setBlockedURLs por categoria ('*' é curinga)
+CATEGORIAS_BLOQUEIO = {
+    'imagem': [
+        '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.bmp',
+        '*.png?*', '*.jpg?*', '*.jpeg?*', '*.gif?*', '*.webp?*', '*.avif?*', '*.svg?*',
+    ],
+    'fonte': [
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+        '*.woff?*', '*.woff2?*', '*.ttf?*', '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+    ],
+    'midia': [
+        '*.mp4', '*.webm', '*.m3u8', '*.ts', '*.mp3', '*.ogg', '*.mov',
+        '*.mp4?*', '*.webm?*', '*.m3u8?*',
+    ],
+    'analytics': [
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*googlesyndication.com*', '*googleadservices.com*', '*connect.facebook.net*',
+        '*hotjar.com*', '*clarity.ms*', '*analytics.tiktok.com*', '*bat.bing.com*',
+        '*criteo.com*', '*criteo.net*', '*taboola.com*', '*outbrain.com*',
+        '*newrelic.com*', '*nr-data.net*', '*segment.io*', '*segment.com*',
+        '*sentry.io*', '*datadoghq.com*', '*rdstation.com*', '*onesignal.com*',
+    ],
+}
+
+# Desliga o bloqueio em todos os monitores (BLOQUEIO_RECURSOS=0)
+BLOQUEIO_ATIVO = os.environ.get('BLOQUEIO_RECURSOS', '1') != '0'
+
+def padroes_bloqueio(permitir=(), bloquear_extra=()):
+    """
+    Monta a lista de padrões bloqueados.
+
+    permitir: categorias de CATEGORIAS_BLOQUEIO que o monitor precisa carregar
+    bloquear_extra: padrões adicionais específicos do monitor
+    """
+    desconhecidas = set(permitir) - set(CATEGORIAS_BLOQUEIO)
+    if desconhecidas:
+        raise ValueError(f"Categorias de bloqueio desconhecidas: {', '.join(sorted(desconhecidas))}")
+
+    padroes = []
+    for categoria, lista in CATEGORIAS_BLOQUEIO.items():
+        if categoria not in permitir:
+            padroes.extend(lista)
+    padroes.extend(bloquear_extra)
+    return list(dict.fromkeys(padroes))
+
+def aplicar_opcoes_bloqueio(options, permitir=()):
+    """
+    Ajusta as opções do Chrome antes de criar o driver.
+
+    Imagens também são desligadas no renderer, o que cobre as que não têm
+    extensão na URL (CDNs com parâmetros, data de imagem via srcset etc.).
+    """
+    if BLOQUEIO_ATIVO and 'imagem' not in permitir:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+    return options
+
+def configurar_bloqueio(driver, permitir=(), bloquear_extra=()):
+    """
+    Ativa o bloqueio via CDP (Network.setBlockedURLs) em um driver já criado.
+
+    Retorna: quantidade de padrões bloqueados (0 se desativado ou sem suporte a CDP)
+    """
+    if not BLOQUEIO_ATIVO:
+        return 0
+
+    padroes = padroes_bloqueio(permitir, bloquear_extra)
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': padroes})
+    except Exception as e:
+        print(f"⚠️ Bloqueio de recursos indisponível: {str(e)[:100]}")
+        return 0
+
+    return len(padroes)
+
+# ========================================
+# PRONTIDÃO DA PÁGINA (ESPERAS POR EVENTO)
+# ========================================
+
+# Resolve quando o DOM passa arguments[0] ms sem mutações (ou no timeout arguments[1] ms)
+SCRIPT_DOM_ESTAVEL = """
+    const silencioMs = arguments[0];
+    const timeoutMs = arguments[1];
+    const concluir = arguments[arguments.length - 1];
+    const inicio = performance.now();
+    let temporizador = null;
+    let limite = null;
+
+    const finalizar = (estavel) => {
+        observer.disconnect();
+        clearTimeout(temporizador);
+        clearTimeout(limite);
+        concluir({estavel: estavel, ms: performance.now() - inicio});
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(temporizador);
+        temporizador = setTimeout(() => finalizar(true), silencioMs);
+    });
+
+    observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+    temporizador = setTimeout(() => finalizar(true), silencioMs);
+    limite = setTimeout(() => finalizar(false), timeoutMs);
+"""
+
+# Tempo real de cada espera, por nome: [(segundos, concluiu_antes_do_timeout)]
+TEMPOS_ESPERA = defaultdict(list)
+_lock_tempos = threading.Lock()
+
+def aplicar_carregamento_eager(options):
+    """driver.get retorna no DOMContentLoaded, sem esperar imagens e iframes"""
+    options.page_load_strategy = 'eager'
+    return options
+
+def registrar_espera(nome, segundos, sucesso):
+    """Registra quanto uma espera levou de fato (seguro entre threads)"""
+    with _lock_tempos:
+        TEMPOS_ESPERA[nome].append((segundos, sucesso))
+
+def aguardar_condicao(driver, condicao, nome, timeout=10, intervalo=0.2):
+    """
+    Espera explícita até condicao(driver) ser verdadeira.
+
+    Retorna: o valor da condição, ou None no timeout (sem lançar exceção)
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait  # importação pesada, só quando usada
+
+    inicio = time.perf_counter()
+    try:
+        resultado = WebDriverWait(driver, timeout, poll_frequency=intervalo).until(condicao)
+        registrar_espera(nome, time.perf_counter() - inicio, True)
+        return resultado
+    except TimeoutException:
+        registrar_espera(nome, time.perf_counter() - inicio, False)
+        return None
+
+def aguardar_seletor(driver, seletor, nome, timeout=10, visivel=False):
+    """Espera um seletor CSS aparecer (ou ficar visível) e retorna o elemento ou None"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+
+    condicao = EC.visibility_of_element_located if visivel else EC.presence_of_element_located
+    return aguardar_condicao(driver, condicao((By.CSS_SELECTOR, seletor)), nome, timeout)
+
+def aguardar_dom_estavel(driver, nome, silencio_ms=500, timeout=10):
+    """
+    Espera o DOM "assentar": nenhuma mutação por silencio_ms (MutationObserver).
+
+    Retorna: True se estabilizou antes do timeout
+    """
+    inicio = time.perf_counter()
+    try:
+        driver.set_script_timeout(timeout + 5)
+        resultado = driver.execute_async_script(SCRIPT_DOM_ESTAVEL, silencio_ms, timeout * 1000)
+        estavel = bool(resultado and resultado.get('estavel'))
+    except Exception:
+        estavel = False
+    registrar_espera(nome, time.perf_counter() - inicio, estavel)
+    return estavel
+
+def resumo_tempos_espera():
+    """
+    Estatísticas por tipo de espera.
+
+    Retorna: dict {nome: {'quantidade', 'media', 'p95', 'maximo', 'timeouts'}}
+    """
+    with _lock_tempos:
+        copia = {nome: list(tempos) for nome, tempos in TEMPOS_ESPERA.items()}
+
+    resumo = {}
+    for nome, tempos in copia.items():
+        duracoes = sorted(segundos for segundos, _ in tempos)
+        resumo[nome] = {
+            'quantidade': len(duracoes),
+            'media': sum(duracoes) / len(duracoes),
+            'p95': duracoes[min(len(duracoes) - 1, int(len(duracoes) * 0.95))],
+            'maximo': duracoes[-1],
+            'timeouts': sum(1 for _, sucesso in tempos if not sucesso),
+        }
+    return resumo
+
+def imprimir_tempos_espera():
+    """Imprime quanto cada tipo de espera levou de fato"""
+    resumo = resumo_tempos_espera()
+    if not resumo:
+        return
+
+    print("\n⏱️ Tempos de espera (reais):")
+    for nome, stats in sorted(resumo.items()):
+        print(f"   {nome:<32} {stats['quantidade']:>4}x | média {stats['media']:.2f}s | "
+              f"p95 {stats['p95']:.2f}s | máx {stats['maximo']:.2f}s | {stats['timeouts']} timeout(s)")
+
+# ========================================
+# PERFIL PERSISTENTE DO CHROME
+# ========================================
+
+# 1 = cada monitor reaproveita um user-data-dir próprio entre execuções (cache HTTP,
+# cookies, desafio do Cloudflare e login já resolvidos); 0 = perfil temporário
+PERFIL_PERSISTENTE = os.environ.get('PERFIL_PERSISTENTE', '0') == '1'
+PASTA_PERFIS = os.environ.get('PASTA_PERFIS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perfis_chrome'))
+
+# Limite do cache em disco passado ao Chrome e tamanho a partir do qual os caches
+# do perfil são esvaziados antes de abrir (cookies e preferências ficam)
+PERFIL_CACHE_MB = int(os.environ.get('PERFIL_CACHE_MB', '100'))
+PERFIL_TAMANHO_MAXIMO_MB = int(os.environ.get('PERFIL_TAMANHO_MAXIMO_MB', '300'))
+
+# Execuções seguidas sem encerramento limpo que levam a recriar o perfil
+PERFIL_MAX_SEM_ENCERRAMENTO = 3
+
+# Medições (início do driver e primeira página) guardadas por perfil
+PERFIL_HISTORICO_TEMPOS = 30
+
+ARQUIVO_METADADOS_PERFIL = 'monitor_perfil.json'
+ARQUIVOS_TRAVA_PERFIL = ('SingletonLock', 'SingletonSocket', 'SingletonCookie')
+ARQUIVOS_JSON_PERFIL = ('Local State', os.path.join('Default', 'Preferences'))
+PASTAS_CACHE_PERFIL = (
+    os.path.join('Default', 'Cache'),
+    os.path.join('Default', 'Code Cache'),
+    os.path.join('Default', 'GPUCache'),
+    os.path.join('Default', 'Service Worker', 'CacheStorage'),
+    'GrShaderCache',
+    'ShaderCache',
+)
+
+# Sessão atual de cada perfil: {nome: {'caminho', 'quente', 'inicio_driver', 'primeira_pagina'}}
+SESSOES_PERFIL = {}
+_perfil_do_driver = {}
+_lock_perfis = threading.Lock()
+
+def caminho_perfil(nome):
+    return os.path.join(PASTA_PERFIS, nome)
+
+def tamanho_pasta_mb(caminho):
+    """Tamanho total dos arquivos da pasta (MB)"""
+    total = 0
+    for raiz, _, arquivos in os.walk(caminho):
+        for arquivo in arquivos:
+            try:
+                total += os.path.getsize(os.path.join(raiz, arquivo))
+            except OSError:
+                pass
+    return total / (1024 * 1024)
+
+def ler_metadados_perfil(caminho):
+    """Metadados do perfil (execuções, encerramentos e tempos medidos)"""
+    try:
+        with open(os.path.join(caminho, ARQUIVO_METADADOS_PERFIL), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {'execucoes': 0, 'sem_encerramento': 0, 'resets': 0, 'tempos': []}
+
+def salvar_metadados_perfil(caminho, metadados):
+    """Grava os metadados de forma atômica (arquivo temporário + rename)"""
+    os.makedirs(caminho, exist_ok=True)
+    destino = os.path.join(caminho, ARQUIVO_METADADOS_PERFIL)
+    with open(destino + '.tmp', 'w', encoding='utf-8') as arquivo:
+        json.dump(metadados, arquivo, ensure_ascii=False, indent=2)
+    os.replace(destino + '.tmp', destino)
+
+def diagnosticar_perfil(caminho, metadados):
+    """
+    Procura sinais de perfil corrompido.
+
+    Retorna: motivo (str) ou None se o perfil parece íntegro
+    """
+    for relativo in ARQUIVOS_JSON_PERFIL:
+        arquivo = os.path.join(caminho, relativo)
+        if not os.path.exists(arquivo):
+            continue
+        try:
+            with open(arquivo, encoding='utf-8') as f:
+                json.load(f)
+        except (OSError, ValueError):
+            return f"'{relativo}' ilegível"
+
+    if metadados.get('sem_encerramento', 0) >= PERFIL_MAX_SEM_ENCERRAMENTO:
+        return f"{metadados['sem_encerramento']} execuções seguidas sem encerramento limpo"
+    return None
+
+def resetar_perfil(nome, motivo):
+    """Apaga o perfil e recomeça do zero, mantendo o histórico de tempos"""
+    caminho = caminho_perfil(nome)
+    metadados = ler_metadados_perfil(caminho)
+    shutil.rmtree(caminho, ignore_errors=True)
+
+    with _lock_perfis:
+        sessao = SESSOES_PERFIL.get(nome)
+        if sessao:
+            sessao['quente'] = False
+    metadados.update({'execucoes': 0, 'sem_encerramento': 1 if sessao else 0,
+                      'resets': metadados.get('resets', 0) + 1, 'ultimo_reset': motivo})
+    salvar_metadados_perfil(caminho, metadados)
+    print(f"   ♻️ Perfil '{nome}' recriado: {motivo}")
+
+def limitar_cache_perfil(caminho):
+    """Esvazia os caches do perfil quando ele passa de PERFIL_TAMANHO_MAXIMO_MB"""
+    tamanho = tamanho_pasta_mb(caminho)
+    if tamanho <= PERFIL_TAMANHO_MAXIMO_MB:
+        return 0.0
+
+    for relativo in PASTAS_CACHE_PERFIL:
+        shutil.rmtree(os.path.join(caminho, relativo), ignore_errors=True)
+    liberado = tamanho - tamanho_pasta_mb(caminho)
+    print(f"   🧹 Cache do perfil esvaziado: {tamanho:.0f} MB > {PERFIL_TAMANHO_MAXIMO_MB} MB ({liberado:.0f} MB liberados)")
+    return liberado
+
+def preparar_perfil(nome):
+    """
+    Deixa o perfil pronto para abrir: remove travas de uma execução que caiu,
+    recria o perfil se estiver corrompido e limita o cache.
+
+    Retorna: caminho do user-data-dir
+    """
+    caminho = caminho_perfil(nome)
+    os.makedirs(caminho, exist_ok=True)
+
+    for trava in ARQUIVOS_TRAVA_PERFIL:
+        try:
+            os.remove(os.path.join(caminho, trava))  # symlinks órfãos deixados pelo Chrome
+        except OSError:
+            pass
+
+    metadados = ler_metadados_perfil(caminho)
+    motivo = diagnosticar_perfil(caminho, metadados)
+    if motivo:
+        resetar_perfil(nome, motivo)
+        metadados = ler_metadados_perfil(caminho)
+    limitar_cache_perfil(caminho)
+
+    quente = metadados.get('execucoes', 0) > 0 and os.path.isdir(os.path.join(caminho, 'Default'))
+    with _lock_perfis:
+        nova_sessao = SESSOES_PERFIL.get(nome, {}).get('caminho') != caminho
+    if nova_sessao:  # nova tentativa de abrir o Chrome na mesma execução não conta de novo
+        metadados['sem_encerramento'] = metadados.get('sem_encerramento', 0) + 1
+        salvar_metadados_perfil(caminho, metadados)
+
+    with _lock_perfis:
+        SESSOES_PERFIL[nome] = {'caminho': caminho, 'quente': quente, 'inicio_driver': None, 'primeira_pagina': None}
+    return caminho
+
+def aplicar_perfil(options, nome):
+    """
+    Aponta o Chrome para o perfil persistente do monitor (se PERFIL_PERSISTENTE).
+
+    Retorna: caminho do perfil, ou None no modo de perfil temporário
+    """
+    if not PERFIL_PERSISTENTE:
+        with _lock_perfis:
+            SESSOES_PERFIL.setdefault(nome, {'caminho': None, 'quente': False, 'inicio_driver': None,
+                                             'primeira_pagina': None})
+        return None
+
+    caminho = preparar_perfil(nome)
+    options.add_argument(f'--user-data-dir={caminho}')
+    options.add_argument(f'--disk-cache-size={PERFIL_CACHE_MB * 1024 * 1024}')
+    return caminho
+
+def perfil_quente(nome):
+    """True se a sessão atual abriu um perfil já usado por execuções anteriores"""
+    with _lock_perfis:
+        return bool(SESSOES_PERFIL.get(nome, {}).get('quente'))
+
+def registrar_tempo_perfil(nome, etapa, segundos):
+    """Registra 'inicio_driver' ou 'primeira_pagina' da sessão atual (só a primeira medição vale)"""
+    with _lock_perfis:
+        sessao = SESSOES_PERFIL.setdefault(nome, {'caminho': None, 'quente': False, 'inicio_driver': None,
+                                                  'primeira_pagina': None})
+        if sessao.get(etapa) is None:
+            sessao[etapa] = segundos
+
+def iniciar_driver_perfil(nome, criar_driver):
+    """
+    Cria o driver com criar_driver() (que chama aplicar_perfil) medindo o início.
+
+    Se o Chrome não abrir com o perfil persistente, o perfil é recriado e a
+    criação é tentada mais uma vez.
+    """
+    inicio = time.perf_counter()
+    try:
+        with etapa('inicio_driver'):
+            driver = criar_driver()
+    except Exception as e:
+        if not PERFIL_PERSISTENTE:
+            raise
+        resetar_perfil(nome, f"Chrome não abriu com o perfil ({str(e)[:80]})")
+        inicio = time.perf_counter()
+        with etapa('inicio_driver'):
+            driver = criar_driver()
+
+    registrar_tempo_perfil(nome, 'inicio_driver', time.perf_counter() - inicio)
+    with _lock_perfis:
+        _perfil_do_driver[id(driver)] = nome
+    return driver
+
+def carregar_pagina(driver, url):
+    """driver.get que mede a primeira página aberta por um driver de iniciar_driver_perfil"""
+    inicio = time.perf_counter()
+    with etapa('carregamento_pagina'):
+        driver.get(url)
+    with _lock_perfis:
+        nome = _perfil_do_driver.get(id(driver))
+    if nome:
+        registrar_tempo_perfil(nome, 'primeira_pagina', time.perf_counter() - inicio)
+
+def finalizar_perfil(nome, driver=None):
+    """
+    Marca o encerramento limpo (chamar depois do driver.quit) e guarda os tempos
+    da sessão no histórico do perfil.
+    """
+    with _lock_perfis:
+        sessao = SESSOES_PERFIL.get(nome)
+        if driver is not None:
+            _perfil_do_driver.pop(id(driver), None)
+    if not sessao or not sessao['caminho']:
+        return
+
+    metadados = ler_metadados_perfil(sessao['caminho'])
+    metadados['execucoes'] = metadados.get('execucoes', 0) + 1
+    metadados['sem_encerramento'] = 0
+    metadados['tempos'] = (metadados.get('tempos', []) + [{
+        'data': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'quente': sessao['quente'],
+        'inicio_driver': sessao['inicio_driver'],
+        'primeira_pagina': sessao['primeira_pagina'],
+    }])[-PERFIL_HISTORICO_TEMPOS:]
+    salvar_metadados_perfil(sessao['caminho'], metadados)
+
+def _media(valores):
+    valores = [v for v in valores if v is not None]
+    return sum(valores) / len(valores) if valores else None
+
+def relatorio_perfis():
+    """
+    Tempos da sessão atual e economia média do perfil quente sobre o frio
+    (perfil novo ou recém-recriado), a partir do histórico de cada perfil.
+
+    Retorna: {nome: {'quente', 'inicio_driver', 'primeira_pagina', 'economia_inicio',
+                     'economia_pagina', 'frias', 'quentes', 'tamanho_mb'}}
+    """
+    with _lock_perfis:
+        sessoes = {nome: dict(sessao) for nome, sessao in SESSOES_PERFIL.items()}
+
+    relatorio = {}
+    for nome, sessao in sessoes.items():
+        tempos = ler_metadados_perfil(sessao['caminho'])['tempos'] if sessao['caminho'] else []
+        frias = [t for t in tempos if not t['quente']]
+        quentes = [t for t in tempos if t['quente']]
+        economia = {}
+        for etapa in ('inicio_driver', 'primeira_pagina'):
+            fria, quente = _media(t[etapa] for t in frias), _media(t[etapa] for t in quentes)
+            economia[etapa] = fria - quente if fria is not None and quente is not None else None
+        relatorio[nome] = {
+            'quente': sessao['quente'],
+            'inicio_driver': sessao['inicio_driver'],
+            'primeira_pagina': sessao['primeira_pagina'],
+            'economia_inicio': economia['inicio_driver'],
+            'economia_pagina': economia['primeira_pagina'],
+            'frias': len(frias),
+            'quentes': len(quentes),
+            'tamanho_mb': tamanho_pasta_mb(sessao['caminho']) if sessao['caminho'] else None,
+        }
+    return relatorio
+
+def imprimir_relatorio_perfis():
+    """Imprime o início do driver, a primeira página e quanto o perfil quente economiza"""
+    relatorio = relatorio_perfis()
+    if not relatorio:
+        return
+
+    formatar = lambda segundos: f"{segundos:.2f}s" if segundos is not None else "—"
+    print("\n🗂️ Perfis do Chrome:")
+    for nome, dados in sorted(relatorio.items()):
+        if dados['tamanho_mb'] is None:
+            estado = "temporário"
+        else:
+            estado = f"{'🔥 quente' if dados['quente'] else '🧊 frio'}, {dados['tamanho_mb']:.0f} MB"
+        linha = (f"   {nome:<20} {estado} | início do driver {formatar(dados['inicio_driver'])} | "
+                 f"1ª página {formatar(dados['primeira_pagina'])}")
+        if dados['economia_inicio'] is not None or dados['economia_pagina'] is not None:
+            linha += (f" | economia média do perfil quente: início {formatar(dados['economia_inicio'])}, "
+                      f"1ª página {formatar(dados['economia_pagina'])} "
+                      f"({dados['quentes']} quente(s) x {dados['frias']} fria(s))")
+        print(linha)
+
+# ========================================
+# MEDIÇÃO DE BYTES E TEMPO POR PÁGINA
+# ========================================
+
+def habilitar_log_performance(options):
+    """Liga o log de performance (eventos de rede do CDP) nas opções do Chrome"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+def medir_rede(driver):
+    """
+    Soma os bytes recebidos a partir do log de performance do Chrome.
+
+    Consome o log: chame uma vez antes da página (para descartar o que havia)
+    e outra depois dela.
+    Retorna: {'bytes': int, 'requisicoes': int, 'bloqueadas': int}
+    """
+    total_bytes = 0
+    requisicoes = 0
+    bloqueadas = 0
+
+    for entrada in driver.get_log('performance'):
+        try:
+            mensagem = json.loads(entrada['message'])['message']
+        except (KeyError, ValueError):
+            continue
+
+        metodo = mensagem.get('method')
+        if metodo == 'Network.loadingFinished':
+            total_bytes += int(mensagem['params'].get('encodedDataLength', 0))
+            requisicoes += 1
+        elif metodo == 'Network.loadingFailed' and mensagem['params'].get('blockedReason'):
+            bloqueadas += 1
+
+    return {'bytes': total_bytes, 'requisicoes': requisicoes, 'bloqueadas': bloqueadas}
+
+def medir_pagina(driver, url):
+    """Carrega a página e retorna bytes recebidos e tempo de carregamento"""
+    medir_rede(driver)
+    inicio = time.perf_counter()
+    driver.get(url)
+    tempo = time.perf_counter() - inicio
+    metricas = medir_rede(driver)
+    metricas['tempo'] = tempo
+    return metricas
+
+def criar_driver_medicao(bloquear, permitir=()):
+    """Cria um Chrome headless com log de performance e, opcionalmente, bloqueio"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    habilitar_log_performance(options)
+    if bloquear:
+        aplicar_opcoes_bloqueio(options, permitir)
+
+    driver = webdriver.Chrome(options=options)
+    driver.execute_cdp_cmd('Network.enable', {})
+    if bloquear:
+        configurar_bloqueio(driver, permitir)
+    return driver
+
+def comparar_bloqueio(urls, permitir=()):
+    """
+    Carrega cada URL com bloqueio desligado e ligado (cache limpo em ambos)
+    e imprime bytes recebidos e tempo de carregamento.
+
+    Retorna: lista de dicts {url, sem_bloqueio, com_bloqueio}
+    """
+    resultados = []
+
+    print("\n" + "="*110)
+    print("🧱 BLOQUEIO DE RECURSOS - COMPARAÇÃO POR PÁGINA".center(110))
+    print("="*110)
+    print(f"   Categorias permitidas: {', '.join(permitir) if permitir else 'nenhuma'}\n")
+
+    for url in urls:
+        medicoes = {}
+        for bloquear in (False, True):
+            driver = criar_driver_medicao(bloquear, permitir)
+            try:
+                medicoes['com_bloqueio' if bloquear else 'sem_bloqueio'] = medir_pagina(driver, url)
+            finally:
+                driver.quit()
+
+        sem, com = medicoes['sem_bloqueio'], medicoes['com_bloqueio']
+        economia_bytes = (1 - com['bytes'] / sem['bytes']) * 100 if sem['bytes'] else 0.0
+        economia_tempo = (1 - com['tempo'] / sem['tempo']) * 100 if sem['tempo'] else 0.0
+
+        print(f"🔗 {url[:100]}")
+        print(f"   Sem bloqueio: {sem['bytes'] / 1024:>10.1f} KB | {sem['requisicoes']:>4} req | {sem['tempo']:>6.2f}s")
+        print(f"   Com bloqueio: {com['bytes'] / 1024:>10.1f} KB | {com['requisicoes']:>4} req | {com['tempo']:>6.2f}s | {com['bloqueadas']} bloqueada(s)")
+        print(f"   Economia: {economia_bytes:.1f}% dos bytes | {economia_tempo:.1f}% do tempo")
+        print("-"*110)
+
+        resultados.append({'url': url, **medicoes})
+
+    return resultados
+
+# ========================================
+# EXECUÇÃO
+# ========================================
+
+def listar_perfis(resetar=()):
+    """Estado dos perfis em PASTA_PERFIS (recriando os informados em resetar)"""
+    for nome in resetar:
+        resetar_perfil(nome, "pedido na linha de comando")
+
+    nomes = sorted(os.listdir(PASTA_PERFIS)) if os.path.isdir(PASTA_PERFIS) else []
+    print(f"\n🗂️ Perfis em {PASTA_PERFIS} (persistente: {'sim' if PERFIL_PERSISTENTE else 'não'})")
+    for nome in nomes:
+        caminho = caminho_perfil(nome)
+        metadados = ler_metadados_perfil(caminho)
+        motivo = diagnosticar_perfil(caminho, metadados)
+        print(f"   {nome:<20} {tamanho_pasta_mb(caminho):>7.0f} MB | {metadados.get('execucoes', 0)} execução(ões) | "
+              f"{metadados.get('resets', 0)} reset(s) | {'⚠️ ' + motivo if motivo else '✅ íntegro'}")
+    if not nomes:
+        print("   (nenhum perfil)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Utilitários de navegador dos monitores")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    comparar = subcomandos.add_parser("comparar", help="Compara bytes e tempo com e sem bloqueio de recursos")
+    comparar.add_argument("urls", nargs="+")
+    comparar.add_argument("--permitir", nargs="*", default=[], choices=sorted(CATEGORIAS_BLOQUEIO))
+
+    perfis = subcomandos.add_parser("perfis", help="Mostra (ou recria) os perfis persistentes do Chrome")
+    perfis.add_argument("--resetar", nargs="+", metavar="PERFIL", default=[])
+
+    args = parser.parse_args()
+    if args.comando == "perfis":
+        listar_perfis(args.resetar)
+    else:
+        comparar_bloqueio(args.urls, tuple(args.permitir))
+
+if __name__ == "__main__":
+    main()
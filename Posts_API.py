@@ -1,12 +1,13 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import smtplib
 from email.message import EmailMessage
 from datetime import datetime
 import os
+from Navegador import (aplicar_opcoes_bloqueio, configurar_bloqueio, aplicar_carregamento_eager, aplicar_perfil,
+                       iniciar_driver_perfil, carregar_pagina, finalizar_perfil, imprimir_relatorio_perfis)
+from Metricas import etapa, imprimir_etapas, gravar_metricas
 
 # === CONFIGURAÇÕES VIA VARIÁVEIS DE AMBIENTE ===
 EMAIL_REMETENTE = os.environ.get('EMAIL_APP_P')
@@ -14,6 +15,12 @@ SENHA_APP = os.environ.get('SENHA_APP_P')
 
 DESTINATARIOS = [EMAIL_REMETENTE]  # Envia para o mesmo email
 
+# Categorias de recursos que o Chrome carrega (só o título do primeiro post é lido)
+BLOQUEIO_PERMITIR = ()
+
+# Perfil persistente do Chrome (Navegador.PERFIL_PERSISTENTE)
+PERFIL_CHROME = 'posts'
+
 def enviar_email(assunto, corpo_texto, url=None, esperado=None, encontrado=None, erro=None):
     """Envia email de alerta"""
     msg = EmailMessage()
@@ -53,7 +60,7 @@ def enviar_email(assunto, corpo_texto, url=None, esperado=None, encontrado=None,
     msg.add_alternative(html, subtype='html')
 
     try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
+        with etapa('envio_smtp'), smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
             smtp.login(EMAIL_REMETENTE, SENHA_APP)
             smtp.send_message(msg)
         print("📧 Email enviado com sucesso ✅")
@@ -63,39 +70,41 @@ def enviar_email(assunto, corpo_texto, url=None, esperado=None, encontrado=None,
         return False
 
 # === SETUP DO DRIVER ===
-chrome_options = Options()
-chrome_options.add_argument("--headless=new")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-chrome_options.add_argument("--disable-gpu")
-chrome_options.add_argument("--log-level=3")
-chrome_options.add_argument(
-    "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-)
-
-driver = webdriver.Chrome(options=chrome_options)
-wait = WebDriverWait(driver, 20)
-
-print("\n" + "="*70)
-print("🤖 Sistema de Monitoramento de Posts Iniciado")
-print("="*70)
-print(f"📧 Email configurado: {EMAIL_REMETENTE}")
-print(f"🌐 Ambiente: {'CI/CD' if os.environ.get('CI') else 'Local'}")
-print("="*70 + "\n")
+def inicializar_driver():
+    """Inicializa o Chrome em modo headless (chamado só pelo main)"""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_argument(
+        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+    )
+    aplicar_opcoes_bloqueio(chrome_options, BLOQUEIO_PERMITIR)
+    aplicar_carregamento_eager(chrome_options)  # a espera explícita pelo título já cobre o resto
+    aplicar_perfil(chrome_options, PERFIL_CHROME)
+
+    driver = iniciar_driver_perfil(PERFIL_CHROME, lambda: webdriver.Chrome(options=chrome_options))
+    configurar_bloqueio(driver, BLOQUEIO_PERMITIR)
+    return driver
 
 # === FUNÇÃO DE VERIFICAÇÃO ===
-def verificar_primeiro_resultado(busca_url, texto_esperado):
+def verificar_primeiro_resultado(driver, wait, busca_url, texto_esperado):
     """Verifica se o primeiro resultado corresponde ao texto esperado"""
+    from selenium.webdriver.support import expected_conditions as EC
+
     print("\n" + "="*60)
     print(f"🔍 Verificando: {texto_esperado}")
     print(f"🌐 URL: {busca_url}")
     
     try:
-        driver.get(busca_url)
+        carregar_pagina(driver, busca_url)
         wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "article .read-title a")))
 
-        element = driver.find_element(By.CSS_SELECTOR, "article .read-title a")
-        texto = element.text.strip()
+        with etapa('extracao'):
+            element = driver.find_element(By.CSS_SELECTOR, "article .read-title a")
+            texto = element.text.strip()
 
         if texto == texto_esperado:
             print(f"✅ Primeiro resultado corresponde: '{texto}'")
@@ -128,25 +137,48 @@ def verificar_primeiro_resultado(busca_url, texto_esperado):
     print("="*60)
 
 # === VERIFICAÇÕES ===
-try:
-    verificar_primeiro_resultado(
-        busca_url="https://packsparapobres.com/?s=sailorscholar",
-        texto_esperado="#Sailorscholar – Christmas Frieren & Fern"
-    )
+def main():
+    """Abre o navegador e verifica cada busca monitorada"""
+    from selenium.webdriver.support.ui import WebDriverWait
 
-    verificar_primeiro_resultado(
-        busca_url="https://packsparapobres.com/?s=Natylikespizza",
-        texto_esperado="Natylikespizza – Panty"
-    )
+    driver = inicializar_driver()
+    wait = WebDriverWait(driver, 20)
 
     print("\n" + "="*70)
-    print("✅ Monitoramento concluído com sucesso!")
+    print("🤖 Sistema de Monitoramento de Posts Iniciado")
+    print("="*70)
+    print(f"📧 Email configurado: {EMAIL_REMETENTE}")
+    print(f"🌐 Ambiente: {'CI/CD' if os.environ.get('CI') else 'Local'}")
     print("="*70 + "\n")
 
-except KeyboardInterrupt:
-    print("\n⚠️ Execução interrompida pelo usuário")
-except Exception as e:
-    print(f"\n❌ Erro crítico: {e}")
-finally:
-    driver.quit()
-    print("🔒 Navegador fechado\n")
+    try:
+        verificar_primeiro_resultado(
+            driver, wait,
+            busca_url="https://packsparapobres.com/?s=sailorscholar",
+            texto_esperado="#Sailorscholar – Christmas Frieren & Fern"
+        )
+
+        verificar_primeiro_resultado(
+            driver, wait,
+            busca_url="https://packsparapobres.com/?s=Natylikespizza",
+            texto_esperado="Natylikespizza – Panty"
+        )
+
+        print("\n" + "="*70)
+        print("✅ Monitoramento concluído com sucesso!")
+        print("="*70 + "\n")
+
+    except KeyboardInterrupt:
+        print("\n⚠️ Execução interrompida pelo usuário")
+    except Exception as e:
+        print(f"\n❌ Erro crítico: {e}")
+    finally:
+        driver.quit()
+        finalizar_perfil(PERFIL_CHROME, driver)
+        imprimir_relatorio_perfis()
+        imprimir_etapas()
+        gravar_metricas('posts')
+        print("🔒 Navegador fechado\n")
+
+if __name__ == "__main__":
+    main()
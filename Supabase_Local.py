@@ -0,0 +1,610 @@
+"""
+SUPABASE LOCAL - Servidor compatível com o subconjunto do PostgREST usado pelos monitores
+Permite exercitar e medir a camada de persistência sem o serviço real.
+
+Uso:
+    python Supabase_Local.py servir [--porta 54321] [--db supabase_local.sqlite3]
+    python Supabase_Local.py benchmark [--tamanhos 20 1000 10000]
+
+Com o servidor rodando, aponte SUPABASE_URL para http://127.0.0.1:<porta> e use
+qualquer SUPABASE_KEY no formato de JWT (ex.: "local.supabase.standin").
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+PORTA_PADRAO = 54321
+CHAVE_LOCAL = "local.supabase.standin"
+
+# Esquema inicial das tabelas do monitor KaBuM (colunas novas são criadas sob demanda)
+ESQUEMA_INICIAL = {
+    "Monitoramento Kabum": {
+        "product_key": "TEXT",
+        "nome": "TEXT",
+        "url": "TEXT",
+        "preco_atual": "REAL",
+        "status": "TEXT",
+        "data_coleta": "TEXT",
+        "run_id": "TEXT",
+    },
+    "Menores Preços Kabum": {
+        "product_key": "TEXT UNIQUE",
+        "nome": "TEXT",
+        "url": "TEXT",
+        "preco_atual": "REAL",
+        "status": "TEXT",
+        "data_coleta": "TEXT",
+    },
+    "Estado Kabum": {
+        "product_key": "TEXT UNIQUE",
+        "nome": "TEXT",
+        "url": "TEXT",
+        "preco_atual": "REAL",
+        "status": "TEXT",
+        "data_coleta": "TEXT",
+        "run_id": "TEXT",
+        "ultima_verificacao": "TEXT",
+    },
+    "Resumo Diário Kabum": {
+        "chave_dia": "TEXT UNIQUE",
+        "product_key": "TEXT",
+        "dia": "TEXT",
+        "preco_minimo": "REAL",
+        "preco_maximo": "REAL",
+        "preco_abertura": "REAL",
+        "preco_fechamento": "REAL",
+        "amostras": "INTEGER",
+        "amostras_disponivel": "INTEGER",
+        "razao_disponibilidade": "REAL",
+        "ultima_coleta": "TEXT",
+        "ultimo_run_id": "TEXT",
+    },
+}
+
+# Parâmetros de query que não são filtros
+PARAMETROS_RESERVADOS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+OPERADORES = {
+    "eq": "=",
+    "neq": "<>",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+}
+
+class ErroPostgrest(Exception):
+    """Erro devolvido ao cliente no formato de erro do PostgREST"""
+
+    def __init__(self, mensagem, status=400, codigo="PGRST100"):
+        super().__init__(mensagem)
+        self.status = status
+        self.codigo = codigo
+
+# ========================================
+# BANCO SQLITE
+# ========================================
+
+def citar(identificador):
+    """Cita um identificador SQL (nomes de tabela têm espaço e acento)"""
+    return '"' + identificador.replace('"', '""') + '"'
+
+def tipo_sqlite(valor):
+    """Afinidade da coluna criada sob demanda, a partir do primeiro valor recebido"""
+    if isinstance(valor, bool):
+        return "INTEGER"
+    if isinstance(valor, (int, float)):
+        return "REAL"
+    if isinstance(valor, (dict, list)):
+        return "TEXT"
+    return "TEXT" if valor is not None else ""
+
+def valor_sqlite(valor):
+    """Converte valores JSON para o SQLite (objetos e listas viram texto JSON)"""
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+class BancoLocal:
+    """Tabelas do PostgREST emuladas em um único banco SQLite"""
+
+    def __init__(self, caminho=":memory:"):
+        self.caminho = caminho
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if caminho != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.colunas = {}
+        self._carregar_colunas()
+        for tabela, colunas in ESQUEMA_INICIAL.items():
+            self.garantir_tabela(tabela, colunas)
+
+    def _carregar_colunas(self):
+        """Lê as tabelas e colunas já existentes no arquivo"""
+        tabelas = [linha[0] for linha in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        for tabela in tabelas:
+            if tabela.startswith("sqlite_"):
+                continue
+            self.colunas[tabela] = {linha[1] for linha in self.conn.execute(f"PRAGMA table_info({citar(tabela)})")}
+
+    def garantir_tabela(self, tabela, colunas):
+        """Cria a tabela e as colunas que ainda não existem"""
+        if tabela not in self.colunas:
+            self.conn.execute(f"CREATE TABLE {citar(tabela)} (id INTEGER PRIMARY KEY AUTOINCREMENT)")
+            self.colunas[tabela] = {"id"}
+
+        for coluna, tipo in colunas.items():
+            if coluna in self.colunas[tabela]:
+                continue
+            restricao_unica = tipo.endswith("UNIQUE")
+            tipo = tipo.replace("UNIQUE", "").strip()
+            self.conn.execute(f"ALTER TABLE {citar(tabela)} ADD COLUMN {citar(coluna)} {tipo}")
+            if restricao_unica:
+                self.garantir_indice_unico(tabela, coluna)
+            self.colunas[tabela].add(coluna)
+        self.conn.commit()
+
+    def garantir_indice_unico(self, tabela, coluna):
+        """Cria o índice único exigido por um upsert com on_conflict"""
+        nome_indice = citar(f"uq_{tabela}_{coluna}")
+        self.conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {nome_indice} ON {citar(tabela)} ({citar(coluna)})")
+
+    def resetar(self):
+        """Apaga todas as tabelas e recria o esquema inicial"""
+        with self.lock:
+            for tabela in list(self.colunas):
+                self.conn.execute(f"DROP TABLE IF EXISTS {citar(tabela)}")
+            self.conn.commit()
+            self.colunas = {}
+            for tabela, colunas in ESQUEMA_INICIAL.items():
+                self.garantir_tabela(tabela, colunas)
+
+    def _validar_colunas(self, tabela, colunas):
+        desconhecidas = [coluna for coluna in colunas if coluna not in self.colunas.get(tabela, set())]
+        if desconhecidas:
+            raise ErroPostgrest(f"Could not find the '{desconhecidas[0]}' column of '{tabela}'", 400, "PGRST204")
+
+    def selecionar(self, tabela, colunas, filtro, ordem, limite, offset):
+        with self.lock:
+            if tabela not in self.colunas:
+                raise ErroPostgrest(f"relation \"{tabela}\" does not exist", 404, "42P01")
+
+            colunas_sql = "*" if colunas == ["*"] else ", ".join(citar(coluna) for coluna in colunas)
+            if colunas != ["*"]:
+                self._validar_colunas(tabela, colunas)
+
+            where_sql, parametros = filtro.sql(self, tabela)
+            sql = f"SELECT {colunas_sql} FROM {citar(tabela)}"
+            if where_sql:
+                sql += f" WHERE {where_sql}"
+            if ordem:
+                self._validar_colunas(tabela, [coluna for coluna, _, _ in ordem])
+                sql += " ORDER BY " + ", ".join(
+                    f"{citar(coluna)} {direcao}" + (f" NULLS {nulls}" if nulls else "")
+                    for coluna, direcao, nulls in ordem
+                )
+            if limite is not None:
+                sql += " LIMIT ?"
+                parametros.append(limite)
+                if offset:
+                    sql += " OFFSET ?"
+                    parametros.append(offset)
+
+            return [dict(linha) for linha in self.conn.execute(sql, parametros)]
+
+    def inserir(self, tabela, linhas, on_conflict=None, resolucao=None):
+        if not linhas:
+            return []
+
+        with self.lock:
+            colunas = list(dict.fromkeys(coluna for linha in linhas for coluna in linha))
+            tipos = {}
+            for coluna in colunas:
+                primeiro = next((linha[coluna] for linha in linhas if linha.get(coluna) is not None), None)
+                tipos[coluna] = tipo_sqlite(primeiro)
+            self.garantir_tabela(tabela, tipos)
+
+            sql = (f"INSERT INTO {citar(tabela)} ({', '.join(citar(c) for c in colunas)}) "
+                   f"VALUES ({', '.join('?' for _ in colunas)})")
+
+            if on_conflict:
+                self._validar_colunas(tabela, [on_conflict])
+                self.garantir_indice_unico(tabela, on_conflict)
+                atualizaveis = [c for c in colunas if c != on_conflict]
+                if resolucao == "ignore-duplicates" or not atualizaveis:
+                    sql += f" ON CONFLICT ({citar(on_conflict)}) DO NOTHING"
+                else:
+                    sql += (f" ON CONFLICT ({citar(on_conflict)}) DO UPDATE SET "
+                            + ", ".join(f"{citar(c)} = excluded.{citar(c)}" for c in atualizaveis))
+            sql += " RETURNING *"
+
+            retornadas = []
+            try:
+                for linha in linhas:
+                    cursor = self.conn.execute(sql, [valor_sqlite(linha.get(coluna)) for coluna in colunas])
+                    retornadas.extend(dict(r) for r in cursor.fetchall())
+                self.conn.commit()
+            except sqlite3.IntegrityError as e:
+                self.conn.rollback()
+                raise ErroPostgrest(str(e), 409, "23505")
+
+            return retornadas
+
+    def atualizar(self, tabela, valores, filtro):
+        with self.lock:
+            if tabela not in self.colunas:
+                raise ErroPostgrest(f"relation \"{tabela}\" does not exist", 404, "42P01")
+            self._validar_colunas(tabela, list(valores))
+
+            where_sql, parametros_where = filtro.sql(self, tabela)
+            sql = f"UPDATE {citar(tabela)} SET " + ", ".join(f"{citar(c)} = ?" for c in valores)
+            if where_sql:
+                sql += f" WHERE {where_sql}"
+            sql += " RETURNING *"
+
+            cursor = self.conn.execute(sql, [valor_sqlite(v) for v in valores.values()] + parametros_where)
+            retornadas = [dict(r) for r in cursor.fetchall()]
+            self.conn.commit()
+            return retornadas
+
+# ========================================
+# FILTROS DO POSTGREST
+# ========================================
+
+def dividir_nivel_superior(texto):
+    """Divide 'a,b(c,d),"e,f"' por vírgulas fora de parênteses e aspas"""
+    partes, atual, profundidade, entre_aspas = [], "", 0, False
+    for caractere in texto:
+        if caractere == '"':
+            entre_aspas = not entre_aspas
+        elif not entre_aspas and caractere == "(":
+            profundidade += 1
+        elif not entre_aspas and caractere == ")":
+            profundidade -= 1
+        elif not entre_aspas and profundidade == 0 and caractere == ",":
+            partes.append(atual)
+            atual = ""
+            continue
+        atual += caractere
+    if atual:
+        partes.append(atual)
+    return partes
+
+def remover_aspas(valor):
+    if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+        return valor[1:-1]
+    return valor
+
+class Condicao:
+    """Filtro simples 'coluna=operador.valor' (com 'not.' opcional)"""
+
+    def __init__(self, coluna, expressao):
+        self.coluna = coluna
+        self.negado = expressao.startswith("not.")
+        if self.negado:
+            expressao = expressao[4:]
+        operador, _, valor = expressao.partition(".")
+        if operador not in OPERADORES and operador not in ("in", "is"):
+            raise ErroPostgrest(f"operador não suportado: {operador}")
+        self.operador = operador
+        self.valor = valor
+
+    def sql(self, banco, tabela):
+        banco._validar_colunas(tabela, [self.coluna])
+        coluna = citar(self.coluna)
+
+        if self.operador == "in":
+            valores = [remover_aspas(v) for v in dividir_nivel_superior(self.valor.strip()[1:-1])]
+            if not valores:
+                trecho, parametros = "0", []
+            else:
+                trecho, parametros = f"{coluna} IN ({', '.join('?' for _ in valores)})", valores
+        elif self.operador == "is":
+            literal = {"null": "NULL", "true": "1", "false": "0"}.get(self.valor.lower())
+            if literal is None:
+                raise ErroPostgrest(f"valor inválido para is: {self.valor}")
+            trecho, parametros = f"{coluna} IS {literal}", []
+        else:
+            trecho, parametros = f"{coluna} {OPERADORES[self.operador]} ?", [remover_aspas(self.valor)]
+
+        return (f"NOT ({trecho})" if self.negado else trecho), parametros
+
+class Grupo:
+    """Combinação and/or de filtros (o conjunto de parâmetros da query é um and)"""
+
+    def __init__(self, conector, itens, negado=False):
+        self.conector = conector
+        self.itens = itens
+        self.negado = negado
+
+    @classmethod
+    def de_expressao(cls, conector, corpo, negado=False):
+        """Interpreta o corpo de 'or=(a.eq.1,and(b.lt.2,c.gt.3))'"""
+        itens = []
+        for parte in dividir_nivel_superior(corpo.strip()[1:-1]):
+            parte = parte.strip()
+            sub_negado = parte.startswith("not.")
+            if sub_negado:
+                parte = parte[4:]
+            match = re.match(r"^(and|or)(\(.*\))$", parte)
+            if match:
+                itens.append(cls.de_expressao(match.group(1), match.group(2), sub_negado))
+            else:
+                coluna, _, expressao = parte.partition(".")
+                itens.append(Condicao(coluna, ("not." if sub_negado else "") + expressao))
+        return cls(conector, itens, negado)
+
+    def sql(self, banco, tabela):
+        trechos, parametros = [], []
+        for item in self.itens:
+            trecho, params = item.sql(banco, tabela)
+            trechos.append(f"({trecho})")
+            parametros.extend(params)
+        if not trechos:
+            return "", []
+        sql = f" {self.conector.upper()} ".join(trechos)
+        return (f"NOT ({sql})" if self.negado else sql), parametros
+
+def interpretar_query(query):
+    """Separa a query string em (parâmetros reservados, filtro)"""
+    reservados = {}
+    itens = []
+    for chave, valor in parse_qsl(query, keep_blank_values=True):
+        if chave in PARAMETROS_RESERVADOS:
+            reservados[chave] = valor
+        elif chave in ("or", "and", "not.or", "not.and"):
+            negado = chave.startswith("not.")
+            itens.append(Grupo.de_expressao(chave.replace("not.", ""), valor, negado))
+        else:
+            itens.append(Condicao(chave, valor))
+    return reservados, Grupo("and", itens)
+
+def interpretar_ordem(ordem):
+    """'data_coleta.desc.nullslast,id.desc' -> [(coluna, direção, nulls)]"""
+    resultado = []
+    for parte in dividir_nivel_superior(ordem or ""):
+        pedacos = parte.strip().split(".")
+        coluna = pedacos[0]
+        direcao = "DESC" if "desc" in pedacos[1:] else "ASC"
+        nulls = "FIRST" if "nullsfirst" in pedacos[1:] else "LAST" if "nullslast" in pedacos[1:] else None
+        resultado.append((coluna, direcao, nulls))
+    return resultado
+
+# ========================================
+# SERVIDOR HTTP
+# ========================================
+
+class ManipuladorPostgrest(BaseHTTPRequestHandler):
+    """Atende /rest/v1/<tabela> com GET (select), POST (insert/upsert) e PATCH (update)"""
+
+    banco = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, corpo=None, cabecalhos=None):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8") if corpo is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        for chave, valor in (cabecalhos or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _tabela_e_query(self):
+        partes = urlsplit(self.path)
+        prefixo = "/rest/v1/"
+        if not partes.path.startswith(prefixo):
+            raise ErroPostgrest(f"rota não encontrada: {partes.path}", 404, "PGRST125")
+        return unquote(partes.path[len(prefixo):]), partes.query
+
+    def _ler_corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if not tamanho:
+            return None
+        return json.loads(self.rfile.read(tamanho).decode("utf-8"))
+
+    def _preferencias(self):
+        prefer = self.headers.get("Prefer", "")
+        return dict(item.strip().split("=", 1) for item in prefer.split(",") if "=" in item)
+
+    def _executar(self, operacao):
+        try:
+            tabela, query = self._tabela_e_query()
+            reservados, filtro = interpretar_query(query)
+            preferencias = self._preferencias()
+            retorno = preferencias.get("return", "representation" if operacao == "select" else "minimal")
+
+            if operacao == "select":
+                colunas = [c.strip() for c in reservados.get("select", "*").split(",") if c.strip()] or ["*"]
+                limite = int(reservados["limit"]) if "limit" in reservados else None
+                offset = int(reservados.get("offset") or 0)
+                linhas = self.banco.selecionar(tabela, colunas, filtro, interpretar_ordem(reservados.get("order")), limite, offset)
+                self._responder(200, linhas, {"Content-Range": f"0-{max(len(linhas) - 1, 0)}/*"})
+                return
+
+            corpo = self._ler_corpo()
+            if operacao == "insert":
+                linhas = corpo if isinstance(corpo, list) else [corpo]
+                on_conflict = reservados.get("on_conflict")
+                resolucao = preferencias.get("resolution")
+                if resolucao and not on_conflict:
+                    raise ErroPostgrest("upsert sem on_conflict não é suportado pelo servidor local")
+                retornadas = self.banco.inserir(tabela, linhas, on_conflict if resolucao else None, resolucao)
+                status = 201
+            else:
+                retornadas = self.banco.atualizar(tabela, corpo or {}, filtro)
+                status = 200
+
+            if retorno == "representation":
+                self._responder(status, retornadas)
+            else:
+                self._responder(204 if operacao == "update" else status)
+
+        except ErroPostgrest as e:
+            self._responder(e.status, {"message": str(e), "code": e.codigo, "details": None, "hint": None})
+        except (ValueError, sqlite3.Error) as e:
+            self._responder(400, {"message": str(e), "code": "PGRST100", "details": None, "hint": None})
+
+    def do_GET(self):
+        self._executar("select")
+
+    def do_POST(self):
+        self._executar("insert")
+
+    def do_PATCH(self):
+        self._executar("update")
+
+def iniciar_servidor(caminho_db=":memory:", porta=PORTA_PADRAO, host="127.0.0.1"):
+    """
+    Sobe o servidor em uma thread em segundo plano.
+
+    Retorna: (servidor, banco) - use servidor.server_address para obter a porta
+    real (porta=0 escolhe uma porta livre) e servidor.shutdown() para parar
+    """
+    banco = BancoLocal(caminho_db)
+    manipulador = type("ManipuladorLocal", (ManipuladorPostgrest,), {"banco": banco})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="supabase-local", daemon=True).start()
+    return servidor, banco
+
+# ========================================
+# BENCHMARK DE PERSISTÊNCIA (KABUM)
+# ========================================
+
+def gerar_produtos_info(quantidade, fator_preco=1.0):
+    """Gera um catálogo sintético no formato de produtos_info do Kabum_API"""
+    aleatorio = random.Random(42)
+    produtos_info = []
+    for i in range(1, quantidade + 1):
+        tipo = aleatorio.choices(["disponivel", "esgotado", "erro"], weights=[85, 12, 3])[0]
+        preco = round(aleatorio.uniform(20, 5000) * fator_preco, 2)
+        status = f"R$ {preco:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if tipo == "disponivel" else "Ops! Produto esgotado"
+        produtos_info.append({
+            'product_key': f"bench-{i}",
+            'nome': f"Produto Benchmark {i}",
+            'tipo': tipo,
+            'status': status,
+            'url': f"https://www.kabum.com.br/produto/{i}/benchmark",
+            'preco_estimado': preco,
+            'menor_preco': None,
+        })
+    return produtos_info
+
+def medir(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return time.perf_counter() - inicio, resultado
+
+def executar_benchmark(tamanhos=(20, 1000, 10000)):
+    """
+    Mede a latência ponta a ponta da persistência do Kabum_API contra o servidor local.
+
+    Para cada tamanho de catálogo: leitura dos menores preços, gravação do
+    histórico (completo e, no modo delta, uma execução sem mudanças),
+    reconciliação dos menores preços (primeira execução e execução com
+    preços menores) e o caminho completo via outbox até o flush.
+    """
+    servidor, banco = iniciar_servidor(porta=0)
+    porta = servidor.server_address[1]
+    os.environ['SUPABASE_URL'] = f"http://127.0.0.1:{porta}"
+    os.environ['SUPABASE_KEY'] = CHAVE_LOCAL
+
+    import Kabum_API
+
+    print("\n" + "="*114)
+    print("⏱️ BENCHMARK DE PERSISTÊNCIA - KABUM (Supabase local)".center(114))
+    print("="*114)
+    print(f"{'Produtos':>10} | {'Carregar mín.':>13} | {'Histórico':>10} | {'Hist. delta':>11} | {'Mín. (1ª)':>10} | {'Mín. (diff)':>11} | {'Outbox+flush':>12}")
+    print("-"*114)
+
+    resultados = []
+    for tamanho in tamanhos:
+        banco.resetar()
+        produtos_info = gerar_produtos_info(tamanho)
+        produtos_mais_baratos = gerar_produtos_info(tamanho, fator_preco=0.9)
+        chaves = [p['product_key'] for p in produtos_info]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            t_carregar, _ = medir(Kabum_API.carregar_menores_precos_historicos, chaves)
+            t_historico, _ = medir(Kabum_API.salvar_no_supabase, produtos_info)
+            Kabum_API.salvar_no_supabase(produtos_info, delta=True)
+            t_delta, _ = medir(Kabum_API.salvar_no_supabase, produtos_info, delta=True)
+            t_menores, _ = medir(Kabum_API.atualizar_menores_precos, produtos_info)
+            t_diff, _ = medir(Kabum_API.atualizar_menores_precos, produtos_mais_baratos)
+
+            with tempfile.TemporaryDirectory() as pasta:
+                outbox = Kabum_API.OutboxSupabase(os.path.join(pasta, "outbox.sqlite3"), intervalo=0.1)
+                outbox.iniciar()
+                inicio = time.perf_counter()
+                Kabum_API.salvar_no_supabase(produtos_info, outbox=outbox)
+                Kabum_API.atualizar_menores_precos(produtos_info, outbox=outbox)
+                outbox.finalizar()
+                t_outbox = time.perf_counter() - inicio
+
+        resultados.append({
+            'produtos': tamanho,
+            'carregar_menores': t_carregar,
+            'historico': t_historico,
+            'historico_delta': t_delta,
+            'menores_primeira': t_menores,
+            'menores_diff': t_diff,
+            'outbox_flush': t_outbox,
+        })
+        print(f"{tamanho:>10} | {t_carregar:>12.3f}s | {t_historico:>9.3f}s | {t_delta:>10.3f}s | {t_menores:>9.3f}s | {t_diff:>10.3f}s | {t_outbox:>11.3f}s")
+
+    print("="*114 + "\n")
+    servidor.shutdown()
+    return resultados
+
+# ========================================
+# EXECUÇÃO
+# ========================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Supabase local (subconjunto do PostgREST) para os monitores")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    servir = subcomandos.add_parser("servir", help="Sobe o servidor local")
+    servir.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    servir.add_argument("--db", default="supabase_local.sqlite3")
+
+    bench = subcomandos.add_parser("benchmark", help="Mede a persistência do Kabum_API")
+    bench.add_argument("--tamanhos", type=int, nargs="+", default=[20, 1000, 10000])
+
+    args = parser.parse_args()
+
+    if args.comando == "servir":
+        servidor, _ = iniciar_servidor(args.db, args.porta)
+        print(f"🗄️ Supabase local em http://127.0.0.1:{servidor.server_address[1]} (banco: {args.db})")
+        print(f"   SUPABASE_URL=http://127.0.0.1:{servidor.server_address[1]}  SUPABASE_KEY={CHAVE_LOCAL}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            servidor.shutdown()
+            print("\n🔒 Servidor encerrado")
+    else:
+        executar_benchmark(args.tamanhos)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+TEMPO DE IMPORTAÇÃO - Verificação de regressão do custo de importar os monitores
+Cada módulo é importado em um processo novo com `python -X importtime`. O
+orçamento vale para o custo próprio do projeto: do tempo cumulativo do módulo
+sai a linha de base, um processo que importa só os módulos da biblioteca padrão
+que os arquivos do projeto importam diretamente (smtplib, sqlite3, email...).
+Sobram os arquivos do projeto e as dependências de terceiros (selenium, numpy),
+medidos na mesma máquina e no mesmo instante que a linha de base.
+
+A verificação falha se algum módulo passar do orçamento, não puder ser
+importado ou imprimir algo ao ser importado (sinal de efeito colateral:
+conectar ao banco, abrir o Chrome...).
+
+Uso:
+    python Tempo_Importacao.py                        # todos os módulos
+    python Tempo_Importacao.py Kabum_API Navegador    # só os informados
+    python Tempo_Importacao.py --orcamento-ms 300 --repeticoes 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+# Orçamento de importação por módulo (ms, custo próprio: cumulativo do -X importtime
+# menos a linha de base da biblioteca padrão). Cerca de 2x o maior valor medido
+# (entre parênteses), folga para a variação de tempo entre máquinas e execuções.
+ORCAMENTOS_MS = {
+    'Navegador': 40,          # (16-20)
+    'Metricas': 10,           # (0-1)
+    'Kabum_API': 120,         # (47-62)
+    'Fortnite_API': 80,       # (27-31, selenium)
+    'Mercado_Livre_API': 80,  # (28-29, selenium)
+    'Posts_API': 90,          # (30-44, selenium)
+    'Supabase_Local': 20,     # (1-8)
+    'Analise_Precos': 360,    # (171-182, NumPy)
+}
+
+# Importações repetidas por módulo (vale a menor, para reduzir ruído)
+REPETICOES = 3
+
+# Dependências mais pesadas exibidas por módulo
+TOP_DEPENDENCIAS = 3
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+
+# ========================================
+# MEDIÇÃO
+# ========================================
+
+def interpretar_importtime(saida):
+    """
+    Converte a saída do -X importtime em [(nivel, nome, proprio_us, cumulativo_us)].
+
+    O nível é a profundidade na árvore de importação (0 = importado pelo -c).
+    """
+    linhas = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        partes = linha[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # cabeçalho
+        nome_bruto = partes[2][1:]
+        nivel = (len(nome_bruto) - len(nome_bruto.lstrip())) // 2
+        linhas.append((nivel, nome_bruto.strip(), int(partes[0]), int(partes[1])))
+    return linhas
+
+def importar_com_importtime(codigo):
+    """Roda `python -X importtime -c <codigo>` na pasta do projeto"""
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=PASTA_PROJETO, capture_output=True, text=True, timeout=120
+    )
+
+def modulo_do_projeto(nome):
+    """True se o módulo (ou o pacote dele) é um arquivo desta pasta"""
+    raiz = nome.split(".")[0]
+    return os.path.exists(os.path.join(PASTA_PROJETO, f"{raiz}.py")) or \
+        os.path.isdir(os.path.join(PASTA_PROJETO, raiz))
+
+def stdlib_do_projeto(linhas):
+    """
+    Módulos da biblioteca padrão importados diretamente por arquivos do projeto.
+
+    A saída do -X importtime vem em pós-ordem (filhos antes do pai); lida de trás
+    para frente, cada linha de nível N tem como pai a última de nível N-1.
+    """
+    ancestrais = []
+    modulos = set()
+    for nivel, nome, _, _ in reversed(linhas):
+        del ancestrais[nivel:]
+        pai = ancestrais[-1] if ancestrais else None
+        if pai and modulo_do_projeto(pai) and nome.split(".")[0] in sys.stdlib_module_names:
+            modulos.add(nome)
+        ancestrais.append(nome)
+    return modulos
+
+def medir_linha_base(modulos_stdlib):
+    """
+    Tempo (ms) para importar só a biblioteca padrão usada pelo projeto.
+
+    Módulos já carregados na inicialização do interpretador não aparecem na
+    saída, então todas as linhas de nível 0 são da linha de base.
+    """
+    if not modulos_stdlib:
+        return 0.0
+    processo = importar_com_importtime("import " + ", ".join(sorted(modulos_stdlib)))
+    if processo.returncode != 0:
+        return 0.0
+    inicializacao = {nome for _, nome, _, _ in interpretar_importtime(importar_com_importtime("pass").stderr)}
+    return sum(cumulativo for nivel, nome, _, cumulativo in interpretar_importtime(processo.stderr)
+               if nivel == 0 and nome not in inicializacao) / 1000
+
+def medir_importacao(modulo):
+    """
+    Importa o módulo em um processo novo.
+
+    Retorna: dict com 'ms' (cumulativo), 'stdlib' (módulos da biblioteca padrão
+    importados pelo projeto), 'dependencias' [(nome, ms)], 'stdout' e 'erro'
+    """
+    processo = importar_com_importtime(f"import {modulo}")
+
+    if processo.returncode != 0:
+        ultima_linha = (processo.stderr.strip().splitlines() or ["?"])[-1]
+        return {'ms': None, 'stdlib': set(), 'dependencias': [], 'stdout': processo.stdout, 'erro': ultima_linha}
+
+    linhas = interpretar_importtime(processo.stderr)
+    indice = max(i for i, (nivel, nome, _, _) in enumerate(linhas) if nivel == 0 and nome == modulo)
+
+    # Filhos diretos: linhas de nível 1 desde o módulo de nível 0 anterior
+    inicio = max([i for i, (nivel, _, _, _) in enumerate(linhas[:indice]) if nivel == 0] or [-1]) + 1
+    dependencias = sorted(
+        ((nome, cumulativo / 1000) for nivel, nome, _, cumulativo in linhas[inicio:indice] if nivel == 1),
+        key=lambda item: item[1], reverse=True
+    )
+
+    return {
+        'ms': linhas[indice][3] / 1000,
+        'stdlib': stdlib_do_projeto(linhas[inicio:indice + 1]),
+        'dependencias': dependencias[:TOP_DEPENDENCIAS],
+        'stdout': processo.stdout,
+        'erro': None,
+    }
+
+def verificar_modulo(modulo, orcamento_ms, repeticoes=REPETICOES):
+    """
+    Mede o módulo e a linha de base algumas vezes, alternando, e retorna
+    (aprovado, melhor_medicao); melhor_medicao['proprio_ms'] = módulo - linha de base
+    """
+    medicoes = []
+    bases = []
+    for _ in range(repeticoes):
+        medicao = medir_importacao(modulo)
+        if medicao['erro']:
+            return False, medicao
+        medicoes.append(medicao)
+        bases.append(medir_linha_base(medicao['stdlib']))
+
+    melhor = min(medicoes, key=lambda m: m['ms'])
+    melhor['base_ms'] = min(bases)
+    melhor['proprio_ms'] = max(0.0, melhor['ms'] - melhor['base_ms'])
+    aprovado = melhor['proprio_ms'] <= orcamento_ms and not melhor['stdout'].strip()
+    return aprovado, melhor
+
+# ========================================
+# EXECUÇÃO
+# ========================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica o tempo de importação dos módulos do projeto")
+    parser.add_argument('modulos', nargs='*', default=list(ORCAMENTOS_MS), help="módulos a verificar")
+    parser.add_argument('--orcamento-ms', type=float, help="orçamento único para todos os módulos (ms)")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES)
+    args = parser.parse_args()
+
+    print("\n" + "="*100)
+    print("⏱️ TEMPO DE IMPORTAÇÃO DOS MÓDULOS".center(100))
+    print("="*100)
+
+    reprovados = []
+    for modulo in args.modulos:
+        orcamento = args.orcamento_ms or ORCAMENTOS_MS.get(modulo, 100)
+        aprovado, medicao = verificar_modulo(modulo, orcamento, args.repeticoes)
+
+        if medicao['erro']:
+            print(f"❌ {modulo:<20} erro ao importar: {medicao['erro']}")
+        else:
+            icone = "✅" if aprovado else "❌"
+            print(f"{icone} {modulo:<20} {medicao['proprio_ms']:>8.1f} ms próprios (orçamento {orcamento:.0f} ms) | "
+                  f"{medicao['ms']:.1f} ms no total, {medicao['base_ms']:.1f} ms de biblioteca padrão")
+            for nome, ms in medicao['dependencias']:
+                print(f"      ↳ {nome:<40} {ms:>8.1f} ms")
+            if medicao['stdout'].strip():
+                primeira_linha = medicao['stdout'].strip().splitlines()[0]
+                print(f"      ⚠️ Imprimiu ao ser importado (efeito colateral): {primeira_linha[:80]}")
+
+        if not aprovado:
+            reprovados.append(modulo)
+
+    print("="*100)
+    if reprovados:
+        print(f"❌ {len(reprovados)} módulo(s) fora do orçamento: {', '.join(reprovados)}\n")
+        sys.exit(1)
+    print("✅ Todos os módulos dentro do orçamento\n")
+
+if __name__ == "__main__":
+    main()